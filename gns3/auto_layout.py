@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Force-directed (Fruchterman-Reingold) layout of the topology graph,
+vectorized with NumPy. Large graphs use a grid approximation of the
+repulsion between distant nodes in the spirit of Barnes-Hut.
+"""
+
+import math
+
+from .settings import DEFAULT_AUTO_LAYOUT_SPACING, DEFAULT_AUTO_LAYOUT_ITERATIONS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import logging
+log = logging.getLogger(__name__)
+
+# up to this number of nodes, the repulsion between
+# all the pairs of nodes is computed exactly
+EXACT_REPULSION_MAX_NODES = 1000
+
+# number of nodes whose repulsion is computed at once when exact
+REPULSION_BLOCK_SIZE = 256
+
+# average number of nodes per cell of the grid approximation
+NODES_PER_CELL = 8
+
+# pull of the nodes toward the center of the layout,
+# keeps the unlinked nodes from drifting away
+GRAVITY = 0.02
+
+
+def _exactRepulsion(x, y, k2):
+    """
+    Repulsion between all the pairs of nodes.
+
+    :param x: node abscissas (array)
+    :param y: node ordinates (array)
+    :param k2: squared ideal distance between nodes
+
+    :returns: displacement (x, y) tuple of arrays
+    """
+
+    count = len(x)
+    dx = numpy.zeros(count)
+    dy = numpy.zeros(count)
+    for start in range(0, count, REPULSION_BLOCK_SIZE):
+        stop = min(start + REPULSION_BLOCK_SIZE, count)
+        delta_x = x[start:stop, None] - x[None, :]
+        delta_y = y[start:stop, None] - y[None, :]
+        force = k2 / numpy.maximum(delta_x * delta_x + delta_y * delta_y, 1.0)
+        # a node has no effect on itself since its distance is null
+        dx[start:stop] = (delta_x * force).sum(axis=1)
+        dy[start:stop] = (delta_y * force).sum(axis=1)
+    return dx, dy
+
+
+def _gridRepulsion(x, y, k2):
+    """
+    Repulsion computed exactly between nodes in neighbouring cells of a
+    grid, distant cells acting as a single node at their centroid.
+
+    :param x: node abscissas (array)
+    :param y: node ordinates (array)
+    :param k2: squared ideal distance between nodes
+
+    :returns: displacement (x, y) tuple of arrays
+    """
+
+    count = len(x)
+    side = max(1, int(math.sqrt(count / NODES_PER_CELL)))
+    left, top = x.min(), y.min()
+    width = max(x.max() - left, 1.0)
+    height = max(y.max() - top, 1.0)
+    column = numpy.minimum((x - left) * (side / width), side - 1).astype(numpy.intp)
+    row = numpy.minimum((y - top) * (side / height), side - 1).astype(numpy.intp)
+    cell = row * side + column
+
+    cells = side * side
+    population = numpy.bincount(cell, minlength=cells)
+    occupied = numpy.flatnonzero(population)
+    weight = population[occupied].astype(numpy.float64)
+    centroid_x = numpy.bincount(cell, weights=x, minlength=cells)[occupied] / weight
+    centroid_y = numpy.bincount(cell, weights=y, minlength=cells)[occupied] / weight
+
+    # far field: the nodes of a cell share the repulsion of the
+    # occupied cells not adjacent to it, computed at its centroid
+    occupied_column = occupied % side
+    occupied_row = occupied // side
+    delta_x = centroid_x[:, None] - centroid_x[None, :]
+    delta_y = centroid_y[:, None] - centroid_y[None, :]
+    force = weight * k2 / numpy.maximum(delta_x * delta_x + delta_y * delta_y, 1.0)
+    near = (numpy.abs(occupied_column[:, None] - occupied_column[None, :]) <= 1) & (numpy.abs(occupied_row[:, None] - occupied_row[None, :]) <= 1)
+    force[near] = 0.0
+    far_x = numpy.zeros(cells)
+    far_y = numpy.zeros(cells)
+    far_x[occupied] = (delta_x * force).sum(axis=1)
+    far_y[occupied] = (delta_y * force).sum(axis=1)
+    dx = far_x[cell]
+    dy = far_y[cell]
+
+    # near field: every pair of nodes in adjacent cells
+    order = numpy.argsort(cell, kind="stable")
+    first = numpy.cumsum(population) - population
+    nodes = numpy.arange(count)
+    sources = []
+    targets = []
+    for row_offset in (-1, 0, 1):
+        for column_offset in (-1, 0, 1):
+            neighbour_row = row + row_offset
+            neighbour_column = column + column_offset
+            valid = (neighbour_row >= 0) & (neighbour_row < side) & (neighbour_column >= 0) & (neighbour_column < side)
+            neighbour = (neighbour_row * side + neighbour_column)[valid]
+            sizes = population[neighbour]
+            total = sizes.sum()
+            if not total:
+                continue
+            ends = numpy.cumsum(sizes)
+            offsets = numpy.arange(total) - numpy.repeat(ends - sizes, sizes)
+            sources.append(numpy.repeat(nodes[valid], sizes))
+            targets.append(order[numpy.repeat(first[neighbour], sizes) + offsets])
+    sources = numpy.concatenate(sources)
+    targets = numpy.concatenate(targets)
+    delta_x = x[sources] - x[targets]
+    delta_y = y[sources] - y[targets]
+    force = k2 / numpy.maximum(delta_x * delta_x + delta_y * delta_y, 1.0)
+    dx += numpy.bincount(sources, weights=delta_x * force, minlength=count)
+    dy += numpy.bincount(sources, weights=delta_y * force, minlength=count)
+    return dx, dy
+
+
+def forceDirectedLayout(positions, edges, spacing=DEFAULT_AUTO_LAYOUT_SPACING, iterations=DEFAULT_AUTO_LAYOUT_ITERATIONS, progress=None, seed=0):
+    """
+    Computes a force-directed layout: linked nodes attract each other
+    while all the nodes repel each other, the moves being limited by
+    a temperature cooling down at each iteration. The layout starts
+    from the current positions and keeps their center.
+
+    :param positions: initial (x, y) position for each node
+    :param edges: (index, index) tuples of linked nodes
+    :param spacing: ideal distance between linked nodes
+    :param iterations: number of iterations
+    :param progress: callable receiving the number of iterations done,
+    the layout stops early if it returns False
+    :param seed: seed of the moves separating nodes at the same position
+
+    :returns: array of the new (x, y) positions
+    """
+
+    if numpy is None:
+        raise ImportError("NumPy is required to lay out the topology")
+
+    positions = numpy.array(positions, dtype=numpy.float64).reshape(-1, 2)
+    count = len(positions)
+    if count < 2:
+        return positions
+    center = positions.mean(axis=0)
+
+    # spread the nodes sharing a position, they would not repel each other
+    _, shared, occurrences = numpy.unique(positions, axis=0, return_inverse=True, return_counts=True)
+    stacked = occurrences[shared.ravel()] > 1
+    if stacked.any():
+        random = numpy.random.RandomState(seed)
+        radius = spacing * math.sqrt(occurrences.max())
+        positions[stacked] += random.uniform(-radius, radius, (int(stacked.sum()), 2))
+
+    x = positions[:, 0].copy()
+    y = positions[:, 1].copy()
+    edges = numpy.array([edge for edge in edges if edge[0] != edge[1]], dtype=numpy.intp).reshape(-1, 2)
+    sources, targets = edges[:, 0], edges[:, 1]
+    k2 = float(spacing) * spacing
+    repulsion = _exactRepulsion if count <= EXACT_REPULSION_MAX_NODES else _gridRepulsion
+    initial_temperature = spacing * math.sqrt(count) / 10
+
+    for iteration in range(iterations):
+        dx, dy = repulsion(x, y, k2)
+
+        # attraction along the links, proportional to the squared length
+        delta_x = x[sources] - x[targets]
+        delta_y = y[sources] - y[targets]
+        length = numpy.sqrt(delta_x * delta_x + delta_y * delta_y) / spacing
+        delta_x *= length
+        delta_y *= length
+        dx -= numpy.bincount(sources, weights=delta_x, minlength=count) - numpy.bincount(targets, weights=delta_x, minlength=count)
+        dy -= numpy.bincount(sources, weights=delta_y, minlength=count) - numpy.bincount(targets, weights=delta_y, minlength=count)
+
+        # keeps the unlinked nodes close to the others
+        dx -= GRAVITY * (x - x.mean()) * math.sqrt(count)
+        dy -= GRAVITY * (y - y.mean()) * math.sqrt(count)
+
+        # the moves are limited by the temperature
+        temperature = initial_temperature * (1.0 - iteration / iterations)
+        distance = numpy.maximum(numpy.sqrt(dx * dx + dy * dy), 1e-9)
+        scale = numpy.minimum(distance, temperature) / distance
+        x += dx * scale
+        y += dy * scale
+
+        if progress is not None and progress(iteration + 1) is False:
+            log.debug("layout stopped after {} iterations".format(iteration + 1))
+            break
+
+    positions = numpy.column_stack((x, y))
+    positions += center - positions.mean(axis=0)
+    return positions
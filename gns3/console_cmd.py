@@ -19,6 +19,7 @@
 Handles commands typed in the GNS3 console.
 """
 
+import os
 import sys
 import cmd
 import logging
@@ -223,6 +224,34 @@ class ConsoleCmd(cmd.Cmd):
         else:
             print(self.do_debug.__doc__)
 
+    def do_record(self, args):
+        """
+        Record the JSON-RPC sessions with all servers (one file per server in directory)
+        record {start <directory> | stop}
+        """
+
+        params = args.split()
+        if '?' in args or not params or params[0] not in ("start", "stop") or (params[0] == "start" and len(params) < 2):
+            print(self.do_record.__doc__)
+            return
+
+        from .servers import Servers
+        servers = Servers.instance().allServers()
+        if params[0] == "start":
+            directory = " ".join(params[1:])
+            for server in servers:
+                path = os.path.join(directory, "{}_{}.jsonl".format(server.host, server.port))
+                try:
+                    server.startRecording(path)
+                    print("Recording session with {}:{} to {}".format(server.host, server.port, path))
+                except OSError as e:
+                    print("Cannot record session with {}:{}: {}".format(server.host, server.port, e))
+        else:
+            for server in servers:
+                if server.isRecording():
+                    server.stopRecording()
+                    print("Session recording with {}:{} stopped".format(server.host, server.port))
+
     def _show_device(self, params):
         """
         Handles the 'show device' command.
@@ -286,6 +315,38 @@ class ConsoleCmd(cmd.Cmd):
                             print(json.dumps(node, sort_keys=True, indent=4))
                             break
 
+    def _show_rpcstats(self, params):
+        """
+        Handles the 'show rpcstats' command.
+
+        :param params: list of parameters
+        """
+
+        from .servers import Servers
+        servers = Servers.instance().allServers()
+        if len(params) == 1:
+            for server in servers:
+                print(server.rpcStats().summary())
+                print()
+        elif params[1] == "json":
+            stats = [server.rpcStats().dump() for server in servers]
+            if len(params) >= 3:
+                # dump the stats to a file
+                path = " ".join(params[2:])
+                try:
+                    with open(path, "w") as f:
+                        json.dump(stats, f, sort_keys=True, indent=4)
+                    print("RPC statistics saved to {}".format(path))
+                except OSError as e:
+                    print("Cannot save RPC statistics to {}: {}".format(path, e))
+            else:
+                print(json.dumps(stats, sort_keys=True, indent=4))
+        elif params[1] == "reset":
+            for server in servers:
+                server.rpcStats().reset()
+        else:
+            print(self.do_show.__doc__)
+
     def do_show(self, args):
         """
         Show detail information about every device in current lab:
@@ -299,6 +360,13 @@ class ConsoleCmd(cmd.Cmd):
 
         Show topology info of a device:
         show run <device_name>
+
+        Show JSON-RPC statistics (latency, counts and bytes per method) for each server:
+        show rpcstats
+
+        Show or save JSON-RPC statistics as JSON, or reset them:
+        show rpcstats json [file]
+        show rpcstats reset
         """
 
         if '?' in args or args.strip() == "":
@@ -310,6 +378,8 @@ class ConsoleCmd(cmd.Cmd):
             self._show_device(params)
         elif params[0] == "run":
             self._show_run(params)
+        elif params[0] == "rpcstats":
+            self._show_rpcstats(params)
         else:
             print(self.do_show.__doc__)
 
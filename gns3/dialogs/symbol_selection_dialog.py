@@ -19,7 +19,7 @@
 Dialog to change the topology symbol of NodeItems
 """
 
-from ..qt import QtSvg, QtCore, QtGui
+from ..qt import QtCore, QtGui
 from ..ui.symbol_selection_dialog_ui import Ui_SymbolSelectionDialog
 
 
@@ -59,15 +59,12 @@ class SymbolSelectionDialog(QtGui.QDialog, Ui_SymbolSelectionDialog):
         current = self.uiSymbolListWidget.currentItem()
         if current:
             name = current.text()
-            path = ":/symbols/{}.normal.svg".format(name)
-            default_renderer = QtSvg.QSvgRenderer(path)
-            default_renderer.setObjectName(path)
-            path = ":/symbols/{}.selected.svg".format(name)
-            hover_renderer = QtSvg.QSvgRenderer(path)
-            hover_renderer.setObjectName(path)
+            default_symbol = ":/symbols/{}.normal.svg".format(name)
+            hover_symbol = ":/symbols/{}.selected.svg".format(name)
+            # the renderers are parsed once and shared by all the items
             for item in self._items:
-                item.setDefaultRenderer(default_renderer)
-                item.setHoverRenderer(hover_renderer)
+                item.setDefaultSymbol(default_symbol)
+                item.setHoverSymbol(hover_symbol)
 
     def getSymbols(self):
 
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Base classes for fake GNS3 servers speaking JSON-RPC over a local websocket.
+They are used to exercise the GUI without any emulator present.
+"""
+
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import re
+import socket
+import threading
+import time
+
+from ws4py import WS_KEY
+from ws4py.messaging import TextMessage
+from ws4py.streaming import Stream
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class FakeServerConnection(object):
+    """
+    Websocket connection with the GUI.
+
+    :param server: FakeServer instance
+    :param sock: connected socket
+    """
+
+    def __init__(self, server, sock):
+
+        self._server = server
+        self._sock = sock
+        self._write_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._scheduled = []
+        self._sequence = itertools.count()
+        self._running = True
+        self._reader = threading.Thread(target=self._readLoop, daemon=True)
+        self._sender = threading.Thread(target=self._sendLoop, daemon=True)
+
+    def start(self):
+        """
+        Starts serving the connection.
+        """
+
+        self._reader.start()
+        self._sender.start()
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def schedule(self, delay, message):
+        """
+        Schedules a message to be sent to the GUI.
+
+        :param delay: delay in seconds
+        :param message: JSON-RPC message (dictionary)
+        """
+
+        with self._condition:
+            heapq.heappush(self._scheduled, (time.monotonic() + delay, next(self._sequence), message))
+            self._condition.notify()
+
+    def _write(self, data):
+
+        with self._write_lock:
+            self._sock.sendall(data)
+
+    def _handshake(self):
+
+        request = b""
+        while b"\r\n\r\n" not in request:
+            data = self._sock.recv(4096)
+            if not data:
+                return False
+            request += data
+        match = re.search(b"Sec-WebSocket-Key:\\s*(\\S+)\r\n", request, re.IGNORECASE)
+        if match is None:
+            self._write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1(match.group(1) + WS_KEY).digest())
+        self._write(b"HTTP/1.1 101 Switching Protocols\r\n"
+                    b"Upgrade: websocket\r\n"
+                    b"Connection: Upgrade\r\n"
+                    b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        return True
+
+    def _recvExactly(self, size):
+
+        data = b""
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _readLoop(self):
+
+        try:
+            if not self._handshake():
+                return
+            self._server.connected(self)
+            stream = Stream(expect_masking=True)
+            size = 2
+            while self._running:
+                data = self._recvExactly(size)
+                if data is None:
+                    return
+                size = stream.parser.send(data) or 2
+                if stream.closing is not None or stream.errors:
+                    return
+                for ping in stream.pings:
+                    self._write(stream.pong(ping.data))
+                stream.pings = []
+                if stream.has_message:
+                    message = stream.message
+                    stream.message = None
+                    if message.is_text:
+                        self._server.received(self, message.data)
+        except OSError:
+            pass
+        finally:
+            with self._condition:
+                self._running = False
+                self._condition.notify()
+
+    def _sendLoop(self):
+
+        while True:
+            with self._condition:
+                while self._running and (not self._scheduled or self._scheduled[0][0] > time.monotonic()):
+                    timeout = self._scheduled[0][0] - time.monotonic() if self._scheduled else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                _, _, message = heapq.heappop(self._scheduled)
+            try:
+                self._write(TextMessage(json.dumps(message).encode("utf-8")).single(mask=False))
+            except OSError:
+                return
+
+
+class FakeServer(object):
+    """
+    Fake GNS3 server base class, serving each connection with its own threads.
+
+    :param host: host to listen on
+    :param port: port to listen on (0 means any free port)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+
+        self._host = host
+        self._port = port
+        self._listening_sock = None
+        self._accept_thread = None
+        self._connections = []
+
+    def host(self):
+        """
+        Returns the host the server is listening on.
+
+        :returns: host
+        """
+
+        return self._host
+
+    def port(self):
+        """
+        Returns the port the server is listening on.
+
+        :returns: port number
+        """
+
+        return self._port
+
+    def start(self):
+        """
+        Starts listening for connections.
+        """
+
+        self._listening_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listening_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listening_sock.bind((self._host, self._port))
+        self._listening_sock.listen(5)
+        self._port = self._listening_sock.getsockname()[1]
+        self._accept_thread = threading.Thread(target=self._acceptLoop, daemon=True)
+        self._accept_thread.start()
+        log.info("{} listening on {}:{}".format(self.__class__.__name__, self._host, self._port))
+
+    def stop(self):
+        """
+        Stops the server and closes all the connections.
+        """
+
+        if self._listening_sock is not None:
+            try:
+                self._listening_sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listening_sock.close()
+            self._listening_sock = None
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
+
+    def _acceptLoop(self):
+
+        while True:
+            try:
+                sock, _ = self._listening_sock.accept()
+            except (OSError, AttributeError):
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = FakeServerConnection(self, sock)
+            self._connections.append(connection)
+            connection.start()
+
+    def connected(self, connection):
+        """
+        Called when the websocket handshake with the GUI is done.
+
+        :param connection: FakeServerConnection instance
+        """
+
+        pass
+
+    def received(self, connection, data):
+        """
+        Called when a message has been received from the GUI.
+        JSON-RPC requests (including the ones in a batch) are passed to request().
+
+        :param connection: FakeServerConnection instance
+        :param data: JSON-RPC message or batch (bytes)
+        """
+
+        try:
+            message = json.loads(data.decode("utf-8"))
+        except ValueError:
+            log.warning("received data is not valid JSON")
+            return
+        messages = message if isinstance(message, list) else [message]
+        for message in messages:
+            if isinstance(message, dict) and message.get("id") is not None and "method" in message:
+                self.request(connection, message)
+
+    def request(self, connection, request):
+        """
+        Called for each JSON-RPC request received from the GUI.
+        Must be implemented by subclasses.
+
+        :param connection: FakeServerConnection instance
+        :param request: JSON-RPC request (dictionary)
+        """
+
+        raise NotImplementedError()
@@ -21,6 +21,7 @@ Graphical view on the scene where items are drawn.
 
 import os
 import pickle
+from contextlib import contextmanager
 
 from .qt import QtCore, QtGui, QtNetwork
 from .items.node_item import NodeItem
@@ -36,8 +37,6 @@ from .ports.port import Port
 from .dialogs.style_editor_dialog import StyleEditorDialog
 from .dialogs.text_editor_dialog import TextEditorDialog
 from .dialogs.symbol_selection_dialog import SymbolSelectionDialog
-from .utils.progress_dialog import ProgressDialog
-from .utils.wait_for_connection_thread import WaitForConnectionThread
 
 
 # link items
@@ -52,6 +51,9 @@ from .items.rectangle_item import RectangleItem
 from .items.ellipse_item import EllipseItem
 from .items.image_item import ImageItem
 
+# nodes within this distance of a dropped node are expected to be linked to it
+NEIGHBOUR_DISTANCE = 200
+
 
 class GraphicsView(QtGui.QGraphicsView):
     """
@@ -77,6 +79,8 @@ class GraphicsView(QtGui.QGraphicsView):
         self._newlink = None
         self._dragging = False
         self._last_mouse_position = None
+        self._bulk_insert_depth = 0
+        self._bulk_insert_state = None
         self._topology = Topology.instance()
 
         # set the scene
@@ -92,6 +96,7 @@ class GraphicsView(QtGui.QGraphicsView):
         self.setRenderHint(QtGui.QPainter.Antialiasing)
         self.setTransformationAnchor(QtGui.QGraphicsView.AnchorUnderMouse)
         self.setResizeAnchor(QtGui.QGraphicsView.AnchorViewCenter)
+        self._applyRenderingSettings()
 
         self._local_addresses = ['0.0.0.0', '127.0.0.1', 'localhost', '::1', '0:0:0:0:0:0:0:1', '::', QtNetwork.QHostInfo.localHostName()]
 
@@ -118,9 +123,42 @@ class GraphicsView(QtGui.QGraphicsView):
         # clear the topology summary
         self._main_window.uiTopologySummaryTreeWidget.clear()
 
-        # clear all objects on the scene
+        # give the node symbols back to the renderer cache
+        # and clear all objects on the scene
+        for item in self.scene().items():
+            if isinstance(item, NodeItem):
+                item.releaseSymbols()
         self.scene().clear()
 
+    @contextmanager
+    def bulkInsert(self):
+        """
+        Context to add or move many items on the scene: the scene index and
+        the viewport updates are suspended while the items are changed,
+        then the index is rebuilt and the view repainted once.
+        Only the outermost of nested contexts rebuilds and repaints.
+        """
+
+        scene = self.scene()
+        self._bulk_insert_depth += 1
+        if self._bulk_insert_depth == 1:
+            self._bulk_insert_state = (scene.itemIndexMethod(), self.viewportUpdateMode())
+            scene.setItemIndexMethod(QtGui.QGraphicsScene.NoIndex)
+            self.setViewportUpdateMode(QtGui.QGraphicsView.NoViewportUpdate)
+            self.viewport().setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self._bulk_insert_depth -= 1
+            if not self._bulk_insert_depth:
+                index_method, update_mode = self._bulk_insert_state
+                self._bulk_insert_state = None
+                # the index is built with all the items at once
+                scene.setItemIndexMethod(index_method)
+                self.setViewportUpdateMode(update_mode)
+                self.viewport().setUpdatesEnabled(True)
+                self.viewport().update()
+
     def updateProjectFilesDir(self, path):
         """
         Updates the project files directory path for all modules.
@@ -184,6 +222,26 @@ class GraphicsView(QtGui.QGraphicsView):
         for name, value in self._settings.items():
             settings.setValue(name, value)
         settings.endGroup()
+        self._applyRenderingSettings()
+
+    def _applyRenderingSettings(self):
+        """
+        Applies the symbol caching and level of detail settings to the items.
+        """
+
+        NodeItem.cache_symbols = self._settings["cache_node_symbols"]
+        if self._settings["level_of_detail"]:
+            NodeItem.symbol_zoom_threshold = self._settings["lod_symbol_zoom"]
+            NoteItem.label_zoom_threshold = self._settings["lod_label_zoom"]
+            LinkItem.status_point_zoom_threshold = self._settings["lod_status_point_zoom"]
+        else:
+            NodeItem.symbol_zoom_threshold = 0.0
+            NoteItem.label_zoom_threshold = 0.0
+            LinkItem.status_point_zoom_threshold = 0.0
+
+        # redraw the items cached with the previous settings
+        for item in self.scene().items():
+            item.update()
 
     def addingLinkSlot(self, enabled):
         """
@@ -268,6 +326,8 @@ class GraphicsView(QtGui.QGraphicsView):
         :param source_port: source Port instance
         :param destination_node: destination Node instance
         :param destination_port: destination Port instance
+
+        :returns: Link instance
         """
 
         link = Link(source_node, source_port, destination_node, destination_port)
@@ -277,6 +337,7 @@ class GraphicsView(QtGui.QGraphicsView):
         link.add_link_signal.connect(self.addLinkSlot)
         link.delete_link_signal.connect(self.deleteLinkSlot)
         self._topology.addLink(link)
+        return link
 
     def addLinkSlot(self, link_id):
         """
@@ -287,20 +348,12 @@ class GraphicsView(QtGui.QGraphicsView):
         """
 
         link = self._topology.getLink(link_id)
-        source_item = None
-        destination_item = None
         source_port = link.sourcePort()
         destination_port = link.destinationPort()
 
         # find the correct source and destination node items
-        for item in self.scene().items():
-            if isinstance(item, NodeItem):
-                if item.node().id() == link.sourceNode().id():
-                    source_item = item
-                if item.node().id() == link.destinationNode().id():
-                    destination_item = item
-            if source_item and destination_item:
-                break
+        source_item = self._topology.getNodeItem(link.sourceNode().id())
+        destination_item = self._topology.getNodeItem(link.destinationNode().id())
 
         if not source_item or not destination_item:
             print("Could not find a source or destination item for the link!")
@@ -667,14 +720,15 @@ class GraphicsView(QtGui.QGraphicsView):
                 offset = 100  # spacing between elements
                 integer, ok = QtGui.QInputDialog.getInteger(self, "Nodes", "Number of nodes:", 2, 1, 100, 1)
                 if ok:
-                    for node_number in range(integer):
-                        node_item = self.createNode(node_data, event.pos())
-                        if node_item is None:
-                            # stop if there is any error
-                            break
-                        x = node_item.pos().x() - (node_item.boundingRect().width() / 2) + (node_number % max_nodes_per_line) * offset
-                        y = node_item.pos().y() - (node_item.boundingRect().height() / 2) + (node_number // max_nodes_per_line) * offset
-                        node_item.setPos(x, y)
+                    with self.bulkInsert():
+                        for node_number in range(integer):
+                            node_item = self.createNode(node_data, event.pos())
+                            if node_item is None:
+                                # stop if there is any error
+                                break
+                            x = node_item.pos().x() - (node_item.boundingRect().width() / 2) + (node_number % max_nodes_per_line) * offset
+                            y = node_item.pos().y() - (node_item.boundingRect().height() / 2) + (node_number // max_nodes_per_line) * offset
+                            node_item.setPos(x, y)
             else:
                 self.createNode(node_data, event.pos())
         elif event.mimeData().hasFormat("text/uri-list") and event.mimeData().hasUrls():
@@ -1085,6 +1139,25 @@ class GraphicsView(QtGui.QGraphicsView):
             elif item.parentItem() is None:
                 item.delete()
 
+    def _neighbourNodes(self, scene_pos):
+        """
+        Returns the nodes a node dropped at a position is expected to be linked to:
+        the selected nodes if any, otherwise the nodes around the position.
+
+        :param scene_pos: drop position on the scene
+
+        :returns: list of Node instances
+        """
+
+        selected = [item.node() for item in self.scene().selectedItems() if isinstance(item, NodeItem)]
+        if selected:
+            return selected
+        area = QtCore.QRectF(scene_pos.x() - NEIGHBOUR_DISTANCE,
+                             scene_pos.y() - NEIGHBOUR_DISTANCE,
+                             NEIGHBOUR_DISTANCE * 2,
+                             NEIGHBOUR_DISTANCE * 2)
+        return [item.node() for item in self.scene().items(area) if isinstance(item, NodeItem)]
+
     def createNode(self, node_data, pos):
         """
         Creates a new node on the scene.
@@ -1107,18 +1180,11 @@ class GraphicsView(QtGui.QGraphicsView):
             if not node_module:
                 raise ModuleError("Could not find any module for {}".format(node_class))
 
-            server = node_module.allocateServer(node_class)
-            if not server.connected():
-                # connect to server in a non-blocking way.
-                self._thread = WaitForConnectionThread(server.host, server.port)
-                progress_dialog = ProgressDialog(self._thread,
-                                                 "Server",
-                                                 "Connecting to server {} on port {}...".format(server.host, server.port),
-                                                 "Cancel", busy=True, parent=self)
-                progress_dialog.show()
-                if progress_dialog.exec_() is False:
-                    return
+            neighbours = self._neighbourNodes(self.mapToScene(pos))
+            server = node_module.allocateServer(node_class, node_data["name"], neighbours)
 
+            # the module connects to the server without blocking if needed,
+            # the node requests are queued until the connection is ready
             node = node_module.createNode(node_class, server)
             node.error_signal.connect(self._main_window.uiConsoleTextEdit.writeError)
             node.warning_signal.connect(self._main_window.uiConsoleTextEdit.writeWarning)
@@ -1134,6 +1200,6 @@ class GraphicsView(QtGui.QGraphicsView):
         x = node_item.pos().x() - (node_item.boundingRect().width() / 2)
         y = node_item.pos().y() - (node_item.boundingRect().height() / 2)
         node_item.setPos(x, y)
-        self._topology.addNode(node)
+        self._topology.addNode(node, node_item)
         self._main_window.uiTopologySummaryTreeWidget.addNode(node)
         return node_item
@@ -52,9 +52,9 @@ class EthernetLinkItem(LinkItem):
         LinkItem.adjust(self)
 
         if self._hovered:
-            self.setPen(QtGui.QPen(QtCore.Qt.red, self._pen_width + 1, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin))
+            self.setPen(self.cachedPen(QtCore.Qt.red, self._pen_width + 1))
         else:
-            self.setPen(QtGui.QPen(QtCore.Qt.black, self._pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin))
+            self.setPen(self.cachedPen(QtCore.Qt.black, self._pen_width))
 
         # draw a line between nodes
         path = QtGui.QPainterPath(self.source)
@@ -112,6 +112,10 @@ class EthernetLinkItem(LinkItem):
             if self.length < 100:
                 return
 
+            # points cannot be told apart at this zoom level
+            if option.levelOfDetailFromTransform(painter.worldTransform()) < self.status_point_zoom_threshold:
+                return
+
             if self._source_port.status() == Port.started:
                 # port is active
                 color = QtCore.Qt.green
@@ -121,7 +125,7 @@ class EthernetLinkItem(LinkItem):
             else:
                 color = QtCore.Qt.red
 
-            painter.setPen(QtGui.QPen(color, self._point_size, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.MiterJoin))
+            painter.setPen(self.cachedPen(color, self._point_size, join=QtCore.Qt.MiterJoin))
             point1 = QtCore.QPointF(self.source + self.edge_offset) + QtCore.QPointF((self.dx * self._source_collision_offset) / self.length, (self.dy * self._source_collision_offset) / self.length)
 
             # avoid any collision of the status point with the source node
@@ -165,7 +169,7 @@ class EthernetLinkItem(LinkItem):
             else:
                 color = QtCore.Qt.red
 
-            painter.setPen(QtGui.QPen(color, self._point_size, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.MiterJoin))
+            painter.setPen(self.cachedPen(color, self._point_size, join=QtCore.Qt.MiterJoin))
             point2 = QtCore.QPointF(self.destination - self.edge_offset) - QtCore.QPointF((self.dx * self._destination_collision_offset) / self.length, (self.dy * self._destination_collision_offset) / self.length)
 
             # avoid any collision of the status point with the destination node
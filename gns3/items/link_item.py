@@ -41,6 +41,15 @@ class LinkItem(QtGui.QGraphicsPathItem):
 
     _draw_port_labels = False
 
+    # zoom level below which the status points are not drawn
+    status_point_zoom_threshold = 0.0
+
+    # link items waiting for their geometry to be recomputed
+    _pending_adjust = set()
+
+    # pens shared by all the link items
+    _pens = {}
+
     def __init__(self, source_item, source_port, destination_item, destination_port, link=None, adding_flag=False, multilink=0):
 
         QtGui.QGraphicsPathItem.__init__(self)
@@ -405,6 +414,53 @@ class LinkItem(QtGui.QGraphicsPathItem):
             self.source = QtCore.QPointF(self.source + offset)
             self.destination = QtCore.QPointF(self.destination + offset)
 
+    def scheduleAdjust(self):
+        """
+        Recomputes the geometry of this link once the pending events have
+        been processed, a link moved several times before the scene is
+        repainted (e.g. when dragging nodes) is only adjusted once.
+        """
+
+        if not LinkItem._pending_adjust:
+            QtCore.QTimer.singleShot(0, LinkItem.flushAdjust)
+        LinkItem._pending_adjust.add(self)
+
+    @staticmethod
+    def flushAdjust():
+        """
+        Recomputes the geometry of the links scheduled to be adjusted.
+        """
+
+        links = LinkItem._pending_adjust
+        LinkItem._pending_adjust = set()
+        for link in links:
+            try:
+                if link.scene():
+                    link.adjust()
+            except RuntimeError:
+                # the item has been deleted with the scene
+                continue
+
+    @staticmethod
+    def cachedPen(color, width, cap=QtCore.Qt.RoundCap, join=QtCore.Qt.RoundJoin):
+        """
+        Returns a solid pen, pens are created once and shared by all the link items.
+
+        :param color: Qt.GlobalColor
+        :param width: pen width
+        :param cap: Qt.PenCapStyle
+        :param join: Qt.PenJoinStyle
+
+        :returns: QPen instance
+        """
+
+        key = (color, width, cap, join)
+        pen = LinkItem._pens.get(key)
+        if pen is None:
+            pen = QtGui.QPen(color, width, QtCore.Qt.SolidLine, cap, join)
+            LinkItem._pens[key] = pen
+        return pen
+
     def setMousePoint(self, scene_point):
         """
         Sets new mouse point coordinates.
@@ -19,7 +19,11 @@
 Graphical representation of a node on the QGraphicsScene.
 """
 
+import math
+
 from ..qt import QtCore, QtGui, QtSvg
+from ..svg_renderer_cache import SvgRendererCache
+from ..settings import DEFAULT_SYMBOL_PIXMAP_MAX_SIZE
 from .note_item import NoteItem
 
 
@@ -34,6 +38,12 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
 
     show_layer = False
 
+    # draw the symbols from pixmaps shared by all the items
+    cache_symbols = True
+
+    # zoom level below which a plain shape is drawn instead of the symbol
+    symbol_zoom_threshold = 0.0
+
     def __init__(self, node, default_symbol=None, hover_symbol=None):
 
         QtSvg.QGraphicsSvgItem.__init__(self)
@@ -55,20 +65,13 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
         self.setAcceptsHoverEvents(True)
         self.setZValue(1)
 
-        # create renderers using symbols paths/resources
-        if default_symbol:
-            self._default_renderer = QtSvg.QSvgRenderer(default_symbol)
-            if default_symbol != node.defaultSymbol():
-                self._default_renderer.setObjectName(default_symbol)
-        else:
-            self._default_renderer = QtSvg.QSvgRenderer(node.defaultSymbol())
-        if hover_symbol:
-            self._hover_renderer = QtSvg.QSvgRenderer(hover_symbol)
-            if hover_symbol != node.hoverSymbol():
-                self._hover_renderer.setObjectName(hover_symbol)
-        else:
-            self._hover_renderer = QtSvg.QSvgRenderer(node.hoverSymbol())
-        self.setSharedRenderer(self._default_renderer)
+        # get the renderers shared by all the items using the same symbols paths/resources,
+        # the symbols are saved with the topology only if they are not the node defaults.
+        self._default_symbol = self._hover_symbol = None
+        self._custom_default_symbol = self._custom_hover_symbol = ""
+        self._default_renderer = self._hover_renderer = None
+        self.setDefaultSymbol(default_symbol or node.defaultSymbol(), custom=bool(default_symbol) and default_symbol != node.defaultSymbol())
+        self.setHoverSymbol(hover_symbol or node.hoverSymbol(), custom=bool(hover_symbol) and hover_symbol != node.hoverSymbol())
 
         # connect signals to know about some events
         # e.g. when the node has been started, stopped or suspended etc.
@@ -102,15 +105,36 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
 
         return self._default_renderer
 
-    def setDefaultRenderer(self, default_renderer):
+    def setDefaultSymbol(self, path, custom=True):
         """
-        Sets new default QSvgRenderer.
+        Sets a new default symbol.
+
+        :param path: symbol path (or resource)
+        :param custom: indicates if the symbol must be saved with the topology
 
-        :param default_renderer: QSvgRenderer instance
+        :returns: False if the symbol is not valid (the current symbol is kept)
         """
 
-        self._default_renderer = default_renderer
-        self.setSharedRenderer(self._default_renderer)
+        renderer = SvgRendererCache.instance().acquire(path)
+        if not renderer.isValid() and self._default_renderer:
+            SvgRendererCache.instance().release(path)
+            return False
+        self.releaseSymbols(hover=False)
+        self._default_symbol = path
+        self._custom_default_symbol = path if custom else ""
+        self._default_renderer = renderer
+        if not self.isSelected():
+            self.setSharedRenderer(self._default_renderer)
+        return True
+
+    def customDefaultSymbol(self):
+        """
+        Returns the default symbol if not the node default.
+
+        :returns: symbol path or empty string
+        """
+
+        return self._custom_default_symbol
 
     def hoverRenderer(self):
         """
@@ -121,14 +145,51 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
 
         return self._hover_renderer
 
-    def setHoverRenderer(self, hover_renderer):
+    def setHoverSymbol(self, path, custom=True):
+        """
+        Sets a new hover symbol.
+
+        :param path: symbol path (or resource)
+        :param custom: indicates if the symbol must be saved with the topology
+
+        :returns: False if the symbol is not valid (the current symbol is kept)
+        """
+
+        renderer = SvgRendererCache.instance().acquire(path)
+        if not renderer.isValid() and self._hover_renderer:
+            SvgRendererCache.instance().release(path)
+            return False
+        self.releaseSymbols(default=False)
+        self._hover_symbol = path
+        self._custom_hover_symbol = path if custom else ""
+        self._hover_renderer = renderer
+        if self.isSelected():
+            self.setSharedRenderer(self._hover_renderer)
+        return True
+
+    def customHoverSymbol(self):
         """
-        Sets new hover QSvgRenderer.
+        Returns the hover symbol if not the node default.
 
-        :param hover_renderer: QSvgRenderer instance
+        :returns: symbol path or empty string
         """
 
-        self._hover_renderer = hover_renderer
+        return self._custom_hover_symbol
+
+    def releaseSymbols(self, default=True, hover=True):
+        """
+        Gives the symbols back to the renderer cache.
+
+        :param default: release the default symbol
+        :param hover: release the hover symbol
+        """
+
+        if default and self._default_symbol:
+            SvgRendererCache.instance().release(self._default_symbol)
+            self._default_symbol = None
+        if hover and self._hover_symbol:
+            SvgRendererCache.instance().release(self._hover_symbol)
+            self._hover_symbol = None
 
     def setUnsavedState(self):
         """
@@ -224,7 +285,9 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
         when a the node has been updated.
         """
 
-        self._node_label.setPlainText(self._node.name())
+        # the label is created once the node has been created
+        if self._node_label:
+            self._node_label.setPlainText(self._node.name())
         self.setUnsavedState()
 
         # update the link tooltips in case the
@@ -248,6 +311,7 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
         """
 
         self._node.removeAllocatedName()
+        self.releaseSymbols()
         if self in self.scene().items():
             self.scene().removeItem(self)
         self.setUnsavedState()
@@ -399,11 +463,12 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
             else:
                 self.setSharedRenderer(self._default_renderer)
 
-        # adjust link item positions when this node is moving or has changed.
-        if change == QtSvg.QGraphicsSvgItem.ItemPositionChange or change == QtSvg.QGraphicsSvgItem.ItemPositionHasChanged:
+        # adjust link item positions when this node has moved,
+        # once for all the moves made before the scene is repainted.
+        if change == QtSvg.QGraphicsSvgItem.ItemPositionHasChanged:
             self.setUnsavedState()
             for link in self._links:
-                link.adjust()
+                link.scheduleAdjust()
 
         return QtGui.QGraphicsItem.itemChange(self, change, value)
 
@@ -418,7 +483,12 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
 
         # don't show the selection rectangle
         option.state = QtGui.QStyle.State_None
-        QtSvg.QGraphicsSvgItem.paint(self, painter, option, widget)
+        level_of_detail = option.levelOfDetailFromTransform(painter.worldTransform())
+        if level_of_detail < self.symbol_zoom_threshold:
+            # the symbol is too small to be recognized
+            painter.fillRect(self.boundingRect(), QtCore.Qt.darkGray)
+        elif not self.cache_symbols or not self._paintSymbolPixmap(painter, level_of_detail):
+            QtSvg.QGraphicsSvgItem.paint(self, painter, option, widget)
 
         if not self._initialized or self.show_layer:
             brect = self.boundingRect()
@@ -435,6 +505,36 @@ class NodeItem(QtSvg.QGraphicsSvgItem):
                 text = "S"  # initialization
             painter.drawText(QtCore.QPointF(center.x() - 4, center.y() + 4), text)
 
+    def _paintSymbolPixmap(self, painter, level_of_detail):
+        """
+        Draws the current symbol from a cached pixmap.
+
+        :param painter: QPainter instance
+        :param level_of_detail: zoom level of the painter
+
+        :returns: False if the symbol must be drawn from its vector representation
+        """
+
+        path = self.renderer().objectName()
+        cache = SvgRendererCache.instance()
+        if path not in cache or level_of_detail <= 0:
+            return False
+
+        # rasterize at the next power of 2 of the zoom level,
+        # zooming in and out then reuses a few pixmaps
+        scale = 2 ** math.ceil(math.log(level_of_detail, 2))
+        rect = self.boundingRect()
+        size = QtCore.QSize(math.ceil(rect.width() * scale), math.ceil(rect.height() * scale))
+        if size.isEmpty() or max(size.width(), size.height()) > DEFAULT_SYMBOL_PIXMAP_MAX_SIZE:
+            return False
+
+        pixmap = cache.pixmap(path, size)
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(rect, pixmap, QtCore.QRectF(pixmap.rect()))
+        painter.restore()
+        return True
+
     def setZValue(self, value):
         """
         Sets a new Z value.
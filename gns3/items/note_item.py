@@ -31,6 +31,9 @@ class NoteItem(QtGui.QGraphicsTextItem):
 
     show_layer = False
 
+    # zoom level below which the node and port labels are not drawn
+    label_zoom_threshold = 0.0
+
     def __init__(self, parent=None):
 
         QtGui.QGraphicsTextItem.__init__(self, parent)
@@ -152,6 +155,10 @@ class NoteItem(QtGui.QGraphicsTextItem):
         :param widget: QWidget instance
         """
 
+        if self.parentItem() and option.levelOfDetailFromTransform(painter.worldTransform()) < self.label_zoom_threshold:
+            # labels cannot be read at this zoom level
+            return
+
         QtGui.QGraphicsTextItem.paint(self, painter, option, widget)
 
         if self.show_layer is False or self.parentItem():
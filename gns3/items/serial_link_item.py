@@ -51,9 +51,9 @@ class SerialLinkItem(LinkItem):
         LinkItem.adjust(self)
 
         if self._hovered:
-            self.setPen(QtGui.QPen(QtCore.Qt.red, self._pen_width + 1, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin))
+            self.setPen(self.cachedPen(QtCore.Qt.red, self._pen_width + 1))
         else:
-            self.setPen(QtGui.QPen(QtCore.Qt.darkRed, self._pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin))
+            self.setPen(self.cachedPen(QtCore.Qt.darkRed, self._pen_width))
 
         # get source to destination angle
         vector_angle = math.atan2(self.dy, self.dx)
@@ -113,6 +113,10 @@ class SerialLinkItem(LinkItem):
             if self.length < 80:
                 return
 
+            # points cannot be told apart at this zoom level
+            if option.levelOfDetailFromTransform(painter.worldTransform()) < self.status_point_zoom_threshold:
+                return
+
             # source point color
             if self._source_port.status() == Port.started:
                 # port is active
@@ -123,7 +127,7 @@ class SerialLinkItem(LinkItem):
             else:
                 color = QtCore.Qt.red
 
-            painter.setPen(QtGui.QPen(color, self._point_size, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.MiterJoin))
+            painter.setPen(self.cachedPen(color, self._point_size, join=QtCore.Qt.MiterJoin))
 
             source_port_label = self._source_port.label()
             if self._draw_port_labels:
@@ -156,7 +160,7 @@ class SerialLinkItem(LinkItem):
             else:
                 color = QtCore.Qt.red
 
-            painter.setPen(QtGui.QPen(color, self._point_size, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.MiterJoin))
+            painter.setPen(self.cachedPen(color, self._point_size, join=QtCore.Qt.MiterJoin))
 
             destination_port_label = self._destination_port.label()
             if self._draw_port_labels:
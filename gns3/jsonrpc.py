@@ -23,21 +23,157 @@ http://www.jsonrpc.org/specification
 import json
 import uuid
 
+import logging
+log = logging.getLogger(__name__)
+
+
+class JSONCodec(object):
+    """
+    JSON codec based on the Python standard library.
+    """
+
+    name = "json"
+
+    @staticmethod
+    def encode(obj):
+        """
+        Serializes an object to JSON.
+
+        :param obj: object to serialize
+
+        :returns: JSON document (bytes)
+        """
+
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def decode(data):
+        """
+        Deserializes a JSON document.
+
+        :param data: JSON document (bytes or string)
+
+        :returns: Python object
+        """
+
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode("utf-8")
+        return json.loads(data)
+
+
+try:
+    import orjson
+
+    class ORJSONCodec(JSONCodec):
+        """
+        JSON codec based on orjson (C extension).
+        """
+
+        name = "orjson"
+
+        @staticmethod
+        def encode(obj):
+
+            return orjson.dumps(obj)
+
+        @staticmethod
+        def decode(data):
+
+            return orjson.loads(data)
+
+except ImportError:
+    ORJSONCodec = None
+
+try:
+    import ujson
+
+    class UJSONCodec(JSONCodec):
+        """
+        JSON codec based on ujson (C extension).
+        """
+
+        name = "ujson"
+
+        @staticmethod
+        def encode(obj):
+
+            return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+        @staticmethod
+        def decode(data):
+
+            return ujson.loads(data)
+
+except ImportError:
+    UJSONCodec = None
+
+CODECS = [codec for codec in (ORJSONCodec, UJSONCodec, JSONCodec) if codec is not None]
+_codec = CODECS[0]
+
+
+def codec():
+    """
+    Returns the codec used to encode and decode JSON-RPC messages.
+
+    :returns: codec class
+    """
+
+    return _codec
+
+
+def setCodec(name):
+    """
+    Sets the codec used to encode and decode JSON-RPC messages.
+
+    :param name: codec name (json, orjson or ujson)
+    """
+
+    global _codec
+    for available_codec in CODECS:
+        if available_codec.name == name:
+            _codec = available_codec
+            log.info("using {} to encode and decode JSON-RPC messages".format(name))
+            return
+    raise ValueError("JSON codec {} is not available".format(name))
+
 
 class JSONRPCObject(object):
     """
     Base object for JSON-RPC requests, responses,
     notifications and errors.
+
+    The JSON-RPC message is built once when the object is created,
+    fields can be read as attributes.
     """
 
+    __slots__ = ("_message",)
+
     def __init__(self):
-        return JSONRPCEncoder().default(self)
+        self._message = {"jsonrpc": 2.0}
+
+    def __getattr__(self, name):
+
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._message[name]
+        except KeyError:
+            raise AttributeError(name)
 
     def __str__(self, *args, **kwargs):
-        return json.dumps(self, cls=JSONRPCEncoder)
+        return self.encode().decode("utf-8")
 
     def __call__(self):
-        return JSONRPCEncoder().default(self)
+        return self._message
+
+    def encode(self):
+        """
+        Serializes this message with the current codec.
+
+        :returns: JSON-RPC message (bytes)
+        """
+
+        return _codec.encode(self._message)
 
 
 class JSONRPCEncoder(json.JSONEncoder):
@@ -51,12 +187,7 @@ class JSONRPCEncoder(json.JSONEncoder):
         """
 
         if isinstance(obj, JSONRPCObject):
-            message = {"jsonrpc": 2.0}
-            for field in dir(obj):
-                if not field.startswith('_'):
-                    value = getattr(obj, field)
-                    message[field] = value
-            return message
+            return obj()
         return json.JSONEncoder.default(self, obj)
 
 
@@ -65,10 +196,12 @@ class JSONRPCInvalidRequest(JSONRPCObject):
     Error response for an invalid request.
     """
 
+    __slots__ = ()
+
     def __init__(self):
         JSONRPCObject.__init__(self)
-        self.id = None
-        self.error = {"code": -32600, "message": "Invalid Request"}
+        self._message["id"] = None
+        self._message["error"] = {"code": -32600, "message": "Invalid Request"}
 
 
 class JSONRPCMethodNotFound(JSONRPCObject):
@@ -78,10 +211,12 @@ class JSONRPCMethodNotFound(JSONRPCObject):
     :param request_id: JSON-RPC identifier
     """
 
+    __slots__ = ()
+
     def __init__(self, request_id):
         JSONRPCObject.__init__(self)
-        self.id = request_id
-        self.error = {"code": -32601, "message": "Method not found"}
+        self._message["id"] = request_id
+        self._message["error"] = {"code": -32601, "message": "Method not found"}
 
 
 class JSONRPCInvalidParams(JSONRPCObject):
@@ -91,10 +226,12 @@ class JSONRPCInvalidParams(JSONRPCObject):
     :param request_id: JSON-RPC identifier
     """
 
+    __slots__ = ()
+
     def __init__(self, request_id):
         JSONRPCObject.__init__(self)
-        self.id = request_id
-        self.error = {"code": -32602, "message": "Invalid params"}
+        self._message["id"] = request_id
+        self._message["error"] = {"code": -32602, "message": "Invalid params"}
 
 
 class JSONRPCInternalError(JSONRPCObject):
@@ -104,10 +241,12 @@ class JSONRPCInternalError(JSONRPCObject):
     :param request_id: JSON-RPC identifier (optional)
     """
 
+    __slots__ = ()
+
     def __init__(self, request_id=None):
         JSONRPCObject.__init__(self)
-        self.id = request_id
-        self.error = {"code": -32603, "message": "Internal error"}
+        self._message["id"] = request_id
+        self._message["error"] = {"code": -32603, "message": "Internal error"}
 
 
 class JSONRPCParseError(JSONRPCObject):
@@ -115,10 +254,12 @@ class JSONRPCParseError(JSONRPCObject):
     Error response for parsing error.
     """
 
+    __slots__ = ()
+
     def __init__(self):
         JSONRPCObject.__init__(self)
-        self.id = None
-        self.error = {"code": -32700, "message": "Parse error"}
+        self._message["id"] = None
+        self._message["error"] = {"code": -32700, "message": "Parse error"}
 
 
 class JSONRPCCustomError(JSONRPCObject):
@@ -130,10 +271,12 @@ class JSONRPCCustomError(JSONRPCObject):
     :param request_id: JSON-RPC identifier (optional)
     """
 
+    __slots__ = ()
+
     def __init__(self, code, message, request_id=None):
         JSONRPCObject.__init__(self)
-        self.id = request_id
-        self.error = {"code": code, "message": message}
+        self._message["id"] = request_id
+        self._message["error"] = {"code": code, "message": message}
 
 
 class JSONRPCResponse(JSONRPCObject):
@@ -144,10 +287,12 @@ class JSONRPCResponse(JSONRPCObject):
     :param request_id: JSON-RPC identifier
     """
 
+    __slots__ = ()
+
     def __init__(self, result, request_id):
         JSONRPCObject.__init__(self)
-        self.id = request_id
-        self.result = result
+        self._message["id"] = request_id
+        self._message["result"] = result
 
 
 class JSONRPCRequest(JSONRPCObject):
@@ -159,14 +304,16 @@ class JSONRPCRequest(JSONRPCObject):
     :param request_id: JSON-RPC identifier (generated by default)
     """
 
+    __slots__ = ("id", "method")
+
     def __init__(self, method, params=None, request_id=None):
-        JSONRPCObject.__init__(self)
-        if request_id == None:
+        if request_id is None:
             request_id = str(uuid.uuid4())
         self.id = request_id
         self.method = method
+        self._message = {"jsonrpc": 2.0, "id": request_id, "method": method}
         if params:
-            self.params = params
+            self._message["params"] = params
 
 
 class JSONRPCNotification(JSONRPCObject):
@@ -177,8 +324,10 @@ class JSONRPCNotification(JSONRPCObject):
     :param params: JSON-RPC params for the corresponding method (optional)
     """
 
+    __slots__ = ("method",)
+
     def __init__(self, method, params=None):
-        JSONRPCObject.__init__(self)
         self.method = method
+        self._message = {"jsonrpc": 2.0, "method": method}
         if params:
-            self.params = params
+            self._message["params"] = params
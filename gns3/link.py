@@ -39,9 +39,10 @@ class Link(QtCore.QObject):
     """
 
     # signals used to let the GUI view know about link
-    # additions and deletions.
+    # additions, deletions and cancellations.
     add_link_signal = QtCore.Signal(int)
     delete_link_signal = QtCore.Signal(int)
+    cancel_link_signal = QtCore.Signal(int)
 
     _instance_count = 1
 
@@ -371,6 +372,7 @@ class Link(QtCore.QObject):
 
         self._source_nio_active = False
         self._destination_nio_active = False
+        self.cancel_link_signal.emit(self._id)
 
     def dump(self):
         """
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Creates the links of a topology being loaded as soon as both their
+nodes are ready, without flooding the servers with link creations.
+"""
+
+from collections import deque
+
+from .qt import QtCore
+from .settings import DEFAULT_MAX_LINK_CREATIONS_PER_SERVER, DEFAULT_LINK_CREATION_TIMEOUT
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class LinkScheduler(object):
+    """
+    Link materialization scheduler.
+
+    Each link of the topology file waits for its nodes with a countdown
+    of the endpoints not ready yet, the link is queued on the server of
+    its source node when the countdown reaches 0.
+
+    :param create_link: callable creating a link, called with the link
+    representation, the source node, the source port, the destination node
+    and the destination port, returns a Link instance or None
+    :param max_per_server: maximum number of links being created at the
+    same time on a server (0 means no limit)
+    :param timeout: seconds after which a link being created no longer
+    counts against the limit (0 means no timeout)
+    """
+
+    def __init__(self, create_link, max_per_server=DEFAULT_MAX_LINK_CREATIONS_PER_SERVER, timeout=DEFAULT_LINK_CREATION_TIMEOUT):
+
+        self._create_link = create_link
+        self._max_per_server = max_per_server
+        self._timeout = timeout
+        self._links = {}
+        self._next_key = 0
+        self._countdowns = {}
+        self._node_links = {}
+        self._node_remaining = {}
+        self._ready_nodes = {}
+        self._port_maps = {}
+        self._queues = {}
+        self._in_flight = {}
+        self._started = {}
+        self._dispatching = False
+        self._redispatch = False
+
+    def load(self, topology_links):
+        """
+        Builds the dependencies between the links and the nodes.
+
+        :param topology_links: link representations from a topology file
+        """
+
+        for topology_link in topology_links:
+            log.debug("mapping node to link with ID {}".format(topology_link["id"]))
+            key = self._next_key
+            self._next_key += 1
+            self._links[key] = topology_link
+            endpoints = {topology_link["source_node_id"], topology_link["destination_node_id"]}
+            self._countdowns[key] = len(endpoints)
+            for node_id in endpoints:
+                self._node_links.setdefault(node_id, []).append(key)
+                self._node_remaining[node_id] = self._node_remaining.get(node_id, 0) + 1
+
+    def nodeReady(self, node):
+        """
+        Lets the scheduler know a node has been created,
+        the links waiting only for this node are queued.
+
+        :param node: Node instance
+        """
+
+        keys = self._node_links.pop(node.id(), None)
+        if not keys:
+            return
+
+        self._ready_nodes[node.id()] = node
+        self._port_maps[node.id()] = {port.id(): port for port in node.ports()}
+        for key in keys:
+            self._countdowns[key] -= 1
+            if self._countdowns[key] == 0:
+                del self._countdowns[key]
+                source_node = self._ready_nodes[self._links[key]["source_node_id"]]
+                self._queues.setdefault(source_node.server().id(), deque()).append(key)
+        self._dispatch()
+
+    def pending(self):
+        """
+        Returns the number of links not created yet.
+
+        :returns: integer
+        """
+
+        return len(self._links)
+
+    def pendingLinks(self):
+        """
+        Returns the links not being created yet, the others
+        are already known by the topology.
+
+        :returns: list of link representations
+        """
+
+        return [topology_link for key, topology_link in self._links.items() if key not in self._started]
+
+    def inFlight(self, server_id):
+        """
+        Returns the number of links being created on a server.
+
+        :param server_id: server identifier
+
+        :returns: integer
+        """
+
+        return self._in_flight.get(server_id, 0)
+
+    def clear(self):
+        """
+        Forgets all the links, the links being created are not canceled.
+        """
+
+        self._links.clear()
+        self._countdowns.clear()
+        self._node_links.clear()
+        self._node_remaining.clear()
+        self._ready_nodes.clear()
+        self._port_maps.clear()
+        self._queues.clear()
+        self._in_flight.clear()
+        self._started.clear()
+
+    def _linkServers(self, key):
+        """
+        Returns the identifiers of the servers involved in a link.
+
+        :param key: link key
+
+        :returns: set of server identifiers
+        """
+
+        topology_link = self._links[key]
+        return {self._ready_nodes[topology_link["source_node_id"]].server().id(),
+                self._ready_nodes[topology_link["destination_node_id"]].server().id()}
+
+    def _dispatch(self):
+        """
+        Starts the queued links the servers have room for.
+        """
+
+        if self._dispatching:
+            # a link has finished while starting another one
+            self._redispatch = True
+            return
+
+        self._dispatching = True
+        try:
+            self._redispatch = True
+            while self._redispatch:
+                self._redispatch = False
+                for queue in list(self._queues.values()):
+                    while queue:
+                        servers = self._linkServers(queue[0])
+                        if self._max_per_server and any(self.inFlight(server_id) >= self._max_per_server for server_id in servers):
+                            break
+                        self._start(queue.popleft(), servers)
+        finally:
+            self._dispatching = False
+
+    def _start(self, key, servers):
+        """
+        Creates a link.
+
+        :param key: link key
+        :param servers: identifiers of the servers involved in the link
+        """
+
+        topology_link = self._links[key]
+        source_node_id = topology_link["source_node_id"]
+        destination_node_id = topology_link["destination_node_id"]
+        source_node = self._ready_nodes[source_node_id]
+        destination_node = self._ready_nodes[destination_node_id]
+        source_port = self._port_maps[source_node_id].get(topology_link["source_port_id"])
+        destination_port = self._port_maps[destination_node_id].get(topology_link["destination_port_id"])
+
+        for node_id in {source_node_id, destination_node_id}:
+            self._node_remaining[node_id] -= 1
+            if not self._node_remaining[node_id]:
+                # all the links of this node have been started
+                del self._node_remaining[node_id]
+                del self._ready_nodes[node_id]
+                del self._port_maps[node_id]
+
+        for server_id in servers:
+            self._in_flight[server_id] = self.inFlight(server_id) + 1
+        self._started[key] = servers
+
+        link = None
+        if source_port and destination_port:
+            link = self._create_link(topology_link, source_node, source_port, destination_node, destination_port)
+        else:
+            log.warning("cannot find the ports for link with ID {}".format(topology_link["id"]))
+
+        if link is None:
+            self._finished(key)
+            return
+
+        # the link no longer counts against the limit once it has been created, deleted or canceled
+        link.add_link_signal.connect(lambda link_id, key=key: self._finished(key))
+        link.delete_link_signal.connect(lambda link_id, key=key: self._finished(key))
+        link.cancel_link_signal.connect(lambda link_id, key=key: self._finished(key))
+        if self._timeout:
+            QtCore.QTimer.singleShot(self._timeout * 1000, lambda key=key: self._finished(key))
+
+    def _finished(self, key):
+        """
+        Releases the slots taken by a link on its servers.
+
+        :param key: link key
+        """
+
+        servers = self._started.pop(key, None)
+        if servers is None:
+            return
+        del self._links[key]
+        for server_id in servers:
+            self._in_flight[server_id] -= 1
+        self._dispatch()
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Supervises the local server process: its output is captured to a rotated
+log file and watched to know when the server is listening, and the
+server is restarted when it crashes.
+"""
+
+import collections
+import os
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from .qt import QtCore, QtNetwork
+from .settings import LOCAL_SERVER_READY_PATTERN
+from .settings import DEFAULT_LOCAL_SERVER_START_TIMEOUT
+from .settings import DEFAULT_LOCAL_SERVER_MAX_RESTARTS
+from .settings import DEFAULT_LOCAL_SERVER_STABLE_TIME
+from .settings import DEFAULT_LOCAL_SERVER_LOG_SIZE
+from .settings import DEFAULT_LOCAL_SERVER_LOG_BACKUPS
+
+import logging
+log = logging.getLogger(__name__)
+
+# number of output lines kept to report a crash
+LOG_TAIL_LINES = 50
+
+# delays between two connection probes while the server starts (in milliseconds)
+PROBE_MIN_DELAY = 10
+PROBE_MAX_DELAY = 500
+
+
+def rotateLogFile(path, backups):
+    """
+    Renames a log file to path.1, path.1 to path.2 etc.
+
+    :param path: log file path
+    :param backups: number of backups to keep
+    """
+
+    if not os.path.isfile(path):
+        return
+    try:
+        for index in range(backups - 1, 0, -1):
+            source = "{}.{}".format(path, index)
+            if os.path.isfile(source):
+                os.replace(source, "{}.{}".format(path, index + 1))
+        if backups:
+            os.replace(path, "{}.1".format(path))
+        else:
+            os.remove(path)
+    except OSError as e:
+        log.warning("could not rotate log file {}: {}".format(path, e))
+
+
+class LocalServerSupervisor(QtCore.QObject):
+    """
+    Local server supervisor.
+
+    :param log_path: path of the server log file (None to not save the output)
+    """
+
+    # emitted with the start-up time in seconds when the server accepts connections
+    ready_signal = QtCore.Signal(float)
+
+    # emitted with an error message when the server could not be started
+    error_signal = QtCore.Signal(str)
+
+    # emitted with the exit code and the last output lines when the server crashes
+    crashed_signal = QtCore.Signal(int, str)
+
+    # internal signals to forward the output and the exit from the reader thread
+    _line_signal = QtCore.Signal(str)
+    _exited_signal = QtCore.Signal(int)
+
+    def __init__(self, log_path=None):
+
+        super(LocalServerSupervisor, self).__init__()
+        self._log_path = log_path
+        self._log_file = None
+        self._log_lock = threading.Lock()
+        self._tail = collections.deque(maxlen=LOG_TAIL_LINES)
+        self._ready_pattern = re.compile(LOCAL_SERVER_READY_PATTERN)
+        self._process = None
+        self._reader = None
+        self._command = None
+        self._host = None
+        self._port = None
+        self._stopping = False
+        self._ready = False
+        self._restarts = 0
+        self._started_at = None
+        self._ready_at = None
+        self._probe_socket = None
+        self._probe_delay = PROBE_MIN_DELAY
+        self._probe_timer = QtCore.QTimer(self)
+        self._probe_timer.setSingleShot(True)
+        self._probe_timer.timeout.connect(self._probeSlot)
+        self._start_timer = QtCore.QTimer(self)
+        self._start_timer.setSingleShot(True)
+        self._start_timer.timeout.connect(self._startTimeoutSlot)
+        self._restart_timer = QtCore.QTimer(self)
+        self._restart_timer.setSingleShot(True)
+        self._restart_timer.timeout.connect(self._restartSlot)
+        self._line_signal.connect(self._lineSlot)
+        self._exited_signal.connect(self._exitedSlot)
+        self._metrics = {"starts": 0,
+                         "restarts": 0,
+                         "crashes": 0,
+                         "first_output_time": None,
+                         "ready_line_time": None,
+                         "startup_time": None,
+                         "startup_times": []}
+
+    def logPath(self):
+        """
+        Returns the path of the server log file.
+
+        :returns: path or None
+        """
+
+        return self._log_path
+
+    def isRunning(self):
+        """
+        Returns either the server process is running.
+
+        :returns: boolean
+        """
+
+        return self._process is not None and self._process.poll() is None
+
+    def isReady(self):
+        """
+        Returns either the server accepts connections.
+
+        :returns: boolean
+        """
+
+        return self._ready
+
+    def metrics(self):
+        """
+        Returns the start-up metrics: number of starts, restarts and
+        crashes and times in seconds from the process start to its first
+        output line, to the line telling it is listening and to the
+        first accepted connection.
+
+        :returns: dictionary
+        """
+
+        metrics = dict(self._metrics)
+        metrics["startup_times"] = list(self._metrics["startup_times"])
+        return metrics
+
+    def logTail(self):
+        """
+        Returns the last lines written by the server.
+
+        :returns: string
+        """
+
+        return "\n".join(self._tail)
+
+    def start(self, path, host, port):
+        """
+        Starts the local server process.
+
+        :param path: path to the server executable
+        :param host: host to bind to
+        :param port: port to listen on
+
+        :returns: boolean
+        """
+
+        self._command = '"{executable}" --host={host} --port={port}'.format(executable=path, host=host, port=port)
+        self._host = host
+        self._port = port
+        self._restarts = 0
+        return self._spawn()
+
+    def _spawn(self):
+        """
+        Starts the process and a thread reading its output.
+        """
+
+        log.info("starting local server process with {}".format(self._command))
+        self._openLog()
+        try:
+            kwargs = {"stdout": subprocess.PIPE, "stderr": subprocess.STDOUT, "stdin": subprocess.DEVNULL}
+            if sys.platform.startswith("win"):
+                # use the string on Windows
+                self._process = subprocess.Popen(self._command, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP, **kwargs)
+            else:
+                # use arguments on other platforms
+                self._process = subprocess.Popen(shlex.split(self._command), **kwargs)
+        except OSError as e:
+            log.warning('could not start local server "{}": {}'.format(self._command, e))
+            self._closeLog()
+            return False
+
+        self._stopping = False
+        self._ready = False
+        self._started_at = time.time()
+        self._ready_at = None
+        self._metrics["starts"] += 1
+        self._metrics["first_output_time"] = None
+        self._metrics["ready_line_time"] = None
+        self._reader = threading.Thread(target=self._readOutput, args=(self._process,), daemon=True)
+        self._reader.start()
+        self._start_timer.start(DEFAULT_LOCAL_SERVER_START_TIMEOUT * 1000)
+        self._probe_delay = PROBE_MIN_DELAY
+        self._probe_timer.start(PROBE_MIN_DELAY)
+        return True
+
+    def stop(self, wait=False):
+        """
+        Stops the local server process.
+
+        :param wait: wait for the process to exit
+        """
+
+        self._stopping = True
+        self._start_timer.stop()
+        self._restart_timer.stop()
+        self._stopProbe()
+        if self.isRunning():
+            if sys.platform.startswith("win"):
+                self._process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                self._process.send_signal(signal.SIGINT)
+            if wait:
+                self._process.wait()
+                if self._reader:
+                    self._reader.join()
+
+    def _openLog(self):
+
+        if not self._log_path:
+            return
+        with self._log_lock:
+            rotateLogFile(self._log_path, DEFAULT_LOCAL_SERVER_LOG_BACKUPS)
+            try:
+                self._log_file = open(self._log_path, "w", encoding="utf-8")
+            except OSError as e:
+                log.warning("could not open the local server log file {}: {}".format(self._log_path, e))
+                self._log_file = None
+
+    def _closeLog(self):
+
+        with self._log_lock:
+            if self._log_file:
+                self._log_file.close()
+                self._log_file = None
+
+    def _writeLog(self, line):
+
+        with self._log_lock:
+            if not self._log_file:
+                return
+            try:
+                self._log_file.write(line + "\n")
+                self._log_file.flush()
+                if self._log_file.tell() > DEFAULT_LOCAL_SERVER_LOG_SIZE:
+                    self._log_file.close()
+                    rotateLogFile(self._log_path, DEFAULT_LOCAL_SERVER_LOG_BACKUPS)
+                    self._log_file = open(self._log_path, "w", encoding="utf-8")
+            except OSError as e:
+                log.warning("could not write the local server log file {}: {}".format(self._log_path, e))
+                self._log_file = None
+
+    def _readOutput(self, process):
+        """
+        Thread reading the server output until the process exits.
+
+        :param process: Popen instance
+        """
+
+        for raw_line in iter(process.stdout.readline, b""):
+            line = raw_line.decode("utf-8", errors="replace").rstrip()
+            self._tail.append(line)
+            self._writeLog(line)
+            self._line_signal.emit(line)
+        process.stdout.close()
+        self._exited_signal.emit(process.wait())
+
+    def _lineSlot(self, line):
+        """
+        Slot called in the GUI thread for each line written by the server.
+
+        :param line: output line
+        """
+
+        elapsed = time.time() - self._started_at
+        if self._metrics["first_output_time"] is None:
+            self._metrics["first_output_time"] = elapsed
+        if not self._ready and self._metrics["ready_line_time"] is None and self._ready_pattern.search(line):
+            log.debug("local server reported it is listening after {:.3f} seconds".format(elapsed))
+            self._metrics["ready_line_time"] = elapsed
+            # the server may print this line just before listening: probe now and retry quickly
+            self._probe_delay = PROBE_MIN_DELAY
+            if self._probe_socket is None:
+                self._probe_timer.stop()
+                self._probeSlot()
+
+    def _probeSlot(self):
+        """
+        Starts a non-blocking connection to check the server is listening.
+        """
+
+        if self._ready or not self.isRunning():
+            return
+        self._probe_socket = QtNetwork.QTcpSocket(self)
+        self._probe_socket.connected.connect(self._probeConnectedSlot)
+        self._probe_socket.error.connect(self._probeErrorSlot)
+        self._probe_socket.connectToHost(self._host, self._port)
+
+    def _stopProbe(self):
+
+        self._probe_timer.stop()
+        if self._probe_socket is not None:
+            probe_socket = self._probe_socket
+            self._probe_socket = None
+            probe_socket.abort()
+            probe_socket.deleteLater()
+
+    def _probeErrorSlot(self, error=None):
+        """
+        Slot called when the server does not accept connections yet.
+        """
+
+        if self._probe_socket is None:
+            return
+        self._stopProbe()
+        if not self._ready and self.isRunning():
+            self._probe_timer.start(self._probe_delay)
+            self._probe_delay = min(self._probe_delay * 2, PROBE_MAX_DELAY)
+
+    def _probeConnectedSlot(self):
+        """
+        Slot called when the server accepts connections.
+        """
+
+        self._stopProbe()
+        self._start_timer.stop()
+        self._ready = True
+        self._ready_at = time.time()
+        startup_time = self._ready_at - self._started_at
+        self._metrics["startup_time"] = startup_time
+        self._metrics["startup_times"].append(startup_time)
+        log.info("local server ready on {}:{} after {:.3f} seconds".format(self._host, self._port, startup_time))
+        self.ready_signal.emit(startup_time)
+
+    def _startTimeoutSlot(self):
+        """
+        Slot called when the server takes too long to start.
+        """
+
+        if self._ready:
+            return
+        self._stopProbe()
+        message = "Local server not listening on {}:{} after {} seconds".format(self._host, self._port, DEFAULT_LOCAL_SERVER_START_TIMEOUT)
+        log.error(message)
+        self.error_signal.emit(message)
+
+    def _exitedSlot(self, exit_code):
+        """
+        Slot called when the server process has exited.
+
+        :param exit_code: process exit code
+        """
+
+        self._closeLog()
+        self._stopProbe()
+        self._start_timer.stop()
+        self._ready = False
+        if self._stopping:
+            log.info("local server stopped")
+            return
+
+        self._metrics["crashes"] += 1
+        log.error("local server exited unexpectedly with code {}".format(exit_code))
+        self.crashed_signal.emit(exit_code, self.logTail())
+
+        if self._ready_at and time.time() - self._ready_at > DEFAULT_LOCAL_SERVER_STABLE_TIME:
+            self._restarts = 0
+        if self._restarts >= DEFAULT_LOCAL_SERVER_MAX_RESTARTS:
+            message = "Local server crashed {} times in a row, giving up".format(self._restarts + 1)
+            log.error(message)
+            self.error_signal.emit(message)
+            return
+
+        delay = 2 ** self._restarts
+        self._restarts += 1
+        log.info("restarting local server in {} second(s)".format(delay))
+        self._restart_timer.start(delay * 1000)
+
+    def _restartSlot(self):
+        """
+        Slot called to restart the server after a crash.
+        """
+
+        self._metrics["restarts"] += 1
+        if not self._spawn():
+            self.error_signal.emit("Could not restart the local server process")
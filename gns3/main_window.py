@@ -20,6 +20,7 @@ Main window for the GUI.
 """
 
 import os
+import copy
 import tempfile
 import socket
 import shutil
@@ -38,7 +39,8 @@ from .dialogs.preferences_dialog import PreferencesDialog
 from .settings import GENERAL_SETTINGS, GENERAL_SETTING_TYPES, CLOUD_SETTINGS, CLOUD_SETTINGS_TYPES
 from .utils.progress_dialog import ProgressDialog
 from .utils.process_files_thread import ProcessFilesThread
-from .utils.wait_for_connection_thread import WaitForConnectionThread
+from .utils.save_project_thread import SaveProjectThread
+from .utils.auto_layout_thread import AutoLayoutThread
 from .utils.message_box import MessageBox
 from .ports.port import Port
 from .items.node_item import NodeItem
@@ -47,6 +49,7 @@ from .items.shape_item import ShapeItem
 from .items.image_item import ImageItem
 from .items.note_item import NoteItem
 from .topology import Topology, TopologyInstance
+from . import auto_layout
 from .cloud.utils import get_provider
 from .cloud.exceptions import KeyPairExists
 
@@ -85,6 +88,8 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
         self._connections()
         self._ignore_unsaved_state = False
         self._temporary_project = True
+        self._save_project_thread = None
+        self._project_save_failed = False
         self._max_recent_files = 5
         self._recent_file_actions = []
 
@@ -234,6 +239,12 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
         # to reboot
         self.reboot_signal.connect(self.rebootSlot)
 
+        # local server supervisor connections
+        supervisor = Servers.instance().localServerSupervisor()
+        supervisor.ready_signal.connect(self._localServerReadySlot)
+        supervisor.error_signal.connect(self._localServerErrorSlot)
+        supervisor.crashed_signal.connect(self._localServerCrashedSlot)
+
         # file menu connections
         self.uiNewProjectAction.triggered.connect(self._newProjectActionSlot)
         self.uiOpenProjectAction.triggered.connect(self._openProjectActionSlot)
@@ -295,6 +306,10 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
         self.uiBrowseAllDevicesAction.triggered.connect(self._browseAllDevicesActionSlot)
         self.uiAddLinkAction.triggered.connect(self._addLinkActionSlot)
 
+        # tools menu connections
+        self.uiRebalanceProjectAction.triggered.connect(self._rebalanceProjectActionSlot)
+        self.uiAutoLayoutAction.triggered.connect(self._autoLayoutActionSlot)
+
         # connect the signal to the view
         self.adding_link_signal.connect(self.uiGraphicsView.addingLinkSlot)
 
@@ -659,6 +674,98 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
             if isinstance(item, NodeItem) and hasattr(item.node(), "reload") and item.node().initialized():
                 item.node().reload()
 
+    def _rebalanceProjectActionSlot(self):
+        """
+        Slot called to place the nodes on the remote servers
+        with the fewest links between servers.
+        """
+
+        servers = Servers.instance()
+        if len(servers.remoteServers()) < 2:
+            QtGui.QMessageBox.information(self, "Rebalance project", "At least two remote servers are needed to rebalance a project")
+            return
+
+        node_loader = Topology.instance().nodeLoader()
+        if node_loader and node_loader.isActive():
+            QtGui.QMessageBox.information(self, "Rebalance project", "Please wait for all the devices to be created")
+            return
+
+        plan = servers.rebalance()
+        moves = plan.moves()
+        if not moves:
+            QtGui.QMessageBox.information(self, "Rebalance project", "The project is already balanced: {} link(s) between servers".format(plan.cut_before))
+            return
+
+        for node in moves:
+            if node.status() != Node.stopped:
+                QtGui.QMessageBox.warning(self, "Rebalance project", "Please stop all the devices moving to another server, {} is running".format(node.name()))
+                return
+
+        reply = QtGui.QMessageBox.question(self, "Rebalance project",
+                                           "Moving {} device(s) would bring the links between servers from {} down to {} ({} saved).\n"
+                                           "The devices are recreated on their new server, unsaved configurations will be lost. "
+                                           "Continue?".format(len(moves), plan.cut_before, plan.cut_after, plan.saved()),
+                                           QtGui.QMessageBox.Yes, QtGui.QMessageBox.No)
+        if reply == QtGui.QMessageBox.No:
+            return
+
+        topology = Topology.instance()
+        json_topology = topology.dump()
+        plan.apply(json_topology)
+        # only the moving devices and their links are recreated
+        topology.recreateNodes(json_topology, [node.id() for node in moves])
+        self.setUnsavedState()
+        self.uiStatusBar.showMessage("Project rebalanced: {} link(s) between servers saved".format(plan.saved()), 5000)
+
+    def _autoLayoutActionSlot(self):
+        """
+        Slot called to arrange the nodes with a force-directed layout.
+        The layout is computed in a thread and the nodes moved at once.
+        """
+
+        if auto_layout.numpy is None:
+            QtGui.QMessageBox.information(self, "Auto layout", "NumPy must be installed to lay out the topology")
+            return
+
+        topology = Topology.instance()
+        node_items = []
+        positions = []
+        indexes = {}
+        for node in topology.nodes():
+            node_item = topology.getNodeItem(node.id())
+            if node_item is None:
+                continue
+            indexes[node.id()] = len(node_items)
+            node_items.append(node_item)
+            # lay out the centers of the nodes
+            center = node_item.pos() + node_item.boundingRect().center()
+            positions.append((center.x(), center.y()))
+
+        if len(node_items) < 2:
+            QtGui.QMessageBox.information(self, "Auto layout", "At least two devices are needed to lay out the topology")
+            return
+
+        edges = []
+        for link in topology.links():
+            source = indexes.get(link.sourceNode().id())
+            destination = indexes.get(link.destinationNode().id())
+            if source is not None and destination is not None:
+                edges.append((source, destination))
+
+        self._thread = AutoLayoutThread(positions, edges)
+        progress_dialog = ProgressDialog(self._thread, "Auto layout", "Laying out {} devices...".format(len(node_items)), "Cancel", parent=self)
+        progress_dialog.show()
+        if progress_dialog.exec_() != QtGui.QDialog.Accepted or self._thread.positions() is None:
+            return
+
+        # the links follow once all the nodes have moved
+        with self.uiGraphicsView.bulkInsert():
+            for node_item, (x, y) in zip(node_items, self._thread.positions()):
+                center = node_item.boundingRect().center()
+                node_item.setPos(x - center.x(), y - center.y())
+        self.setUnsavedState()
+        self.uiStatusBar.showMessage("{} devices laid out".format(len(node_items)), 5000)
+
     def _deviceMenuActionSlot(self):
         """
         Slot to contextually show the device menu.
@@ -928,6 +1035,15 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
         :param event: QCloseEvent
         """
 
+        # finish writing the project file before exiting
+        self.waitForProjectSave()
+        if self._save_project_thread and self._save_project_thread.failed() and not self._project_save_failed:
+            # the error signal of the thread has not been delivered yet,
+            # it reports the error and the unsaved changes once the window stays open
+            log.error("could not save project to {}, the window is not closed".format(self._save_project_thread.path()))
+            event.ignore()
+            return
+
         if self.checkForUnsavedChanges():
             self.project_about_to_close_signal.emit(self._project_settings["project_path"])
 
@@ -965,8 +1081,8 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
                                               QtGui.QMessageBox.Discard | QtGui.QMessageBox.Save | QtGui.QMessageBox.Cancel)
             if reply == QtGui.QMessageBox.Save:
                 if self._temporary_project:
-                    return self._saveProjectAs()
-                return self._saveProject(self._project_settings["project_path"])
+                    return self._saveProjectAs(wait=True)
+                return self._saveProject(self._project_settings["project_path"], wait=True)
             elif reply == QtGui.QMessageBox.Cancel:
                 return False
         self._deleteTemporaryProject()
@@ -980,11 +1096,14 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
         self._createTemporaryProject()
         self._newsActionSlot()
 
-        # connect to the local server
+        # connect to all the remote servers in parallel and keep probing them
         servers = Servers.instance()
+        servers.startHealthMonitor()
+
+        # connect to the local server
         server = servers.localServer()
 
-        if not server.connected():
+        if not server.connected() and not server.isConnecting():
 
             try:
                 # check if the local address still exists
@@ -1025,29 +1144,58 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
                     QtGui.QMessageBox.critical(self, "Local server", "{} is not an executable".format(local_server_path))
                     return
 
+                # the connection is made as soon as the server is listening (see _localServerReadySlot)
                 if servers.startLocalServer(servers.localServerPath(), server.host, server.port):
-                        self._thread = WaitForConnectionThread(server.host, server.port)
-                        progress_dialog = ProgressDialog(self._thread,
-                                                         "Local server",
-                                                         "Connecting to server {} on port {}...".format(server.host, server.port),
-                                                         "Cancel", busy=True, parent=self)
-                        progress_dialog.show()
-                        if progress_dialog.exec_() is False:
-                            return
+                    self.uiStatusBar.showMessage("Starting the local server on {}:{}...".format(server.host, server.port))
                 else:
                     QtGui.QMessageBox.critical(self, "Local server", "Could not start the local server process: {}".format(servers.localServerPath()))
                     return
-                try:
-                    servers.localServer().reconnect()
-                except OSError as e:
-                    QtGui.QMessageBox.critical(self, "Local server", "Could not connect to the local server {host} on port {port}: {error}".format(host=server.host,
-                                                                                                                                                   port=server.port,
-                                                                                                                                                   error=e))
 
-    def _saveProjectAs(self):
+    def _localServerReadySlot(self, startup_time):
+        """
+        Slot called when the local server process accepts connections.
+
+        :param startup_time: time taken by the server to start in seconds
+        """
+
+        server = Servers.instance().localServer()
+        self.uiStatusBar.showMessage("Local server started in {:.2f} seconds".format(startup_time), 5000)
+        try:
+            server.reconnectAsync()
+        except OSError as e:
+            QtGui.QMessageBox.critical(self, "Local server", "Could not connect to the local server {host} on port {port}: {error}".format(host=server.host,
+                                                                                                                                           port=server.port,
+                                                                                                                                           error=e))
+
+    def _localServerErrorSlot(self, message):
+        """
+        Slot called when the local server could not be started.
+
+        :param message: error message
+        """
+
+        self.uiStatusBar.clearMessage()
+        log_path = Servers.instance().localServerSupervisor().logPath()
+        if log_path:
+            message += "\nSee {} for details".format(log_path)
+        QtGui.QMessageBox.critical(self, "Local server", message)
+
+    def _localServerCrashedSlot(self, exit_code, log_tail):
+        """
+        Slot called when the local server process has crashed.
+
+        :param exit_code: process exit code
+        :param log_tail: last lines written by the server
+        """
+
+        self.uiConsoleTextEdit.writeNotification("Local server crashed with exit code {}".format(exit_code), log_tail)
+
+    def _saveProjectAs(self, wait=False):
         """
         Saves a project to another location/name.
 
+        :param wait: indicates if the project must be written before returning
+
         :returns: GNS3 project file (.gns3)
         """
 
@@ -1143,29 +1291,92 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
         self._deleteTemporaryProject()
         self._project_settings["project_files_dir"] = new_project_files_dir
         self._project_settings["project_name"] = project_name
-        return self._saveProject(topology_file_path)
+        return self._saveProject(topology_file_path, wait)
 
-    def _saveProject(self, path):
+    def _saveProject(self, path, wait=False):
         """
-        Saves a project.
+        Saves a project. A snapshot of the topology is taken right away,
+        it is serialized and written to the project file in a thread.
 
         :param path: path to project file
+        :param wait: indicates if the project must be written before returning
+
+        :returns: False if the project could not be saved
         """
 
-        topology = Topology.instance()
-        try:
-            with open(path, "w") as f:
-                log.info("saving project: {}".format(path))
-                json.dump(topology.dump(), f, sort_keys=True, indent=4)
-        except OSError as e:
-            QtGui.QMessageBox.critical(self, "Save", "Could not save project to {}: {}".format(path, e))
-            return False
+        # project files are written one after the other
+        self.waitForProjectSave()
 
-        self.uiStatusBar.showMessage("Project saved to {}".format(path), 2000)
+        # the snapshot must not share anything with the nodes which keep changing while saving
+        topology = copy.deepcopy(Topology.instance().dump())
+        self._project_save_failed = False
+        self._save_project_thread = SaveProjectThread(path, topology, self._settings["compact_project_files"])
+        self._save_project_thread.completed.connect(self._projectSavedSlot)
+        self._save_project_thread.error.connect(self._projectSaveErrorSlot)
+
+        self.uiStatusBar.showMessage("Saving project to {}...".format(path))
         self._project_settings["project_path"] = path
         self._setCurrentFile(path)
+        if wait:
+            # write the file from the GUI thread, signals are delivered right away
+            self._save_project_thread.run()
+            return not self._project_save_failed
+        self._save_project_thread.start()
         return True
 
+    def waitForProjectSave(self):
+        """
+        Waits for the project file being written, if any.
+        """
+
+        if self._save_project_thread and self._save_project_thread.isRunning():
+            log.info("waiting for the project to be saved")
+            self._save_project_thread.wait()
+
+    def _projectSavedSlot(self, path):
+        """
+        Slot called when a project file has been written.
+
+        :param path: path to project file
+        """
+
+        self.uiStatusBar.showMessage("Project saved to {}".format(path), 2000)
+
+    def _projectSaveErrorSlot(self, path, message):
+        """
+        Slot called when a project file could not be written.
+
+        :param path: path to project file
+        :param message: error message
+        """
+
+        self._project_save_failed = True
+        self.uiStatusBar.showMessage("Could not save project to {}".format(path), 2000)
+        # the changes have not been saved
+        self.setWindowModified(True)
+        QtGui.QMessageBox.critical(self, "Save", "Could not save project to {}: {}".format(path, message))
+
+    def _showLoadingProgress(self, node_loader):
+        """
+        Shows the progress of the node creation when loading a project.
+
+        :param node_loader: NodeLoader instance
+        """
+
+        progress_dialog = QtGui.QProgressDialog("Creating nodes...", "Cancel", 0, node_loader.total(), parent=self)
+        progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        progress_dialog.setWindowTitle("Loading project")
+        progress_dialog.setMinimumDuration(500)
+
+        def progress(processed, total):
+            progress_dialog.setLabelText("Creating nodes ({}/{})...".format(processed, total))
+            progress_dialog.setValue(processed)
+
+        node_loader.progress_signal.connect(progress)
+        node_loader.finished_signal.connect(progress_dialog.accept)
+        progress_dialog.canceled.connect(node_loader.cancel)
+        self._loading_progress_dialog = progress_dialog
+
     def loadProject(self, path):
         """
         Loads a project into GNS3.
@@ -1219,6 +1430,9 @@ class MainWindow(QtGui.QMainWindow, Ui_MainWindow):
                     self._project_settings["project_type"] = "local"
 
                 topology.load(json_topology)
+                node_loader = topology.nodeLoader()
+                if node_loader and node_loader.isActive():
+                    self._showLoadingProgress(node_loader)
 
                 if need_to_save:
                     self._saveProject(path)
@@ -21,5 +21,6 @@ from gns3.modules.iou import IOU
 from gns3.modules.vpcs import VPCS
 from gns3.modules.virtualbox import VirtualBox
 from gns3.modules.qemu import Qemu
+from gns3.notification_routes import buildNotificationRoutes, registerNotificationRoute, unregisterNotificationRoute, notificationRoute
 
 MODULES = [Builtin, VPCS, Dynamips, IOU, VirtualBox, Qemu]
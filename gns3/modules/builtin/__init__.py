@@ -108,11 +108,13 @@ class Builtin(Module):
         if node in self._nodes:
             self._nodes.remove(node)
 
-    def allocateServer(self, node_class):
+    def allocateServer(self, node_class, node_name=None, neighbours=None):
         """
         Allocates a server.
 
         :param node_class: Node object
+        :param node_name: Node name
+        :param neighbours: nodes the new node is expected to be linked to
 
         :returns: allocated server (WebSocketClient instance)
         """
@@ -139,7 +141,7 @@ class Builtin(Module):
             if not True in using_local_server and len(remote_servers) == 1:
                 # no module is using a local server and there is only one
                 # remote server available, so no need to ask the user.
-                return next(iter(servers))
+                return servers.allocateServer(node_class, neighbours=neighbours)
 
             server_list = []
             server_list.append("Local server ({}:{})".format(local_server.host, local_server.port))
@@ -172,7 +174,7 @@ class Builtin(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
@@ -320,11 +320,31 @@ class Dynamips(Module):
             params.update({"project_name": project_name})
         server.send_notification("dynamips.settings", params)
 
-    def allocateServer(self, node_class):
+    def estimatedRAM(self, node_class, node_name=None):
+        """
+        Returns the RAM a new router is expected to use.
+
+        :param node_class: Node class to be created
+        :param node_name: Node name
+
+        :returns: RAM in MB (0 if unknown)
+        """
+
+        platform = node_class.__name__.lower()
+        if not issubclass(node_class, Router) or platform not in PLATFORMS_DEFAULT_RAM:
+            return 0
+        for info in self._ios_images.values():
+            if info["platform"] == platform:
+                return info["ram"]
+        return PLATFORMS_DEFAULT_RAM[platform]
+
+    def allocateServer(self, node_class, node_name=None, neighbours=None):
         """
         Allocates a server.
 
         :param node_class: Node object
+        :param node_name: Node name
+        :param neighbours: nodes the new node is expected to be linked to
 
         :returns: allocated server (WebSocketClient instance)
         """
@@ -335,8 +355,8 @@ class Dynamips(Module):
             # use the local server
             server = servers.localServer()
         else:
-            # pick up a remote server (round-robin method)
-            server = next(iter(servers))
+            # pick up a remote server using the placement policy
+            server = servers.allocateServer(node_class, self.estimatedRAM(node_class, node_name), neighbours)
             if not server:
                 raise ModuleError("No remote server is configured")
         return server
@@ -354,7 +374,7 @@ class Dynamips(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
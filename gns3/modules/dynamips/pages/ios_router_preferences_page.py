@@ -159,7 +159,7 @@ class IOSRouterPreferencesPage(QtGui.QWidget, Ui_IOSRouterPreferencesPageWidget)
         if Dynamips.instance().settings()["use_local_server"]:
             server = "local"
         else:
-            server = next(iter(Servers.instance()))
+            server = Servers.instance().allocateServer()
             if not server:
                 QtGui.QMessageBox.critical(self, "IOS image", "No remote server available!")
                 return
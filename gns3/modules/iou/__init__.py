@@ -315,11 +315,27 @@ class IOU(Module):
             params.update({"project_name": project_name})
         server.send_notification("iou.settings", params)
 
-    def allocateServer(self, node_class):
+    def estimatedRAM(self, node_class, node_name=None):
+        """
+        Returns the RAM a new IOU device is expected to use.
+
+        :param node_class: Node class to be created
+        :param node_name: Node name
+
+        :returns: RAM in MB
+        """
+
+        # the image is chosen once the server is known, assume the largest one
+        rams = [info["ram"] for info in self._iou_images.values()]
+        return max(rams) if rams else 256
+
+    def allocateServer(self, node_class, node_name=None, neighbours=None):
         """
         Allocates a server.
 
         :param node_class: Node object
+        :param node_name: Node name
+        :param neighbours: nodes the new node is expected to be linked to
 
         :returns: allocated server (WebSocketClient instance)
         """
@@ -330,8 +346,8 @@ class IOU(Module):
             # use the local server
             server = servers.localServer()
         else:
-            # pick up a remote server (round-robin method)
-            server = next(iter(servers))
+            # pick up a remote server using the placement policy
+            server = servers.allocateServer(node_class, self.estimatedRAM(node_class, node_name), neighbours)
             if not server:
                 raise ModuleError("No remote server is configured")
         return server
@@ -352,7 +368,7 @@ class IOU(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
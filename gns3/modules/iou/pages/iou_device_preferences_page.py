@@ -121,7 +121,7 @@ class IOUDevicePreferencesPage(QtGui.QWidget, Ui_IOUDevicePreferencesPageWidget)
         if IOU.instance().settings()["use_local_server"]:
             server = "local"
         else:
-            server = next(iter(Servers.instance()))
+            server = Servers.instance().allocateServer()
             if not server:
                 QtGui.QMessageBox.critical(self, "IOU image", "No remote server available!")
                 return
@@ -86,3 +86,36 @@ class Module(QtCore.QObject):
         """
 
         raise NotImplementedError()
+
+    def notificationMethods(self):
+        """
+        Returns the notification methods to route to this module
+        in addition to the notifications starting with its name.
+
+        :returns: list of JSON-RPC methods
+        """
+
+        return []
+
+    def _sendSettings(self, server):
+        """
+        Sends the module settings to a server, for instance
+        after a reconnection. Nothing to send by default.
+
+        :param server: WebSocketClient instance
+        """
+
+        pass
+
+    def estimatedRAM(self, node_class, node_name=None):
+        """
+        Returns the RAM a new node is expected to use, to help
+        placing it on a remote server.
+
+        :param node_class: Node class to be created
+        :param node_name: Node name
+
+        :returns: RAM in MB (0 if unknown)
+        """
+
+        return 0
@@ -291,11 +291,28 @@ class Qemu(Module):
             params.update({"project_name": project_name})
         server.send_notification("qemu.settings", params)
 
-    def allocateServer(self, node_class):
+    def estimatedRAM(self, node_class, node_name=None):
+        """
+        Returns the RAM a new QEMU VM is expected to use.
+
+        :param node_class: Node class to be created
+        :param node_name: Node name
+
+        :returns: RAM in MB
+        """
+
+        for info in self._qemu_vms.values():
+            if info["name"] == node_name:
+                return info["ram"]
+        return 256
+
+    def allocateServer(self, node_class, node_name=None, neighbours=None):
         """
         Allocates a server.
 
         :param node_class: Node object
+        :param node_name: Node name
+        :param neighbours: nodes the new node is expected to be linked to
 
         :returns: allocated server (WebSocketClient instance)
         """
@@ -306,8 +323,8 @@ class Qemu(Module):
             # use the local server
             server = servers.localServer()
         else:
-            # pick up a remote server (round-robin method)
-            server = next(iter(servers))
+            # pick up a remote server using the placement policy
+            server = servers.allocateServer(node_class, self.estimatedRAM(node_class, node_name), neighbours)
             if not server:
                 raise ModuleError("No remote server is configured")
         return server
@@ -325,7 +342,7 @@ class Qemu(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
@@ -436,7 +453,7 @@ class Qemu(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
@@ -278,11 +278,13 @@ class VirtualBox(Module):
             params.update({"project_name": project_name})
         server.send_notification("virtualbox.settings", params)
 
-    def allocateServer(self, node_class):
+    def allocateServer(self, node_class, node_name=None, neighbours=None):
         """
         Allocates a server.
 
         :param node_class: Node object
+        :param node_name: Node name
+        :param neighbours: nodes the new node is expected to be linked to
 
         :returns: allocated server (WebSocketClient instance)
         """
@@ -293,8 +295,8 @@ class VirtualBox(Module):
             # use the local server
             server = servers.localServer()
         else:
-            # pick up a remote server (round-robin method)
-            server = next(iter(servers))
+            # pick up a remote server using the placement policy
+            server = servers.allocateServer(node_class, self.estimatedRAM(node_class, node_name), neighbours)
             if not server:
                 raise ModuleError("No remote server is configured")
         return server
@@ -312,7 +314,7 @@ class VirtualBox(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
@@ -405,7 +407,7 @@ class VirtualBox(Module):
         if not server.connected():
             try:
                 log.info("reconnecting to server {}:{}".format(server.host, server.port))
-                server.reconnect()
+                server.reconnectAsync()
             except OSError as e:
                 raise ModuleError("Could not connect to server {}:{}: {}".format(server.host,
                                                                                  server.port,
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Creates the nodes of a topology being loaded in batches per server,
+instead of sending the create requests of all the nodes at once.
+"""
+
+from collections import deque
+
+from .qt import QtCore
+from .settings import DEFAULT_NODE_CREATION_BATCH, DEFAULT_NODE_CREATION_TIMEOUT
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class NodeLoader(QtCore.QObject):
+    """
+    Node creation pipeline.
+
+    :param create_node: callable creating a node from its topology
+    representation, returns a Node instance or None if the node
+    cannot be created
+    :param batch_size: maximum number of nodes being created at the
+    same time on a server (0 means no limit)
+    :param timeout: seconds after which a node being created no longer
+    counts against the batch (0 means no timeout)
+    """
+
+    # emitted with the number of processed nodes and the total number of nodes
+    progress_signal = QtCore.Signal(int, int)
+
+    # emitted once all the nodes have been processed or the loading canceled
+    finished_signal = QtCore.Signal()
+
+    def __init__(self, create_node, batch_size=DEFAULT_NODE_CREATION_BATCH, timeout=DEFAULT_NODE_CREATION_TIMEOUT):
+
+        super(NodeLoader, self).__init__()
+        self._create_node = create_node
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._queues = {}
+        self._in_flight = {}
+        self._nodes = {}
+        self._total = 0
+        self._processed = 0
+        self._failed = 0
+        self._active = False
+        self._canceled = False
+
+    def add(self, server_id, topology_node):
+        """
+        Queues a node to be created.
+
+        :param server_id: identifier of the server the node is created on
+        :param topology_node: node representation
+        """
+
+        self._queues.setdefault(server_id, deque()).append(topology_node)
+        self._total += 1
+
+    def start(self):
+        """
+        Starts creating the nodes.
+        """
+
+        log.info("creating {} nodes on {} servers".format(self._total, len(self._queues)))
+        self._active = True
+        self.progress_signal.emit(self._processed, self._total)
+        for server_id in list(self._queues):
+            self._fill(server_id)
+        self._checkFinished()
+
+    def cancel(self):
+        """
+        Stops creating the queued nodes, the nodes
+        being created are not canceled.
+        """
+
+        if not self._active:
+            return
+        log.info("node creation canceled, {} nodes not created".format(self.remaining()))
+        self._canceled = True
+        self._queues.clear()
+        self._in_flight.clear()
+        self._nodes.clear()
+        self._active = False
+        self.finished_signal.emit()
+
+    def isActive(self):
+        """
+        Returns either nodes are being created.
+
+        :returns: boolean
+        """
+
+        return self._active
+
+    def isCanceled(self):
+        """
+        Returns either the node creation has been canceled.
+
+        :returns: boolean
+        """
+
+        return self._canceled
+
+    def total(self):
+        """
+        Returns the number of nodes to create.
+
+        :returns: integer
+        """
+
+        return self._total
+
+    def processed(self):
+        """
+        Returns the number of nodes created or failed.
+
+        :returns: integer
+        """
+
+        return self._processed
+
+    def failed(self):
+        """
+        Returns the number of nodes that could not be created.
+
+        :returns: integer
+        """
+
+        return self._failed
+
+    def remaining(self):
+        """
+        Returns the number of nodes not processed yet.
+
+        :returns: integer
+        """
+
+        return self._total - self._processed
+
+    def inFlight(self, server_id):
+        """
+        Returns the number of nodes being created on a server.
+
+        :param server_id: server identifier
+
+        :returns: integer
+        """
+
+        return len(self._in_flight.get(server_id, ()))
+
+    def _fill(self, server_id):
+        """
+        Starts the queued nodes of a server the batch has room for.
+
+        :param server_id: server identifier
+        """
+
+        queue = self._queues.get(server_id)
+        in_flight = self._in_flight.setdefault(server_id, set())
+        while queue and self._active and (not self._batch_size or len(in_flight) < self._batch_size):
+            topology_node = queue.popleft()
+            node = self._create_node(topology_node)
+            if node is None:
+                self._failed += 1
+                self._processed += 1
+                self.progress_signal.emit(self._processed, self._total)
+                continue
+
+            in_flight.add(node.id())
+            self._nodes[node.id()] = server_id
+            node.created_signal.connect(self._nodeDone)
+            node.error_signal.connect(self._nodeError)
+            node.server_error_signal.connect(self._nodeServerError)
+            if self._timeout:
+                QtCore.QTimer.singleShot(self._timeout * 1000, lambda node_id=node.id(): self._nodeFailed(node_id))
+
+    def _nodeDone(self, node_id, failed=False):
+        """
+        Slot called when a node has been created.
+
+        :param node_id: node identifier
+        :param failed: either the node could not be created
+        """
+
+        server_id = self._nodes.pop(node_id, None)
+        if server_id is None:
+            return
+
+        self._in_flight[server_id].discard(node_id)
+        if failed:
+            self._failed += 1
+        self._processed += 1
+        self.progress_signal.emit(self._processed, self._total)
+        self._fill(server_id)
+        self._checkFinished()
+
+    def _nodeFailed(self, node_id):
+        """
+        Called when a node could not be created.
+
+        :param node_id: node identifier
+        """
+
+        self._nodeDone(node_id, failed=True)
+
+    def _nodeError(self, node_id, message):
+        """
+        Slot called when a node reports an error.
+
+        :param node_id: node identifier
+        :param message: error message
+        """
+
+        self._nodeFailed(node_id)
+
+    def _nodeServerError(self, node_id, code, message):
+        """
+        Slot called when a node receives an error from the server.
+
+        :param node_id: node identifier
+        :param code: error code
+        :param message: error message
+        """
+
+        self._nodeFailed(node_id)
+
+    def _checkFinished(self):
+        """
+        Emits the finished signal once all the nodes have been processed.
+        """
+
+        if self._active and self._processed == self._total:
+            log.info("{} nodes created, {} failed".format(self._total - self._failed, self._failed))
+            self._active = False
+            self.finished_signal.emit()
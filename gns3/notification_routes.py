@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Routing of the server notifications to the modules.
+"""
+
+# notification routing table: JSON-RPC method or method prefix -> module instance
+_notification_routes = {}
+_routes_built = False
+
+
+def buildNotificationRoutes():
+    """
+    Builds the notification routing table, each module receives
+    the notifications starting with its name (e.g. vpcs.*) and
+    the methods returned by its notificationMethods().
+    """
+
+    global _routes_built
+
+    # imported here: the modules import the servers, which
+    # import the websocket client routing the notifications
+    from .modules import MODULES
+    for module in MODULES:
+        instance = module.instance()
+        _notification_routes.setdefault(module.__name__.lower(), instance)
+        for method in instance.notificationMethods():
+            _notification_routes.setdefault(method, instance)
+    _routes_built = True
+
+
+def registerNotificationRoute(method, module_instance):
+    """
+    Registers a module instance to receive a specific notification method.
+    Exact methods take precedence over the module name prefixes.
+
+    :param method: JSON-RPC method
+    :param module_instance: Module instance
+    """
+
+    _notification_routes[method] = module_instance
+
+
+def unregisterNotificationRoute(method):
+    """
+    Unregisters a notification method.
+
+    :param method: JSON-RPC method
+    """
+
+    _notification_routes.pop(method, None)
+
+
+def notificationRoute(method):
+    """
+    Returns the module instance responsible for a notification.
+
+    :param method: JSON-RPC method
+
+    :returns: Module instance or None
+    """
+
+    if not _routes_built:
+        buildNotificationRoutes()
+
+    module_instance = _notification_routes.get(method)
+    if module_instance is None:
+        module_instance = _notification_routes.get(method.partition(".")[0])
+    return module_instance
@@ -198,6 +198,7 @@ class GeneralPreferencesPage(QtGui.QWidget, Ui_GeneralPreferencesPageWidget):
         self.uiCheckForUpdateCheckBox.setChecked(settings["check_for_update"])
         self.uiLinkManualModeCheckBox.setChecked(settings["link_manual_mode"])
         self.uiSlowStartAllSpinBox.setValue(settings["slow_device_start_all"])
+        self.uiCompactProjectFilesCheckBox.setChecked(settings["compact_project_files"])
         self.uiTelnetConsoleCommandLineEdit.setText(settings["telnet_console_command"])
         self.uiTelnetConsoleCommandLineEdit.setCursorPosition(0)
         index = self.uiTelnetConsolePreconfiguredCommandComboBox.findData(settings["telnet_console_command"])
@@ -223,6 +224,7 @@ class GeneralPreferencesPage(QtGui.QWidget, Ui_GeneralPreferencesPageWidget):
         self.uiSceneHeightSpinBox.setValue(settings["scene_height"])
         self.uiRectangleSelectedItemCheckBox.setChecked(settings["draw_rectangle_selected_item"])
         self.uiDrawLinkStatusPointsCheckBox.setChecked(settings["draw_link_status_points"])
+        self.uiLevelOfDetailCheckBox.setChecked(settings["level_of_detail"])
 
         qt_font = QtGui.QFont()
         if qt_font.fromString(settings["default_label_font"]):
@@ -256,6 +258,7 @@ class GeneralPreferencesPage(QtGui.QWidget, Ui_GeneralPreferencesPageWidget):
         new_settings["check_for_update"] = self.uiCheckForUpdateCheckBox.isChecked()
         new_settings["link_manual_mode"] = self.uiLinkManualModeCheckBox.isChecked()
         new_settings["slow_device_start_all"] = self.uiSlowStartAllSpinBox.value()
+        new_settings["compact_project_files"] = self.uiCompactProjectFilesCheckBox.isChecked()
         new_settings["telnet_console_command"] = self.uiTelnetConsoleCommandLineEdit.text()
         new_settings["serial_console_command"] = self.uiSerialConsoleCommandLineEdit.text()
         new_settings["auto_close_console"] = self.uiCloseConsoleWindowsOnDeleteCheckBox.isChecked()
@@ -270,6 +273,7 @@ class GeneralPreferencesPage(QtGui.QWidget, Ui_GeneralPreferencesPageWidget):
         new_settings["scene_height"] = self.uiSceneHeightSpinBox.value()
         new_settings["draw_rectangle_selected_item"] = self.uiRectangleSelectedItemCheckBox.isChecked()
         new_settings["draw_link_status_points"] = self.uiDrawLinkStatusPointsCheckBox.isChecked()
+        new_settings["level_of_detail"] = self.uiLevelOfDetailCheckBox.isChecked()
         new_settings["default_label_font"] = self.uiDefaultLabelStylePlainTextEdit.font().toString()
         new_settings["default_label_color"] = self._default_label_color.name()
         MainWindow.instance().uiGraphicsView.setSettings(new_settings)
@@ -26,8 +26,6 @@ from ..ui.server_preferences_page_ui import Ui_ServerPreferencesPageWidget
 from ..servers import Servers
 from ..topology import Topology
 from ..utils.message_box import MessageBox
-from ..utils.progress_dialog import ProgressDialog
-from ..utils.wait_for_connection_thread import WaitForConnectionThread
 from ..settings import DEFAULT_LOCAL_SERVER_PATH
 from ..settings import DEFAULT_LOCAL_SERVER_HOST
 from ..settings import DEFAULT_LOCAL_SERVER_PORT
@@ -237,12 +235,8 @@ class ServerPreferencesPage(QtGui.QWidget, Ui_ServerPreferencesPageWidget):
                         server.close_connection()
                     servers.stopLocalServer(wait=True)
                     #TODO: ASK if the user wants to start local server
-                    if servers.startLocalServer(local_server_path, local_server_host, local_server_port):
-                        self._thread = WaitForConnectionThread(local_server_host, local_server_port)
-                        dialog = ProgressDialog(self._thread, "Local server", "Connecting...", "Cancel", busy=True, parent=self)
-                        dialog.show()
-                        dialog.exec_()
-                    else:
+                    # the main window connects to the server as soon as it is listening
+                    if not servers.startLocalServer(local_server_path, local_server_host, local_server_port):
                         QtGui.QMessageBox.critical(self, "Local server", "Could not start the local server process: {}".format(local_server_path))
 
             servers.setLocalServer(local_server_path, local_server_host, local_server_port, local_server_auto_start)
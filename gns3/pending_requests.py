@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Registry of the JSON-RPC requests waiting for a reply from a server.
+Expired requests are detected by a single coarse timer wheel.
+"""
+
+import math
+import time
+
+from .qt import QtCore
+from .settings import DEFAULT_RPC_TIMEOUT, RPC_TIMEOUTS, DEFAULT_MAX_PENDING_REQUESTS
+from .settings import RPC_PRIORITIES, RPC_PRIORITY_NORMAL
+
+import logging
+log = logging.getLogger(__name__)
+
+# JSON-RPC error codes used for errors generated on the client side
+# (the -32000 to -32099 range is reserved for implementation-defined errors)
+RPC_TIMEOUT_ERROR = -32001
+RPC_OVERLOADED_ERROR = -32002
+RPC_CONNECTION_ERROR = -32003
+RPC_CONNECTION_LOST_ERROR = -32004
+
+
+class PendingRequest(object):
+    """
+    JSON-RPC request waiting for a reply.
+
+    :param request_id: JSON-RPC identifier
+    :param method: JSON-RPC method
+    :param callback: method to call when the server replies
+    :param timeout: timeout in seconds
+    """
+
+    __slots__ = ("id", "method", "callback", "sent_at", "timeout", "params")
+
+    def __init__(self, request_id, method, callback, timeout, params=None):
+
+        self.id = request_id
+        self.method = method
+        self.callback = callback
+        self.sent_at = time.monotonic()
+        self.timeout = timeout
+        self.params = params
+
+
+class PendingRequests(object):
+    """
+    Pending JSON-RPC requests table.
+
+    :param name: name used in log messages (usually host:port)
+    :param max_pending: maximum number of pending requests
+    :param resolution: timer wheel resolution in milliseconds
+    """
+
+    def __init__(self, name="", max_pending=DEFAULT_MAX_PENDING_REQUESTS, resolution=1000):
+
+        self._name = name
+        self._requests = {}
+        self._wheel = {}
+        self._max_pending = max_pending
+        self._resolution = resolution
+        self._timeouts = dict(RPC_TIMEOUTS)
+        self._priorities = dict(RPC_PRIORITIES)
+        self._expired_callback = None
+        self._timer = QtCore.QTimer()
+        self._timer.setInterval(resolution)
+        self._timer.timeout.connect(self._expireSlot)
+
+    def __len__(self):
+
+        return len(self._requests)
+
+    def __contains__(self, request_id):
+
+        return request_id in self._requests
+
+    def inFlightCount(self):
+        """
+        Returns the number of requests waiting for a reply.
+
+        :returns: integer
+        """
+
+        return len(self._requests)
+
+    def isFull(self):
+        """
+        Returns either the maximum number of pending requests has been reached.
+
+        :returns: boolean
+        """
+
+        return len(self._requests) >= self._max_pending
+
+    def maxPending(self):
+        """
+        Returns the maximum number of pending requests.
+
+        :returns: integer
+        """
+
+        return self._max_pending
+
+    def setMaxPending(self, max_pending):
+        """
+        Sets the maximum number of pending requests.
+
+        :param max_pending: integer
+        """
+
+        self._max_pending = max_pending
+
+    def setMethodTimeout(self, method, timeout):
+        """
+        Sets a timeout for a JSON-RPC method.
+
+        :param method: JSON-RPC method, "*.method" matches the method for all modules
+        :param timeout: timeout in seconds
+        """
+
+        self._timeouts[method] = timeout
+
+    def methodTimeout(self, method):
+        """
+        Returns the timeout for a JSON-RPC method.
+
+        :param method: JSON-RPC method
+
+        :returns: timeout in seconds
+        """
+
+        if method in self._timeouts:
+            return self._timeouts[method]
+        wildcard = "*." + method.rsplit(".", 1)[-1]
+        return self._timeouts.get(wildcard, DEFAULT_RPC_TIMEOUT)
+
+    def setMethodPriority(self, method, priority):
+        """
+        Sets the priority class of a JSON-RPC method.
+
+        :param method: JSON-RPC method, "*.method" matches the method for all modules
+        :param priority: priority class (lower is more urgent)
+        """
+
+        self._priorities[method] = priority
+
+    def methodPriority(self, method):
+        """
+        Returns the priority class of a JSON-RPC method.
+
+        :param method: JSON-RPC method
+
+        :returns: priority class
+        """
+
+        if method in self._priorities:
+            return self._priorities[method]
+        wildcard = "*." + method.rsplit(".", 1)[-1]
+        return self._priorities.get(wildcard, RPC_PRIORITY_NORMAL)
+
+    def setExpiredCallback(self, callback):
+        """
+        Sets a method to call once expired requests have been removed.
+
+        :param callback: method called with the list of expired PendingRequest instances
+        """
+
+        self._expired_callback = callback
+
+    def _tick(self, timestamp):
+
+        return int(timestamp * 1000 // self._resolution)
+
+    def add(self, request_id, method, callback, params=None):
+        """
+        Registers a new pending request.
+
+        :param request_id: JSON-RPC identifier
+        :param method: JSON-RPC method
+        :param callback: method to call when the server replies
+        :param params: JSON-RPC params (kept to be able to resend the request)
+
+        :returns: PendingRequest instance
+        """
+
+        request = PendingRequest(request_id, method, callback, self.methodTimeout(method), params)
+        self._requests[request_id] = request
+        expiry_tick = self._tick(request.sent_at) + math.ceil(request.timeout * 1000 / self._resolution)
+        self._wheel.setdefault(expiry_tick, []).append(request_id)
+        if not self._timer.isActive():
+            self._timer.start()
+        return request
+
+    def pop(self, request_id):
+        """
+        Removes a pending request, usually because its reply has been received.
+
+        :param request_id: JSON-RPC identifier
+
+        :returns: PendingRequest instance or None
+        """
+
+        request = self._requests.pop(request_id, None)
+        if not self._requests:
+            self._wheel.clear()
+            self._timer.stop()
+        return request
+
+    def get(self, request_id):
+        """
+        Returns a pending request.
+
+        :param request_id: JSON-RPC identifier
+
+        :returns: PendingRequest instance or None
+        """
+
+        return self._requests.get(request_id)
+
+    def requests(self):
+        """
+        Returns all the pending requests, oldest first.
+
+        :returns: list of PendingRequest instances
+        """
+
+        return list(self._requests.values())
+
+    def clear(self):
+        """
+        Removes all the pending requests.
+
+        :returns: list of removed PendingRequest instances
+        """
+
+        requests = list(self._requests.values())
+        self._requests.clear()
+        self._wheel.clear()
+        self._timer.stop()
+        return requests
+
+    def _expireSlot(self):
+        """
+        Slot called by the timer wheel to expire requests.
+        """
+
+        now = self._tick(time.monotonic())
+        expired_ticks = [tick for tick in self._wheel if tick <= now]
+        expired = []
+        for tick in sorted(expired_ticks):
+            for request_id in self._wheel.pop(tick):
+                request = self._requests.pop(request_id, None)
+                if request is None:
+                    # the reply has already been received
+                    continue
+                log.warning("{}: no reply received for {} after {} seconds".format(self._name,
+                                                                                    request.method,
+                                                                                    request.timeout))
+                error = {"code": RPC_TIMEOUT_ERROR,
+                         "message": "Timeout: no reply from server {} for {} after {} seconds".format(self._name,
+                                                                                                   request.method,
+                                                                                                   request.timeout)}
+                expired.append(request)
+                request.callback(error, True)
+
+        if not self._requests:
+            self._wheel.clear()
+            self._timer.stop()
+        if expired and self._expired_callback is not None:
+            self._expired_callback(expired)
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Per-method JSON-RPC statistics (counts, bytes and latency histograms).
+"""
+
+import math
+import time
+
+
+class LatencyHistogram(object):
+    """
+    Logarithmic latency histogram. Each bucket covers a quarter of
+    a power of two (about 19% wide), from 1 microsecond to about 1 hour.
+    """
+
+    __slots__ = ("_buckets", "count", "total", "maximum")
+
+    # number of buckets per power of two
+    resolution = 4
+    bucket_count = 32 * resolution
+
+    def __init__(self):
+
+        self._buckets = [0] * self.bucket_count
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, latency):
+        """
+        Adds a latency sample.
+
+        :param latency: latency in seconds
+        """
+
+        microseconds = latency * 1000000
+        if microseconds <= 1:
+            index = 0
+        else:
+            index = min(self.bucket_count - 1, math.ceil(math.log2(microseconds) * self.resolution))
+        self._buckets[index] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.maximum:
+            self.maximum = latency
+
+    def percentile(self, percent):
+        """
+        Returns a latency percentile (upper bound of the matching bucket).
+
+        :param percent: percentile (0 to 100)
+
+        :returns: latency in seconds
+        """
+
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        cumulated = 0
+        for index, count in enumerate(self._buckets):
+            cumulated += count
+            if cumulated >= rank:
+                return min(self.maximum, 2 ** (index / self.resolution) / 1000000)
+        return self.maximum
+
+    def mean(self):
+        """
+        Returns the mean latency.
+
+        :returns: latency in seconds
+        """
+
+        if not self.count:
+            return 0.0
+        return self.total / self.count
+
+
+class MethodStats(object):
+    """
+    Statistics for one JSON-RPC method.
+    """
+
+    __slots__ = ("requests", "replies", "errors", "timeouts", "notifications", "bytes_sent", "bytes_received", "latency")
+
+    def __init__(self):
+
+        self.requests = 0
+        self.replies = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.notifications = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+
+    def dump(self):
+        """
+        Returns a representation of these statistics.
+
+        :returns: dictionary
+        """
+
+        return {"requests": self.requests,
+                "replies": self.replies,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "notifications": self.notifications,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "latency": {"mean": self.latency.mean(),
+                            "p50": self.latency.percentile(50),
+                            "p95": self.latency.percentile(95),
+                            "p99": self.latency.percentile(99),
+                            "max": self.latency.maximum}}
+
+
+class RPCStats(object):
+    """
+    JSON-RPC statistics for one server.
+
+    :param name: server name (usually host:port)
+    """
+
+    def __init__(self, name=""):
+
+        self._name = name
+        self._methods = {}
+        self._started_at = time.time()
+
+    def name(self):
+        """
+        Returns the server name.
+
+        :returns: string
+        """
+
+        return self._name
+
+    def _method(self, method):
+
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = MethodStats()
+        return stats
+
+    def recordRequest(self, method, size):
+        """
+        Records a request sent to the server.
+
+        :param method: JSON-RPC method
+        :param size: size of the request in bytes
+        """
+
+        stats = self._method(method)
+        stats.requests += 1
+        stats.bytes_sent += size
+
+    def recordReply(self, method, latency, size, error=False):
+        """
+        Records a reply received from the server.
+
+        :param method: JSON-RPC method of the request
+        :param latency: time between the request and the reply in seconds
+        :param size: size of the reply in bytes
+        :param error: either the reply is an error
+        """
+
+        stats = self._method(method)
+        stats.replies += 1
+        if error:
+            stats.errors += 1
+        stats.bytes_received += size
+        stats.latency.add(latency)
+
+    def recordTimeout(self, method):
+        """
+        Records a request which has not been replied in time.
+
+        :param method: JSON-RPC method
+        """
+
+        self._method(method).timeouts += 1
+
+    def recordNotification(self, method, size):
+        """
+        Records a notification received from the server.
+
+        :param method: JSON-RPC method
+        :param size: size of the notification in bytes
+        """
+
+        stats = self._method(method)
+        stats.notifications += 1
+        stats.bytes_received += size
+
+    def methods(self):
+        """
+        Returns the statistics for each method.
+
+        :returns: dictionary of MethodStats instances
+        """
+
+        return self._methods
+
+    def reset(self):
+        """
+        Clears all the statistics.
+        """
+
+        self._methods.clear()
+        self._started_at = time.time()
+
+    def dump(self):
+        """
+        Returns a representation of these statistics that can be saved as JSON.
+
+        :returns: dictionary
+        """
+
+        return {"server": self._name,
+                "since": self._started_at,
+                "methods": {method: stats.dump() for method, stats in sorted(self._methods.items())}}
+
+    def summary(self):
+        """
+        Returns a text table of these statistics, slowest methods first.
+
+        :returns: string
+        """
+
+        lines = ["Server {}".format(self._name),
+                 "{:<32} {:>7} {:>6} {:>10} {:>10} {:>9} {:>9} {:>9}".format("Method", "Count", "Errors", "Sent",
+                                                                             "Received", "p50 (ms)", "p95 (ms)",
+                                                                             "p99 (ms)")]
+        methods = sorted(self._methods.items(), key=lambda item: item[1].latency.total, reverse=True)
+        for method, stats in methods:
+            lines.append("{:<32} {:>7} {:>6} {:>10} {:>10} {:>9.1f} {:>9.1f} {:>9.1f}".format(method,
+                                                                                           stats.requests + stats.notifications,
+                                                                                           stats.errors + stats.timeouts,
+                                                                                           stats.bytes_sent,
+                                                                                           stats.bytes_received,
+                                                                                           stats.latency.percentile(50) * 1000,
+                                                                                           stats.latency.percentile(95) * 1000,
+                                                                                           stats.latency.percentile(99) * 1000))
+        return "\n".join(lines)
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Connects to all the servers in parallel and keeps probing their health
+(version, JSON-RPC round-trip time and capacity) in the background.
+"""
+
+import time
+
+from .qt import QtCore
+from .pending_requests import RPC_TIMEOUT_ERROR, RPC_OVERLOADED_ERROR, RPC_CONNECTION_ERROR, RPC_CONNECTION_LOST_ERROR
+from .settings import DEFAULT_HEALTH_PROBE_INTERVAL, DEFAULT_HEALTH_SLOW_RTT, DEFAULT_HEALTH_MAX_FAILURES
+
+import logging
+log = logging.getLogger(__name__)
+
+# errors raised by the GUI itself, meaning the server did not answer
+PROBE_FAILURES = (RPC_TIMEOUT_ERROR, RPC_OVERLOADED_ERROR, RPC_CONNECTION_ERROR, RPC_CONNECTION_LOST_ERROR)
+
+
+class ServerHealth(object):
+    """
+    Health of a server.
+
+    :param server: WebSocketClient instance
+    """
+
+    # health status
+    unknown = 0
+    connecting = 1
+    healthy = 2
+    degraded = 3
+    unreachable = 4
+
+    _status_names = {unknown: "unknown",
+                     connecting: "connecting",
+                     healthy: "healthy",
+                     degraded: "degraded",
+                     unreachable: "unreachable"}
+
+    def __init__(self, server):
+
+        self.server = server
+        self.status = ServerHealth.unknown
+        self.version = ""
+        self.rtt = None
+        self.connect_time = None
+        self.failures = 0
+        self.error = ""
+        self.last_seen = None
+        self.capacity = None
+
+    def statusName(self):
+        """
+        Returns the status name.
+
+        :returns: string
+        """
+
+        return self._status_names[self.status]
+
+    def isAvailable(self):
+        """
+        Returns either nodes can be created on this server.
+        Servers not probed yet are assumed to be available.
+
+        :returns: boolean
+        """
+
+        return self.status != ServerHealth.unreachable
+
+    def dump(self):
+        """
+        Returns a representation of the server health.
+
+        :returns: dictionary
+        """
+
+        return {"host": self.server.host,
+                "port": self.server.port,
+                "status": self.statusName(),
+                "version": self.version,
+                "rtt": self.rtt,
+                "connect_time": self.connect_time,
+                "failures": self.failures,
+                "error": self.error,
+                "last_seen": self.last_seen,
+                "capacity": self.capacity}
+
+
+class ServerMonitor(QtCore.QObject):
+    """
+    Background server health monitor.
+
+    :param servers: Servers instance
+    :param interval: probe interval in seconds
+    """
+
+    # emitted with a ServerHealth instance after each probe
+    status_changed_signal = QtCore.Signal(object)
+
+    def __init__(self, servers, interval=DEFAULT_HEALTH_PROBE_INTERVAL):
+
+        super(ServerMonitor, self).__init__()
+        self._servers = servers
+        self._health = {}
+        self._probing = set()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval * 1000)
+        self._timer.timeout.connect(self.probeAll)
+
+    def start(self):
+        """
+        Connects to all the remote servers in parallel and starts probing them.
+        """
+
+        log.info("starting the server health monitor")
+        self._timer.start()
+        self.probeAll()
+
+    def stop(self):
+        """
+        Stops probing the servers.
+        """
+
+        self._timer.stop()
+
+    def isActive(self):
+        """
+        Returns either the servers are being probed.
+
+        :returns: boolean
+        """
+
+        return self._timer.isActive()
+
+    def health(self, server):
+        """
+        Returns the health of a server.
+
+        :param server: WebSocketClient instance
+
+        :returns: ServerHealth instance
+        """
+
+        if server.id() not in self._health:
+            self._health[server.id()] = ServerHealth(server)
+        return self._health[server.id()]
+
+    def allHealth(self):
+        """
+        Returns the health of all the probed servers.
+
+        :returns: list of ServerHealth instances
+        """
+
+        return list(self._health.values())
+
+    def _setStatus(self, health, status, error=""):
+
+        changed = health.status != status or health.error != error
+        health.status = status
+        health.error = error
+        if changed:
+            log.info("server {}:{} is {}{}".format(health.server.host,
+                                                   health.server.port,
+                                                   health.statusName(),
+                                                   ": " + error if error else ""))
+        self.status_changed_signal.emit(health)
+
+    def probeAll(self):
+        """
+        Probes all the servers. The remote servers that are not connected
+        are connected without blocking, all at the same time.
+        """
+
+        servers = self._servers.allServers()
+        server_ids = set(server.id() for server in servers)
+        for server_id in list(self._health):
+            if server_id not in server_ids:
+                del self._health[server_id]
+                self._probing.discard(server_id)
+
+        for server in servers:
+            self.probe(server)
+
+        if self._servers.placementNeedsCapacity():
+            self._servers.requestCapacityReports()
+
+    def probe(self, server):
+        """
+        Probes a server: connects to it if needed and measures
+        the round-trip time of a version request.
+
+        :param server: WebSocketClient instance
+        """
+
+        if server.id() in self._probing:
+            # the previous probe is still waiting for a reply
+            return
+
+        health = self.health(server)
+        connecting = not server.connected()
+        if connecting:
+            if server.isLocal():
+                # the local server is started and connected by the main window
+                return
+            if not server.isConnecting():
+                try:
+                    server.reconnectAsync()
+                except OSError as e:
+                    self._failure(health, str(e), unreachable=True)
+                    return
+            if not server.isConnecting():
+                self._failure(health, "could not connect", unreachable=True)
+                return
+            if health.status in (ServerHealth.unknown, ServerHealth.unreachable):
+                self._setStatus(health, ServerHealth.connecting, health.error)
+
+        self._probing.add(server.id())
+        server.send_message("builtin.version", None, self._probeCallback(health, time.time(), connecting))
+
+    def _probeCallback(self, health, sent_at, connecting):
+
+        def callback(result, error=False):
+            self._probing.discard(health.server.id())
+            if health.server.id() not in self._health:
+                # the server has been removed meanwhile
+                return
+            elapsed = time.time() - sent_at
+            if error and result.get("code") in PROBE_FAILURES:
+                self._failure(health,
+                              result.get("message", "no reply"),
+                              unreachable=result.get("code") == RPC_CONNECTION_ERROR)
+                return
+
+            # any reply (even an error) means the server is alive
+            if connecting:
+                health.connect_time = elapsed
+            else:
+                health.rtt = elapsed
+            if not error and isinstance(result, dict) and result.get("version"):
+                health.version = result["version"]
+            elif health.server.version():
+                health.version = health.server.version()
+            health.failures = 0
+            health.last_seen = time.time()
+            if health.rtt is not None and health.rtt > DEFAULT_HEALTH_SLOW_RTT:
+                self._setStatus(health, ServerHealth.degraded, "slow replies ({:.0f} ms)".format(health.rtt * 1000))
+            else:
+                self._setStatus(health, ServerHealth.healthy)
+        return callback
+
+    def _failure(self, health, error, unreachable=False):
+        """
+        Records a failed probe.
+
+        :param health: ServerHealth instance
+        :param error: error message
+        :param unreachable: either the server is unreachable right away
+        """
+
+        health.failures += 1
+        if unreachable or health.failures >= DEFAULT_HEALTH_MAX_FAILURES:
+            self._setStatus(health, ServerHealth.unreachable, error)
+        else:
+            self._setStatus(health, ServerHealth.degraded, error)
+
+    def updateCapacity(self, server, report):
+        """
+        Records the capacity reported by a server.
+
+        :param server: WebSocketClient instance
+        :param report: capacity report (dictionary)
+        """
+
+        self.health(server).capacity = report
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Placement policies used to choose the remote server on which a new node is created.
+"""
+
+import math
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class ServerLoad(object):
+    """
+    Resources committed on a server.
+
+    :param nodes: number of nodes on the server
+    :param ram: RAM committed by these nodes in MB
+    :param capacity: last capacity report received from the server (dictionary or None)
+    :param neighbours: number of nodes on the server expected to be linked to the new node
+    """
+
+    __slots__ = ("nodes", "ram", "capacity", "neighbours")
+
+    def __init__(self, nodes=0, ram=0, capacity=None, neighbours=0):
+
+        self.nodes = nodes
+        self.ram = ram
+        self.capacity = capacity
+        self.neighbours = neighbours
+
+
+class PlacementPolicy(object):
+    """
+    Placement policy base class.
+    """
+
+    name = ""
+    description = ""
+
+    # either the policy needs periodic capacity reports from the servers
+    needs_capacity_reports = False
+
+    def select(self, servers, loads, node_class, ram):
+        """
+        Selects a server.
+
+        :param servers: candidate servers (list of WebSocketClient instances, never empty)
+        :param loads: ServerLoad instance for each server ID
+        :param node_class: Node class to be created
+        :param ram: estimated RAM needed by the node in MB
+
+        :returns: WebSocketClient instance
+        """
+
+        raise NotImplementedError()
+
+
+class RoundRobinPolicy(PlacementPolicy):
+    """
+    Picks the servers one after the other.
+    """
+
+    name = "round_robin"
+    description = "Round-robin"
+
+    def __init__(self):
+
+        self._position = 0
+
+    def select(self, servers, loads, node_class, ram):
+
+        server = servers[self._position % len(servers)]
+        self._position = (self._position + 1) % len(servers)
+        return server
+
+
+class LeastNodesPolicy(PlacementPolicy):
+    """
+    Picks the server with the fewest nodes.
+    """
+
+    name = "least_nodes"
+    description = "Least nodes"
+
+    def select(self, servers, loads, node_class, ram):
+
+        return min(servers, key=lambda server: loads[server.id()].nodes)
+
+
+class LeastRAMPolicy(PlacementPolicy):
+    """
+    Picks the server with the least RAM committed.
+    """
+
+    name = "least_ram"
+    description = "Least RAM committed"
+
+    def select(self, servers, loads, node_class, ram):
+
+        return min(servers, key=lambda server: loads[server.id()].ram)
+
+
+class WeightedCapacityPolicy(PlacementPolicy):
+    """
+    Picks the server with the lowest RAM usage relative to the RAM
+    capacity it reports, preferring servers where the node still fits.
+    Servers without capacity report are weighted like an average server.
+    """
+
+    name = "weighted_capacity"
+    description = "Weighted by server capacity"
+    needs_capacity_reports = True
+
+    def select(self, servers, loads, node_class, ram):
+
+        reported = [load.capacity["ram_total"] for load in loads.values()
+                    if load.capacity and load.capacity.get("ram_total")]
+        default_capacity = sum(reported) / len(reported) if reported else 1
+
+        def score(server):
+            load = loads[server.id()]
+            capacity = default_capacity
+            available = None
+            if load.capacity:
+                capacity = load.capacity.get("ram_total") or default_capacity
+                available = load.capacity.get("ram_available")
+            fits = available is None or available >= ram
+            return not fits, (load.ram + ram) / capacity
+
+        return min(servers, key=score)
+
+
+class TopologyAwarePolicy(PlacementPolicy):
+    """
+    Picks the server hosting most of the nodes the new node is expected
+    to be linked to, as long as the servers stay balanced, to avoid
+    UDP tunnels between servers. Servers.rebalance() partitions
+    an existing topology.
+
+    :param imbalance: nodes allowed above a server share (0.1 means 10%, plus one node)
+    """
+
+    name = "topology_aware"
+    description = "Topology aware (fewest links between servers)"
+
+    def __init__(self, imbalance=0.1):
+
+        self._imbalance = imbalance
+
+    def select(self, servers, loads, node_class, ram):
+
+        total = sum(loads[server.id()].nodes for server in servers) + 1
+        limit = math.ceil(total / len(servers) * (1 + self._imbalance)) + 1
+        fitting = [server for server in servers if loads[server.id()].nodes + 1 <= limit] or servers
+        return min(fitting, key=lambda server: (-loads[server.id()].neighbours, loads[server.id()].nodes))
+
+
+PLACEMENT_POLICIES = {policy.name: policy for policy in (RoundRobinPolicy,
+                                                         LeastNodesPolicy,
+                                                         LeastRAMPolicy,
+                                                         WeightedCapacityPolicy,
+                                                         TopologyAwarePolicy)}
+
+
+def placementPolicy(name):
+    """
+    Instantiates a placement policy.
+
+    :param name: policy name
+
+    :returns: PlacementPolicy instance
+    """
+
+    if name not in PLACEMENT_POLICIES:
+        log.warning("unknown placement policy {}, using round-robin".format(name))
+        name = RoundRobinPolicy.name
+    return PLACEMENT_POLICIES[name]()
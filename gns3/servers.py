@@ -21,10 +21,7 @@ Keeps track of all the local and remote servers and their settings.
 
 import os
 import sys
-import shlex
-import signal
 import socket
-import subprocess
 import ssl
 from .qt import QtCore
 from .websocket_client import WebSocketClient, SecureWebSocketClient
@@ -32,6 +29,13 @@ from .settings import DEFAULT_LOCAL_SERVER_PATH
 from .settings import DEFAULT_LOCAL_SERVER_HOST
 from .settings import DEFAULT_LOCAL_SERVER_PORT
 from .settings import DEFAULT_HEARTBEAT_FREQ
+from .settings import DEFAULT_BATCH_WINDOW
+from .settings import DEFAULT_IN_FLIGHT_WINDOW
+from .settings import DEFAULT_PLACEMENT_POLICY
+from .server_placement import ServerLoad, placementPolicy
+from .topology_partitioner import rebalanceTopology
+from .server_monitor import ServerMonitor
+from .local_server import LocalServerSupervisor
 
 import logging
 log = logging.getLogger(__name__)
@@ -45,6 +49,9 @@ class Servers(QtCore.QObject):
     # to let other pages know about remote server updates
     updated_signal = QtCore.Signal()
 
+    # to let a server panel know about the health of a server (ServerHealth instance)
+    server_status_signal = QtCore.Signal(object)
+
     def __init__(self):
 
         super(Servers, self).__init__()
@@ -52,9 +59,32 @@ class Servers(QtCore.QObject):
         self._remote_servers = {}
         self._local_server_path = ""
         self._local_server_auto_start = True
-        self._local_server_proccess = None
+        self._local_server_supervisor = LocalServerSupervisor(self._localServerLogPath())
+        self._batch_mode = False
+        self._batch_window = DEFAULT_BATCH_WINDOW
+        self._auto_reconnect = True
+        self._in_flight_window = DEFAULT_IN_FLIGHT_WINDOW
+        self._placement_policy = placementPolicy(DEFAULT_PLACEMENT_POLICY)
+        self._monitor = ServerMonitor(self)
+        self._monitor.status_changed_signal.connect(self.server_status_signal.emit)
         self._settings = self._loadSettings()
-        self._remote_server_iter_pos = 0
+
+    @staticmethod
+    def _localServerLogPath():
+        """
+        Returns the path of the local server log file (in the settings directory).
+
+        :returns: path or None
+        """
+
+        settings_dir = os.path.dirname(QtCore.QSettings().fileName())
+        if not os.path.isdir(settings_dir):
+            try:
+                os.makedirs(settings_dir)
+            except OSError as e:
+                log.warning("could not create the settings directory {}: {}".format(settings_dir, e))
+                return None
+        return os.path.join(settings_dir, "GNS3_server.log")
 
     def _loadSettings(self):
         """
@@ -78,6 +108,11 @@ class Servers(QtCore.QObject):
         local_server_path = settings.value("local_server_path", DEFAULT_LOCAL_SERVER_PATH)
         local_server_auto_start = settings.value("local_server_auto_start", True, type=bool)
         heartbeat_freq = settings.value("heartbeat_freq", DEFAULT_HEARTBEAT_FREQ, type=int)
+        self._batch_mode = settings.value("batch_mode", False, type=bool)
+        self._batch_window = settings.value("batch_window", DEFAULT_BATCH_WINDOW, type=int)
+        self._auto_reconnect = settings.value("auto_reconnect", True, type=bool)
+        self._in_flight_window = settings.value("in_flight_window", DEFAULT_IN_FLIGHT_WINDOW, type=int)
+        self.setPlacementPolicy(settings.value("placement_policy", DEFAULT_PLACEMENT_POLICY))
         self.setLocalServer(local_server_path, local_server_host, local_server_port, local_server_auto_start, heartbeat_freq)
 
         # load the remote servers
@@ -110,6 +145,12 @@ class Servers(QtCore.QObject):
             settings.setValue("local_server_path", self._local_server_path)
             settings.setValue("local_server_auto_start", self._local_server_auto_start)
 
+        settings.setValue("batch_mode", self._batch_mode)
+        settings.setValue("batch_window", self._batch_window)
+        settings.setValue("auto_reconnect", self._auto_reconnect)
+        settings.setValue("in_flight_window", self._in_flight_window)
+        settings.setValue("placement_policy", self._placement_policy.name)
+
         # save the remote servers
         settings.beginWriteArray("remote", len(self._remote_servers))
         index = 0
@@ -140,56 +181,125 @@ class Servers(QtCore.QObject):
 
         return self._local_server_path
 
+    def batchMode(self):
+        """
+        Returns the JSON-RPC batch mode settings.
+
+        :returns: tuple (enabled, batch window in milliseconds)
+        """
+
+        return self._batch_mode, self._batch_window
+
+    def setBatchMode(self, enabled, window=DEFAULT_BATCH_WINDOW):
+        """
+        Enables or disables the JSON-RPC batch mode for all servers.
+
+        :param enabled: boolean
+        :param window: time to wait before sending a batch in milliseconds
+        """
+
+        self._batch_mode = enabled
+        self._batch_window = window
+        for server in self.allServers():
+            server.setBatchMode(enabled, window)
+
+    def autoReconnect(self):
+        """
+        Returns either servers are automatically reconnected.
+
+        :returns: boolean
+        """
+
+        return self._auto_reconnect
+
+    def setAutoReconnect(self, enabled):
+        """
+        Enables or disables the automatic reconnection for all servers.
+
+        :param enabled: boolean
+        """
+
+        self._auto_reconnect = enabled
+        for server in self.allServers():
+            server.setAutoReconnect(enabled)
+
+    def inFlightWindow(self):
+        """
+        Returns the maximum number of requests waiting for a reply per server.
+
+        :returns: integer (0 means no limit)
+        """
+
+        return self._in_flight_window
+
+    def setInFlightWindow(self, window):
+        """
+        Sets the maximum number of requests waiting for a reply per server.
+
+        :param window: number of requests (0 means no limit)
+        """
+
+        self._in_flight_window = window
+        for server in self.allServers():
+            server.setInFlightWindow(window)
+
+    def allServers(self):
+        """
+        Returns the local and remote servers.
+
+        :returns: list of WebSocketClient instances
+        """
+
+        servers = list(self._remote_servers.values())
+        if self._local_server:
+            servers.insert(0, self._local_server)
+        return servers
+
+    def _configureServer(self, server):
+        """
+        Applies the connection settings to a server.
+
+        :param server: WebSocketClient instance
+        """
+
+        server.setBatchMode(self._batch_mode, self._batch_window)
+        server.setAutoReconnect(self._auto_reconnect)
+        server.setInFlightWindow(self._in_flight_window)
+
     def startLocalServer(self, path, host, port):
         """
-        Starts the local server process.
-        """
-
-        command = '"{executable}" --host={host} --port={port}'.format(executable=path, host=host, port=port)
-
-        # settings_dir = os.path.dirname(QtCore.QSettings().fileName())
-        # if os.path.isdir(settings_dir):
-        #     # save server logging info to a file in the settings directory
-        #     logpath = os.path.join(settings_dir, "GNS3_server.log")
-        #     if os.path.isfile(logpath):
-        #         # delete the previous log file
-        #         try:
-        #             os.remove(logpath)
-        #         except FileNotFoundError:
-        #             pass
-        #         except OSError as e:
-        #             log.warn("could not delete server log file {}: {}".format(logpath, e))
-        #
-        #     command += " --log_file_prefix={logpath} --log_file_num_backups=0 --log_to_stderr".format(logpath=logpath)
-
-        log.info("starting local server process with {}".format(command))
-
-        try:
-            if sys.platform.startswith("win"):
-                # use the string on Windows
-                self._local_server_proccess = subprocess.Popen(command, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
-            else:
-                # use arguments on other platforms
-                args = shlex.split(command)
-                self._local_server_proccess = subprocess.Popen(args)
-        except OSError as e:
-            log.warning('could not start local server "{}": {}'.format(command, e))
-            return False
-
-        return True
+        Starts the local server process, the supervisor emits
+        ready_signal as soon as the server accepts connections.
+
+        :param path: path to the local server
+        :param host: host or address of the server
+        :param port: port of the server (integer)
+
+        :returns: boolean
+        """
+
+        return self._local_server_supervisor.start(path, host, port)
 
     def stopLocalServer(self, wait=False):
+        """
+        Stops the local server process.
+
+        :param wait: wait for the process to exit
+        """
 
         if self._local_server and self._local_server.connected() and not sys.platform.startswith('win'):
             # only gracefully disconnect if we are not on Windows
             self._local_server.close_connection()
-        if self._local_server_proccess and self._local_server_proccess.poll() is None:
-            if sys.platform.startswith("win"):
-                self._local_server_proccess.send_signal(signal.CTRL_BREAK_EVENT)
-            else:
-                self._local_server_proccess.send_signal(signal.SIGINT)
-            if wait:
-                self._local_server_proccess.wait()
+        self._local_server_supervisor.stop(wait)
+
+    def localServerSupervisor(self):
+        """
+        Returns the local server supervisor.
+
+        :returns: LocalServerSupervisor instance
+        """
+
+        return self._local_server_supervisor
 
     def setLocalServer(self, path, host, port, auto_start, heartbeat_freq=DEFAULT_HEARTBEAT_FREQ):
         """
@@ -216,6 +326,7 @@ class Servers(QtCore.QObject):
         self._local_server = WebSocketClient(url)
         self._local_server.setLocal(True)
         self._local_server.enableHeartbeatsAt(heartbeat_freq)
+        self._configureServer(self._local_server)
         log.info("new local server connection {} registered".format(url))
 
     def localServer(self):
@@ -243,8 +354,9 @@ class Servers(QtCore.QObject):
         # ca_file = '/home/jseutterlst/.conf/GNS3Certs/gns3server.localdomain.com.crt'
         log.debug('Starting SecureWebSocketClient url={}'.format(url))
         log.debug('Starting SecureWebSocketClient ca_file={}'.format(ca_file))
-        server = SecureWebSocketClient(url, ca_file)
+        server = SecureWebSocketClient(url, ca_file=ca_file)
         self._local_server.enableHeartbeatsAt(heartbeat_freq)
+        self._configureServer(server)
         log.info("new remote server connection {} registered".format(url))
         return server
 
@@ -279,9 +391,13 @@ class Servers(QtCore.QObject):
             port = server["port"]
             url = "ws://{host}:{port}".format(host=host, port=port)
             new_server = WebSocketClient(url)
+            self._configureServer(new_server)
             self._remote_servers[server_id] = new_server
             log.info("new remote server connection {} registered".format(url))
 
+        if self._monitor.isActive():
+            # connect to the new servers right away
+            self._monitor.probeAll()
         self.updated_signal.emit()
 
     def remoteServers(self):
@@ -293,32 +409,155 @@ class Servers(QtCore.QObject):
 
         return self._remote_servers
 
-    def __iter__(self):
+    def placementPolicy(self):
+        """
+        Returns the name of the policy used to place new nodes on the remote servers.
+
+        :returns: policy name
+        """
+
+        return self._placement_policy.name
+
+    def setPlacementPolicy(self, name):
+        """
+        Sets the policy used to place new nodes on the remote servers.
+
+        :param name: policy name (see server_placement.PLACEMENT_POLICIES)
+        """
+
+        self._placement_policy = placementPolicy(name)
+        if self._placement_policy.needs_capacity_reports:
+            self.requestCapacityReports()
+
+    def placementNeedsCapacity(self):
         """
-        Creates a round-robin system to pick up a remote server.
+        Returns either the placement policy needs the capacity of the servers.
+
+        :returns: boolean
         """
 
-        return self
+        return self._placement_policy.needs_capacity_reports
+
+    def serverLoads(self):
+        """
+        Returns the resources committed on each remote server
+        by the nodes of the topology.
 
-    def __next__(self):
+        :returns: dictionary of ServerLoad instances keyed by server ID
         """
-        Returns the next available remote server.
 
-        :returns: remote server (WebSocketClient instance)
+        from .topology import Topology
+        topology = Topology.instance()
+        loads = {}
+        for server in self._remote_servers.values():
+            nodes, ram = topology.serverLoad(server.id())
+            loads[server.id()] = ServerLoad(nodes, ram, capacity=self._monitor.health(server).capacity)
+        return loads
+
+    def updateCapacity(self, server, report):
+        """
+        Updates the capacity reported by a remote server.
+
+        :param server: WebSocketClient instance
+        :param report: dictionary with "ram_total" and "ram_available" in MB
+        """
+
+        self._monitor.updateCapacity(server, report)
+
+    def requestCapacityReports(self):
+        """
+        Asks the connected remote servers for their capacity
+        (done by the health monitor after each probe when needed).
+        Servers not answering keep their last report (if any).
+        """
+
+        for server in self._remote_servers.values():
+            if server.connected():
+                server.send_message("builtin.capacity", None, self._capacityReportCallback(server))
+
+    def _capacityReportCallback(self, server):
+
+        def callback(result, error=False):
+            if error:
+                log.debug("no capacity report from {}:{}: {}".format(server.host, server.port, result.get("message")))
+                return
+            if not isinstance(result, dict) or not isinstance(result.get("ram_total"), (int, float)):
+                log.warning("invalid capacity report from {}:{}: {}".format(server.host, server.port, result))
+                return
+            self.updateCapacity(server, result)
+        return callback
+
+    def allocateServer(self, node_class=None, ram=0, neighbours=None):
+        """
+        Picks up a remote server for a new node using the placement policy.
+
+        :param node_class: Node class to be created
+        :param ram: estimated RAM needed by the node in MB
+        :param neighbours: nodes the new node is expected to be linked to
+
+        :returns: remote server (WebSocketClient instance) or None
         """
 
         if not self._remote_servers:
             return None
 
-        server_ids = list(self._remote_servers.keys())
-        server_id = server_ids[self._remote_server_iter_pos]
+        servers = list(self._remote_servers.values())
+        available = [server for server in servers if self._monitor.health(server).isAvailable()]
+        if available:
+            # skip the unreachable servers
+            servers = available
+        loads = self.serverLoads()
+        for node in neighbours or []:
+            load = loads.get(node.server().id())
+            if load is not None:
+                load.neighbours += 1
+        server = self._placement_policy.select(servers, loads, node_class, ram)
+        log.debug("{} placed on {}:{} ({} policy)".format(node_class.__name__ if node_class else "node",
+                                                        server.host,
+                                                        server.port,
+                                                        self._placement_policy.name))
+        return server
 
-        if self._remote_server_iter_pos < len(server_ids) - 1:
-            self._remote_server_iter_pos += 1
-        else:
-            self._remote_server_iter_pos = 0
+    def startHealthMonitor(self):
+        """
+        Connects to all the remote servers in parallel and keeps probing their health.
+        """
+
+        self._monitor.start()
 
-        return self._remote_servers[server_id]
+    def stopHealthMonitor(self):
+        """
+        Stops probing the servers.
+        """
+
+        self._monitor.stop()
+
+    def serverHealth(self, server):
+        """
+        Returns the health of a server.
+
+        :param server: WebSocketClient instance
+
+        :returns: ServerHealth instance
+        """
+
+        return self._monitor.health(server)
+
+    def rebalance(self):
+        """
+        Computes a placement of the topology nodes on the remote servers
+        minimizing the links between servers.
+
+        :returns: RebalancePlan instance
+        """
+
+        from .topology import Topology
+        capacities = {}
+        for server in self._remote_servers.values():
+            capacity = self._monitor.health(server).capacity
+            if capacity:
+                capacities[server.id()] = capacity.get("ram_total")
+        return rebalanceTopology(Topology.instance(), list(self._remote_servers.values()), capacities)
 
     def save(self):
         """
@@ -332,6 +571,7 @@ class Servers(QtCore.QObject):
         Disconnects all servers (local and remote).
         """
 
+        self._monitor.stop()
         if self._local_server.connected():
             self._local_server.close_connection()
         for server in self._remote_servers:
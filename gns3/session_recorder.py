@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Records the JSON-RPC messages exchanged with a server.
+
+A session is a line-delimited file, one JSON object per message:
+{"t": <seconds since the recording started>, "d": "out" or "in", "m": <JSON-RPC message>}
+"""
+
+import json
+import time
+
+import logging
+log = logging.getLogger(__name__)
+
+# message directions
+SENT = "out"
+RECEIVED = "in"
+
+
+class SessionRecorder(object):
+    """
+    Writes JSON-RPC messages to a session file.
+
+    :param path: path of the session file
+    """
+
+    def __init__(self, path):
+
+        self._path = path
+        self._file = open(path, "wb")
+        self._started_at = time.monotonic()
+        self._count = 0
+
+    def path(self):
+        """
+        Returns the path of the session file.
+
+        :returns: path
+        """
+
+        return self._path
+
+    def count(self):
+        """
+        Returns the number of recorded messages.
+
+        :returns: integer
+        """
+
+        return self._count
+
+    def record(self, direction, data):
+        """
+        Records a message.
+
+        :param direction: SENT or RECEIVED
+        :param data: encoded JSON-RPC message (bytes)
+        """
+
+        if self._file is None:
+            return
+        timestamp = "{:.6f}".format(time.monotonic() - self._started_at).encode("ascii")
+        # the message is already JSON, there is no need to decode it
+        self._file.write(b'{"t":' + timestamp + b',"d":"' + direction.encode("ascii") + b'","m":' + bytes(data) + b'}\n')
+        self._count += 1
+
+    def close(self):
+        """
+        Closes the session file.
+        """
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            log.info("{} JSON-RPC messages recorded to {}".format(self._count, self._path))
+
+
+def loadSession(path):
+    """
+    Loads a session file.
+
+    :param path: path of the session file
+
+    :returns: list of tuples (timestamp, direction, JSON-RPC message)
+    """
+
+    session = []
+    with open(path, "rb") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line.decode("utf-8"))
+                session.append((entry["t"], entry["d"], entry["m"]))
+            except (ValueError, KeyError) as e:
+                log.warning("{}:{}: invalid session entry: {}".format(path, line_number, e))
+    return session
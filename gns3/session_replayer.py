@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Fake GNS3 server replaying a recorded JSON-RPC session over a local socket.
+
+Each request received from the GUI is answered with the reply recorded for
+the same method (with the same params when possible) after the recorded
+latency. Notifications are sent at their recorded time relative to the
+reply preceding them in the session.
+"""
+
+import argparse
+import collections
+import threading
+import time
+
+from .fake_server import FakeServer
+from .jsonrpc import JSONRPCMethodNotFound
+from .session_recorder import loadSession, SENT, RECEIVED
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class RecordedReply(object):
+    """
+    Reply recorded for a request.
+
+    :param params: params of the recorded request
+    :param reply: recorded JSON-RPC reply (dictionary)
+    :param latency: time between the request and the reply in seconds
+    """
+
+    __slots__ = ("params", "reply", "latency", "notifications")
+
+    def __init__(self, params, reply, latency):
+
+        self.params = params
+        self.reply = reply
+        self.latency = latency
+        # notifications received after this reply: list of (delay, message)
+        self.notifications = []
+
+
+class SessionReplayer(FakeServer):
+    """
+    Fake GNS3 server replaying a recorded session.
+
+    :param path: path of the session file recorded by SessionRecorder
+    :param host: host to listen on
+    :param port: port to listen on (0 means any free port)
+    :param speed: replay speed factor (2 means twice as fast, 0 means no delays)
+    """
+
+    def __init__(self, path, host="127.0.0.1", port=0, speed=1.0):
+
+        FakeServer.__init__(self, host, port)
+        self._speed = speed
+        self._replies = {}
+        self._initial_notifications = []
+        self._lock = threading.Lock()
+        self._unknown_requests = 0
+        self._load(loadSession(path))
+
+    def _load(self, session):
+
+        requests = {}
+        anchor = None
+        anchor_time = 0
+        for timestamp, direction, message in session:
+            messages = message if isinstance(message, list) else [message]
+            for message in messages:
+                if not isinstance(message, dict):
+                    continue
+                if direction == SENT:
+                    if message.get("id") is not None and "method" in message:
+                        requests[message["id"]] = (timestamp, message["method"], message.get("params"))
+                elif direction == RECEIVED:
+                    if "method" in message:
+                        # notification sent by the server
+                        if anchor is None:
+                            self._initial_notifications.append((timestamp, message))
+                        else:
+                            anchor.notifications.append((timestamp - anchor_time, message))
+                    elif message.get("id") in requests:
+                        sent_at, method, params = requests.pop(message["id"])
+                        anchor = RecordedReply(params, message, timestamp - sent_at)
+                        anchor_time = timestamp
+                        self._replies.setdefault(method, collections.deque()).append(anchor)
+
+    def _delay(self, delay):
+
+        if self._speed <= 0:
+            return 0
+        return max(0, delay / self._speed)
+
+    def recordedMethods(self):
+        """
+        Returns the number of recorded replies for each method.
+
+        :returns: dictionary
+        """
+
+        with self._lock:
+            return {method: len(replies) for method, replies in self._replies.items()}
+
+    def unknownRequests(self):
+        """
+        Returns the number of requests for which no reply has been recorded.
+
+        :returns: integer
+        """
+
+        return self._unknown_requests
+
+    def connected(self, connection):
+        """
+        Called when the websocket handshake with the GUI is done.
+
+        :param connection: FakeServerConnection instance
+        """
+
+        for timestamp, message in self._initial_notifications:
+            connection.schedule(self._delay(timestamp), message)
+
+    def request(self, connection, request):
+        """
+        Answers a request with the matching recorded reply.
+
+        :param connection: FakeServerConnection instance
+        :param request: JSON-RPC request (dictionary)
+        """
+
+        with self._lock:
+            recorded = self._match(request["method"], request.get("params"))
+            if recorded is None:
+                self._unknown_requests += 1
+        if recorded is None:
+            log.warning("no recorded reply for {}".format(request["method"]))
+            connection.schedule(0, JSONRPCMethodNotFound(request["id"])())
+            return
+
+        reply = dict(recorded.reply)
+        reply["id"] = request["id"]
+        delay = self._delay(recorded.latency)
+        connection.schedule(delay, reply)
+        for notification_delay, notification in recorded.notifications:
+            connection.schedule(delay + self._delay(notification_delay), notification)
+
+    def _match(self, method, params):
+
+        replies = self._replies.get(method)
+        if not replies:
+            return None
+        for index, recorded in enumerate(replies):
+            if recorded.params == params:
+                del replies[index]
+                return recorded
+        return replies.popleft()
+
+
+def main():
+    """
+    Entry point to replay a session from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description="Replay a recorded GNS3 JSON-RPC session")
+    parser.add_argument("session", help="session file recorded by the GUI")
+    parser.add_argument("--host", help="host to listen on", default="127.0.0.1")
+    parser.add_argument("--port", help="port to listen on", type=int, default=8000)
+    parser.add_argument("--speed", help="replay speed factor (0 for no delays)", type=float, default=1.0)
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    replayer = SessionReplayer(options.session, options.host, options.port, options.speed)
+    replayer.start()
+    print("Replaying {} on {}:{}, press Ctrl+C to stop".format(options.session, replayer.host(), replayer.port()))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        replayer.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -53,6 +53,24 @@ else:
 DEFAULT_LOCAL_SERVER_HOST = "127.0.0.1"
 DEFAULT_LOCAL_SERVER_PORT = 8000
 
+# the local server is ready when it prints a line matching this pattern
+# (it is connected to right away, any other output only starts the probes)
+LOCAL_SERVER_READY_PATTERN = r"(?i)(starting|listening|running)\b.*\bon\b.*:\d+"
+
+# local_server_start_timeout is in seconds
+DEFAULT_LOCAL_SERVER_START_TIMEOUT = 30
+
+# the local server is restarted at most local_server_max_restarts times
+# in a row when it crashes, the counter is reset once it has been up for
+# local_server_stable_time seconds
+DEFAULT_LOCAL_SERVER_MAX_RESTARTS = 3
+DEFAULT_LOCAL_SERVER_STABLE_TIME = 60
+
+# the local server output is saved to GNS3_server.log in the settings
+# directory, rotated at each start and when bigger than local_server_log_size bytes
+DEFAULT_LOCAL_SERVER_LOG_SIZE = 10 * 1024 * 1024
+DEFAULT_LOCAL_SERVER_LOG_BACKUPS = 3
+
 # Pre-configured Telnet console commands on various OSes
 if sys.platform.startswith("win") and "PROGRAMFILES(X86)" in os.environ and os.path.exists(os.environ["PROGRAMFILES(X86)"]):
     # windows 64-bit
@@ -178,6 +196,7 @@ GENERAL_SETTINGS = {
     "check_for_update": True,
     "slow_device_start_all": 0,
     "link_manual_mode": True,
+    "compact_project_files": False,
     "telnet_console_command": DEFAULT_TELNET_CONSOLE_COMMAND,
     "serial_console_command": DEFAULT_SERIAL_CONSOLE_COMMAND,
     "auto_close_console": True,
@@ -192,6 +211,7 @@ GENERAL_SETTING_TYPES = {
     "check_for_update": bool,
     "slow_device_start_all": int,
     "link_manual_mode": bool,
+    "compact_project_files": bool,
     "telnet_console_command": str,
     "serial_console_command": str,
     "auto_close_console": bool,
@@ -204,6 +224,11 @@ GRAPHICS_VIEW_SETTINGS = {
     "scene_height": 1000,
     "draw_rectangle_selected_item": False,
     "draw_link_status_points": True,
+    "cache_node_symbols": True,
+    "level_of_detail": True,
+    "lod_symbol_zoom": 0.2,
+    "lod_label_zoom": 0.5,
+    "lod_status_point_zoom": 0.4,
     "default_label_font": "TypeWriter,10,-1,5,75,0,0,0,0,0",
     "default_label_color": "#000000",
 }
@@ -213,6 +238,11 @@ GRAPHICS_VIEW_SETTING_TYPES = {
     "scene_height": int,
     "draw_rectangle_selected_item": bool,
     "draw_link_status_points": bool,
+    "cache_node_symbols": bool,
+    "level_of_detail": bool,
+    "lod_symbol_zoom": float,
+    "lod_label_zoom": float,
+    "lod_status_point_zoom": float,
     "default_label_font": str,
     "default_label_color": str,
 }
@@ -269,3 +299,121 @@ CLOUD_PROVIDERS = {
 
 # heartbeat_freq is in milliseconds
 DEFAULT_HEARTBEAT_FREQ = 60000
+
+# batch_window is in milliseconds (0 = the next event loop turn)
+DEFAULT_BATCH_WINDOW = 0
+
+# JSON-RPC request timeouts are in seconds,
+# "*.method" matches the method for all modules
+DEFAULT_RPC_TIMEOUT = 60
+RPC_TIMEOUTS = {
+    "*.create": 120,
+    "*.start": 120,
+    "*.stop": 120,
+    "*.reload": 120,
+    "*.suspend": 120,
+    "*.idlepcs": 300,
+    "builtin.version": 10,
+    "builtin.capacity": 10,
+}
+
+# maximum number of JSON-RPC requests waiting for a reply per server
+DEFAULT_MAX_PENDING_REQUESTS = 32768
+
+# maximum number of websocket frames dispatched and bytes read
+# each time data is received from a server (keeps the GUI responsive)
+DEFAULT_MAX_FRAMES_PER_READ = 1000
+DEFAULT_MAX_BYTES_PER_READ = 1048576
+
+# connection_timeout is in seconds
+DEFAULT_CONNECTION_TIMEOUT = 10
+
+# automatic reconnection delays are in seconds, the delay doubles
+# after each failed attempt (with some random jitter)
+DEFAULT_RECONNECT_MIN_DELAY = 1
+DEFAULT_RECONNECT_MAX_DELAY = 60
+
+# JSON-RPC methods that can safely be sent again after a reconnection
+RPC_IDEMPOTENT_METHODS = ("start",
+                          "stop",
+                          "suspend",
+                          "reload",
+                          "export_config",
+                          "vm_list",
+                          "qemu_list",
+                          "interfaces",
+                          "idlepcs")
+
+# maximum number of JSON-RPC requests sent to a server and waiting
+# for a reply, other requests are queued by priority (0 means no limit)
+DEFAULT_IN_FLIGHT_WINDOW = 0
+
+# policy used to place new nodes on the remote servers:
+# round_robin, least_nodes, least_ram, weighted_capacity or topology_aware
+# (places a new node with the nodes it is linked to, balancing the servers)
+DEFAULT_PLACEMENT_POLICY = "topology_aware"
+
+# servers are probed (and connected if needed) every health_probe_interval
+# seconds, the capacity being requested too for the weighted_capacity policy
+DEFAULT_HEALTH_PROBE_INTERVAL = 30
+
+# probe round-trip time in seconds above which a server is degraded
+DEFAULT_HEALTH_SLOW_RTT = 1.0
+
+# failed probes in a row before a server is unreachable
+DEFAULT_HEALTH_MAX_FAILURES = 3
+
+# maximum number of custom node symbols (SVG renderers)
+# kept in memory while no node uses them
+DEFAULT_SVG_RENDERER_CACHE_SIZE = 64
+
+# maximum number of rasterized sizes kept for each node symbol
+DEFAULT_SYMBOL_PIXMAP_SIZES = 4
+
+# largest side in pixels of a rasterized node symbol, symbols
+# zoomed in further are drawn from their vector representation
+DEFAULT_SYMBOL_PIXMAP_MAX_SIZE = 1024
+
+# ideal distance in pixels between linked nodes
+# when automatically laying out the topology
+DEFAULT_AUTO_LAYOUT_SPACING = 150
+
+# number of iterations of the automatic layout
+DEFAULT_AUTO_LAYOUT_ITERATIONS = 50
+
+# maximum number of nodes being created at the same time on a server
+# when loading a topology, other nodes are queued (0 means no limit)
+DEFAULT_NODE_CREATION_BATCH = 16
+
+# seconds after which a node being created when loading a topology
+# is considered as failed
+DEFAULT_NODE_CREATION_TIMEOUT = 300
+
+# maximum number of links being created at the same time on a server
+# when loading a topology, other links are queued (0 means no limit)
+DEFAULT_MAX_LINK_CREATIONS_PER_SERVER = 32
+
+# seconds after which a link being created when loading a topology
+# no longer counts against the per server limit
+DEFAULT_LINK_CREATION_TIMEOUT = 120
+
+# priority classes used to release the queued JSON-RPC requests
+RPC_PRIORITY_INTERACTIVE = 0
+RPC_PRIORITY_NORMAL = 1
+RPC_PRIORITY_BULK = 2
+
+# priority class per JSON-RPC method, "*.method" matches the method
+# for all modules, methods not listed here have a normal priority
+RPC_PRIORITIES = {
+    "*.start": RPC_PRIORITY_INTERACTIVE,
+    "*.stop": RPC_PRIORITY_INTERACTIVE,
+    "*.suspend": RPC_PRIORITY_INTERACTIVE,
+    "*.reload": RPC_PRIORITY_INTERACTIVE,
+    "*.start_capture": RPC_PRIORITY_INTERACTIVE,
+    "*.stop_capture": RPC_PRIORITY_INTERACTIVE,
+    "*.create": RPC_PRIORITY_BULK,
+    "*.delete": RPC_PRIORITY_BULK,
+    "*.allocate_udp_port": RPC_PRIORITY_BULK,
+    "*.add_nio": RPC_PRIORITY_BULK,
+    "*.delete_nio": RPC_PRIORITY_BULK,
+}
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Lightweight stand-in for a GNS3 server, answering the JSON-RPC methods
+used by the modules (vpcs.create, dynamips.vm.create, *.allocate_udp_port,
+*.add_nio, *.start etc.) without running any emulator.
+Latency and failure rates can be configured per method to load test the GUI.
+"""
+
+import argparse
+import itertools
+import random
+import threading
+import time
+
+from .fake_server import FakeServer
+from .version import __version__
+
+import logging
+log = logging.getLogger(__name__)
+
+# JSON-RPC error code returned for simulated failures
+STUB_FAILURE_ERROR = -3200
+
+# RAM in MB reported by default by the builtin.capacity method
+STUB_RAM_TOTAL = 16384
+
+
+class StubServer(FakeServer):
+    """
+    Stub GNS3 server.
+
+    :param host: host to listen on
+    :param port: port to listen on (0 means any free port)
+    :param latency: default reply latency in seconds
+    :param failure_rate: default probability (0 to 1) for a request to fail
+    :param seed: random seed to make failures and jitter reproducible
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, seed=None):
+
+        FakeServer.__init__(self, host, port)
+        self._latency = latency
+        self._failure_rate = failure_rate
+        self._jitter = 0.0
+        self._latencies = {}
+        self._failure_rates = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._udp_ports = itertools.count(20000)
+        self._request_counts = {}
+        self._failure_count = 0
+        self._ram_total = STUB_RAM_TOTAL
+        self._ram_available = STUB_RAM_TOTAL
+        self._handlers = {"create": self._create,
+                          "update": self._update,
+                          "allocate_udp_port": self._allocateUDPPort,
+                          "add_nio": self._portReply,
+                          "delete_nio": self._portReply,
+                          "start_capture": self._startCapture,
+                          "stop_capture": self._portReply,
+                          "idlepcs": self._idlepcs,
+                          "vm_list": self._vmList,
+                          "qemu_list": self._qemuList,
+                          "version": self._version,
+                          "capacity": self._capacity}
+
+    def setMethodLatency(self, method, latency):
+        """
+        Sets the reply latency for a JSON-RPC method.
+
+        :param method: JSON-RPC method, "*.method" matches the method for all modules
+        :param latency: latency in seconds
+        """
+
+        self._latencies[method] = latency
+
+    def setMethodFailureRate(self, method, failure_rate):
+        """
+        Sets the failure rate for a JSON-RPC method.
+
+        :param method: JSON-RPC method, "*.method" matches the method for all modules
+        :param failure_rate: probability (0 to 1) for a request to fail
+        """
+
+        self._failure_rates[method] = failure_rate
+
+    def setJitter(self, jitter):
+        """
+        Sets a random jitter added to the latency.
+
+        :param jitter: maximum jitter in seconds
+        """
+
+        self._jitter = jitter
+
+    def setCapacity(self, ram_total, ram_available=None):
+        """
+        Sets the capacity reported by the builtin.capacity method.
+
+        :param ram_total: total RAM in MB
+        :param ram_available: available RAM in MB (the total RAM by default)
+        """
+
+        self._ram_total = ram_total
+        self._ram_available = ram_total if ram_available is None else ram_available
+
+    def requestCounts(self):
+        """
+        Returns the number of requests received for each method.
+
+        :returns: dictionary
+        """
+
+        with self._lock:
+            return dict(self._request_counts)
+
+    def failureCount(self):
+        """
+        Returns the number of simulated failures.
+
+        :returns: integer
+        """
+
+        return self._failure_count
+
+    @staticmethod
+    def _lookup(table, method, default):
+
+        if method in table:
+            return table[method]
+        return table.get("*." + method.rsplit(".", 1)[-1], default)
+
+    def request(self, connection, request):
+        """
+        Answers a request.
+
+        :param connection: FakeServerConnection instance
+        :param request: JSON-RPC request (dictionary)
+        """
+
+        method = request["method"]
+        params = request.get("params") or {}
+        with self._lock:
+            self._request_counts[method] = self._request_counts.get(method, 0) + 1
+            latency = self._lookup(self._latencies, method, self._latency)
+            if self._jitter:
+                latency += self._random.uniform(0, self._jitter)
+            failed = self._random.random() < self._lookup(self._failure_rates, method, self._failure_rate)
+            if failed:
+                self._failure_count += 1
+            else:
+                handler = self._handlers.get(method.rsplit(".", 1)[-1])
+                result = handler(method, params) if handler else True
+
+        if failed:
+            reply = {"jsonrpc": 2.0,
+                     "id": request["id"],
+                     "error": {"code": STUB_FAILURE_ERROR, "message": "simulated failure for {}".format(method)}}
+        else:
+            reply = {"jsonrpc": 2.0, "id": request["id"], "result": result}
+        connection.schedule(latency, reply)
+
+    def _create(self, method, params):
+
+        result = dict(params)
+        result["id"] = next(self._ids)
+        if not result.get("name"):
+            result["name"] = "{}{}".format(method.split(".")[0].upper(), result["id"])
+        return result
+
+    def _update(self, method, params):
+
+        return dict(params)
+
+    def _allocateUDPPort(self, method, params):
+
+        return {"port_id": params.get("port_id"), "lport": next(self._udp_ports)}
+
+    def _portReply(self, method, params):
+
+        return {"port_id": params.get("port_id")}
+
+    def _startCapture(self, method, params):
+
+        return {"port_id": params.get("port_id"), "capture_file_path": params.get("capture_file_name", "")}
+
+    def _idlepcs(self, method, params):
+
+        return {"id": params.get("id"), "idlepcs": ["0x60000000"]}
+
+    def _vmList(self, method, params):
+
+        return {"server": params.get("server"), "vms": []}
+
+    def _qemuList(self, method, params):
+
+        return {"server": params.get("server"), "qemus": []}
+
+    def _version(self, method, params):
+
+        return {"version": __version__}
+
+    def _capacity(self, method, params):
+
+        return {"ram_total": self._ram_total, "ram_available": self._ram_available}
+
+
+def main():
+    """
+    Entry point to run a stub server from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description="Stub GNS3 server for GUI load tests")
+    parser.add_argument("--host", help="host to listen on", default="127.0.0.1")
+    parser.add_argument("--port", help="port to listen on", type=int, default=8000)
+    parser.add_argument("--latency", help="reply latency in seconds", type=float, default=0.0)
+    parser.add_argument("--jitter", help="maximum random jitter in seconds", type=float, default=0.0)
+    parser.add_argument("--failure-rate", help="probability (0 to 1) for a request to fail", type=float, default=0.0)
+    options = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = StubServer(options.host, options.port, options.latency, options.failure_rate)
+    server.setJitter(options.jitter)
+    server.start()
+    print("Stub server listening on {}:{}, press Ctrl+C to stop".format(server.host(), server.port()))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Process-wide cache of the SVG renderers used to draw the node symbols:
+each symbol is parsed once and its renderer shared by all the node items.
+Symbols can also be rasterized once per size and drawn as pixmaps.
+"""
+
+from collections import OrderedDict
+
+from .qt import QtCore, QtGui, QtSvg
+from .settings import DEFAULT_SVG_RENDERER_CACHE_SIZE, DEFAULT_SYMBOL_PIXMAP_SIZES
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class SvgRendererCache(object):
+    """
+    Reference counted cache of QSvgRenderer instances keyed by symbol path.
+
+    Symbols from the Qt resources (paths starting with ":") are kept
+    for the lifetime of the process, custom symbols no longer used are
+    evicted in least recently used order.
+
+    :param max_unused: maximum number of custom symbols kept while not used
+    :param max_pixmap_sizes: maximum number of rasterized sizes kept per symbol
+    """
+
+    def __init__(self, max_unused=DEFAULT_SVG_RENDERER_CACHE_SIZE, max_pixmap_sizes=DEFAULT_SYMBOL_PIXMAP_SIZES):
+
+        self._max_unused = max_unused
+        self._max_pixmap_sizes = max_pixmap_sizes
+        self._renderers = {}
+        self._pixmaps = {}
+        self._references = {}
+        self._unused = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._rasterizations = 0
+
+    def acquire(self, path):
+        """
+        Returns the renderer for a symbol, the symbol is parsed
+        the first time. Each call must be paired with a call to release().
+
+        :param path: symbol path (or resource)
+
+        :returns: QSvgRenderer instance (check isValid())
+        """
+
+        renderer = self._renderers.get(path)
+        if renderer is None:
+            self._misses += 1
+            renderer = QtSvg.QSvgRenderer(path)
+            renderer.setObjectName(path)
+            if not renderer.isValid():
+                log.warning("could not load symbol {}".format(path))
+            self._renderers[path] = renderer
+            self._references[path] = 0
+        else:
+            self._hits += 1
+            self._unused.pop(path, None)
+        self._references[path] += 1
+        return renderer
+
+    def release(self, path):
+        """
+        Releases a renderer returned by acquire().
+
+        :param path: symbol path (or resource)
+        """
+
+        if not self._references.get(path):
+            log.debug("symbol {} released more times than acquired".format(path))
+            return
+
+        self._references[path] -= 1
+        if self._references[path]:
+            return
+
+        renderer = self._renderers[path]
+        if not renderer.isValid():
+            # no need to keep a renderer for an invalid symbol
+            self._evict(path)
+        elif not path.startswith(":"):
+            self._unused[path] = True
+            while len(self._unused) > self._max_unused:
+                self._evict(self._unused.popitem(last=False)[0])
+
+    def pixmap(self, path, size):
+        """
+        Returns a symbol rasterized at a given size, the symbol is
+        rendered the first time. The symbol must have been acquired.
+
+        :param path: symbol path (or resource)
+        :param size: QSize instance
+
+        :returns: QPixmap instance
+        """
+
+        sizes = self._pixmaps.setdefault(path, OrderedDict())
+        key = (size.width(), size.height())
+        pixmap = sizes.get(key)
+        if pixmap is None:
+            pixmap = QtGui.QPixmap(size)
+            pixmap.fill(QtCore.Qt.transparent)
+            painter = QtGui.QPainter(pixmap)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+            self._renderers[path].render(painter)
+            painter.end()
+            sizes[key] = pixmap
+            self._rasterizations += 1
+            while len(sizes) > self._max_pixmap_sizes:
+                sizes.popitem(last=False)
+        else:
+            sizes.move_to_end(key)
+        return pixmap
+
+    def _evict(self, path):
+        """
+        Removes a renderer from the cache.
+
+        :param path: symbol path (or resource)
+        """
+
+        log.debug("evicting symbol {} from the cache".format(path))
+        self._unused.pop(path, None)
+        self._pixmaps.pop(path, None)
+        del self._renderers[path]
+        del self._references[path]
+        self._evictions += 1
+
+    def references(self, path):
+        """
+        Returns the number of users of a symbol.
+
+        :param path: symbol path (or resource)
+
+        :returns: integer
+        """
+
+        return self._references.get(path, 0)
+
+    def __contains__(self, path):
+
+        return path in self._renderers
+
+    def __len__(self):
+
+        return len(self._renderers)
+
+    def stats(self):
+        """
+        Returns the cache statistics.
+
+        :returns: dictionary
+        """
+
+        return {"renderers": len(self._renderers),
+                "unused": len(self._unused),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "pixmaps": sum(len(sizes) for sizes in self._pixmaps.values()),
+                "rasterizations": self._rasterizations}
+
+    @staticmethod
+    def instance():
+        """
+        Singleton to return only one instance of SvgRendererCache.
+
+        :returns: instance of SvgRendererCache
+        """
+
+        if not hasattr(SvgRendererCache, "_instance"):
+            SvgRendererCache._instance = SvgRendererCache()
+        return SvgRendererCache._instance
@@ -21,9 +21,11 @@ Handles the saving and loading of a topology.
 """
 
 import os
+import copy
+import functools
 from collections import namedtuple
 
-from .qt import QtCore, QtGui, QtSvg
+from .qt import QtCore, QtGui
 from .items.node_item import NodeItem
 from .items.link_item import LinkItem
 from .items.note_item import NoteItem
@@ -31,6 +33,8 @@ from .items.rectangle_item import RectangleItem
 from .items.ellipse_item import EllipseItem
 from .items.image_item import ImageItem
 from .servers import Servers
+from .link_scheduler import LinkScheduler
+from .node_loader import NodeLoader
 from .modules import MODULES
 from .modules.module_error import ModuleError
 from .utils.message_box import MessageBox
@@ -52,26 +56,98 @@ class Topology(object):
 
     def __init__(self):
 
-        self._nodes = []
-        self._links = []
+        # nodes, links and instances are indexed by identifier,
+        # dictionaries keep the insertion order used when saving.
+        self._nodes = {}
+        self._node_items = {}
+        self._node_ports = {}
+        self._node_updated_slots = {}
+        self._node_loads = {}
+        self._server_loads = {}
+        self._links = {}
+        self._port_links = {}
         self._notes = []
         self._rectangles = []
         self._ellipses = []
         self._images = []
         self._topology = None
-        self._initialized_nodes = []
+        self._initialized_nodes = set()
+        self._link_scheduler = None
+        self._node_loader = None
+        self._queued_node_items = {}
+        self._loading_topology_nodes = {}
+        self._load_errors = []
         self._resources_type = "local"
         self._instances = []
+        self._instance_index = {}
 
-    def addNode(self, node):
+    def addNode(self, node, node_item=None):
         """
         Adds a new node to this topology.
 
         :param node: Node instance
+        :param node_item: NodeItem instance representing the node on the scene
         """
 
         #self._topology.add_node(node)
-        self._nodes.append(node)
+        self._nodes[node.id()] = node
+        if node_item is not None:
+            self._node_items[node.id()] = node_item
+
+        # the ports and the RAM of a node can change when its settings are updated
+        updated_slot = functools.partial(self._nodeUpdatedSlot, node)
+        node.updated_signal.connect(updated_slot)
+        self._node_updated_slots[node.id()] = updated_slot
+        self._updateServerLoad(node)
+
+    def _nodeUpdatedSlot(self, node):
+        """
+        Slot called when the settings of a node have been updated.
+
+        :param node: Node instance
+        """
+
+        self._node_ports.pop(node.id(), None)
+        self._updateServerLoad(node)
+
+    def _updateServerLoad(self, node, removed=False):
+        """
+        Keeps the number of nodes and the RAM committed
+        on each server up to date.
+
+        :param node: Node instance
+        :param removed: either the node has been removed
+        """
+
+        previous = self._node_loads.pop(node.id(), None)
+        if previous is not None:
+            server_id, ram = previous
+            load = self._server_loads[server_id]
+            load[0] -= 1
+            load[1] -= ram
+            if not load[0]:
+                del self._server_loads[server_id]
+        if removed:
+            return
+
+        server_id = node.server().id()
+        ram = node.settings().get("ram") or 0
+        load = self._server_loads.setdefault(server_id, [0, 0])
+        load[0] += 1
+        load[1] += ram
+        self._node_loads[node.id()] = (server_id, ram)
+
+    def serverLoad(self, server_id):
+        """
+        Returns the resources committed on a server by the nodes of this topology.
+
+        :param server_id: server identifier
+
+        :returns: (number of nodes, RAM in MB) tuple
+        """
+
+        nodes, ram = self._server_loads.get(server_id, (0, 0))
+        return nodes, ram
 
     def removeNode(self, node):
         """
@@ -80,8 +156,19 @@ class Topology(object):
         :param node: Node instance
         """
 
-        if node in self._nodes:
-            self._nodes.remove(node)
+        if self._nodes.get(node.id()) is node:
+            del self._nodes[node.id()]
+            self._node_items.pop(node.id(), None)
+            self._node_ports.pop(node.id(), None)
+            self._initialized_nodes.discard(node.id())
+            self._loading_topology_nodes.pop(node.id(), None)
+            self._updateServerLoad(node, removed=True)
+            updated_slot = self._node_updated_slots.pop(node.id(), None)
+            if updated_slot is not None:
+                try:
+                    node.updated_signal.disconnect(updated_slot)
+                except (TypeError, RuntimeError):
+                    pass
 
     def getNode(self, node_id):
         """
@@ -90,10 +177,36 @@ class Topology(object):
         :returns: Node instance or None
         """
 
-        for node in self._nodes:
-            if node.id() == node_id:
-                return node
-        return None
+        return self._nodes.get(node_id)
+
+    def getNodeItem(self, node_id):
+        """
+        Lookups for the item representing a node on the scene.
+
+        :param node_id: node identifier
+
+        :returns: NodeItem instance or None
+        """
+
+        return self._node_items.get(node_id)
+
+    def getPort(self, node_id, port_id):
+        """
+        Lookups for a port using its node and port identifiers.
+
+        :param node_id: node identifier
+        :param port_id: port identifier
+
+        :returns: Port instance or None
+        """
+
+        ports = self._node_ports.get(node_id)
+        if ports is None:
+            node = self._nodes.get(node_id)
+            if node is None:
+                return None
+            ports = self._node_ports[node_id] = {port.id(): port for port in node.ports()}
+        return ports.get(port_id)
 
     def addLink(self, link):
         """
@@ -103,7 +216,9 @@ class Topology(object):
         """
 
         #self._topology.add_node(node)
-        self._links.append(link)
+        self._links[link.id()] = link
+        self._port_links[(link.sourceNode().id(), link.sourcePort().id())] = link
+        self._port_links[(link.destinationNode().id(), link.destinationPort().id())] = link
 
     def removeLink(self, link):
         """
@@ -112,8 +227,12 @@ class Topology(object):
         :param link: Link instance
         """
 
-        if link in self._links:
-            self._links.remove(link)
+        if self._links.get(link.id()) is link:
+            del self._links[link.id()]
+            for key in ((link.sourceNode().id(), link.sourcePort().id()),
+                        (link.destinationNode().id(), link.destinationPort().id())):
+                if self._port_links.get(key) is link:
+                    del self._port_links[key]
 
     def getLink(self, link_id):
         """
@@ -122,10 +241,19 @@ class Topology(object):
         :returns: Link instance or None
         """
 
-        for link in self._links:
-            if link.id() == link_id:
-                return link
-        return None
+        return self._links.get(link_id)
+
+    def getPortLink(self, node_id, port_id):
+        """
+        Lookups for the link connected to a port.
+
+        :param node_id: node identifier
+        :param port_id: port identifier
+
+        :returns: Link instance or None
+        """
+
+        return self._port_links.get((node_id, port_id))
 
     def addNote(self, note):
         """
@@ -211,6 +339,7 @@ class Topology(object):
         i = TopologyInstance(name=name, id=id, size_id=size_id, image_id=image_id,
                              private_key=private_key, public_key=public_key)
         self._instances.append(i)
+        self._instance_index.setdefault(id, i)
 
     def removeInstance(self, id):
         """
@@ -219,10 +348,13 @@ class Topology(object):
         :param name: the name of the instance
         """
 
-        for instance in self._instances:
-            if instance.id == id:
-                self._instances.remove(instance)
-                break
+        instance = self._instance_index.pop(id, None)
+        if instance is not None:
+            self._instances.remove(instance)
+            for other in self._instances:
+                if other.id == id:
+                    self._instance_index[id] = other
+                    break
 
     def getInstance(self, id):
         """
@@ -232,23 +364,21 @@ class Topology(object):
         :return: a TopologyInstance object
         """
 
-        for instance in self._instances:
-            if instance.id == id:
-                return instance
+        return self._instance_index.get(id)
 
     def nodes(self):
         """
         Returns all the nodes in this topology.
         """
 
-        return self._nodes
+        return list(self._nodes.values())
 
     def links(self):
         """
         Returns all the links in this topology.
         """
 
-        return self._links
+        return list(self._links.values())
 
     def notes(self):
         """
@@ -291,15 +421,37 @@ class Topology(object):
         """
 
         #self._topology.clear()
+        for node_id, updated_slot in self._node_updated_slots.items():
+            try:
+                self._nodes[node_id].updated_signal.disconnect(updated_slot)
+            except (KeyError, TypeError, RuntimeError):
+                pass
         self._links.clear()
+        self._port_links.clear()
         self._nodes.clear()
+        self._node_items.clear()
+        self._node_ports.clear()
+        self._node_updated_slots.clear()
+        self._node_loads.clear()
+        self._server_loads.clear()
         self._notes.clear()
         self._rectangles.clear()
         self._ellipses.clear()
         self._images.clear()
         self._initialized_nodes.clear()
+        if self._link_scheduler:
+            self._link_scheduler.clear()
+            self._link_scheduler = None
+        if self._node_loader:
+            self._node_loader.finished_signal.disconnect(self._nodesLoadedSlot)
+            self._node_loader.cancel()
+            self._node_loader = None
+        self._queued_node_items.clear()
+        self._loading_topology_nodes.clear()
+        self._load_errors = []
         self._resources_type = "local"
         self._instances = []
+        self._instance_index = {}
         log.info("topology has been reset")
 
     def _dump_gui_settings(self, topology):
@@ -313,32 +465,36 @@ class Topology(object):
         main_window = MainWindow.instance()
         view = main_window.uiGraphicsView
 
-        if "nodes" in topology["topology"]:
+        # map the node and link representations by ID to update them in one pass over the scene items
+        topology_nodes = {node["id"]: node for node in topology["topology"].get("nodes", [])}
+        topology_links = {link["id"]: link for link in topology["topology"].get("links", [])}
+
+        if topology_nodes:
             for item in view.scene().items():
                 if isinstance(item, NodeItem):
-                    for node in topology["topology"]["nodes"]:
-                        if node["id"] == item.node().id():
-                            node["x"] = item.x()
-                            node["y"] = item.y()
-                            if item.zValue() != 1.0:
-                                node["z"] = item.zValue()
-                            if item.label():
-                                node["label"] = item.label().dump()
-                            default_symbol_path = item.defaultRenderer().objectName()
-                            if default_symbol_path:
-                                node["default_symbol"] = default_symbol_path
-                            hover_symbol_path = item.hoverRenderer().objectName()
-                            if hover_symbol_path:
-                                node["hover_symbol"] = hover_symbol_path
+                    node = topology_nodes.get(item.node().id())
+                    if node is not None:
+                        node["x"] = item.x()
+                        node["y"] = item.y()
+                        if item.zValue() != 1.0:
+                            node["z"] = item.zValue()
+                        if item.label():
+                            node["label"] = item.label().dump()
+                        default_symbol_path = item.customDefaultSymbol()
+                        if default_symbol_path:
+                            node["default_symbol"] = default_symbol_path
+                        hover_symbol_path = item.customHoverSymbol()
+                        if hover_symbol_path:
+                            node["hover_symbol"] = hover_symbol_path
                 if isinstance(item, LinkItem):
-                    for link in topology["topology"]["links"]:
-                        if link["id"] == item.link().id():
-                            source_port_label = item.sourcePort().label()
-                            destination_port_label = item.destinationPort().label()
-                            if source_port_label:
-                                link["source_port_label"] = source_port_label.dump()
-                            if destination_port_label:
-                                link["destination_port_label"] = destination_port_label.dump()
+                    link = topology_links.get(item.link().id())
+                    if link is not None:
+                        source_port_label = item.sourcePort().label()
+                        destination_port_label = item.destinationPort().label()
+                        if source_port_label:
+                            link["source_port_label"] = source_port_label.dump()
+                        if destination_port_label:
+                            link["destination_port_label"] = destination_port_label.dump()
 
         # notes
         if self._notes:
@@ -392,20 +548,50 @@ class Topology(object):
         servers = {}
 
         # nodes
-        if self._nodes:
+        node_ids = set()
+        if self._nodes or self._loading_topology_nodes:
             topology_nodes = topology["topology"]["nodes"] = []
-            for node in self._nodes:
+            for node in self._nodes.values():
                 if node.server().id() not in servers:
                     servers[node.server().id()] = node.server()
+                node_ids.add(node.id())
+                if node.id() in self._loading_topology_nodes:
+                    # the node has not been created yet, save it as it was loaded
+                    log.info("saving node being loaded: {}".format(node.name()))
+                    topology_node = copy.deepcopy(self._loading_topology_nodes[node.id()])
+                    topology_node["server_id"] = node.server().id()
+                    topology_nodes.append(topology_node)
+                    continue
                 log.info("saving node: {}".format(node.name()))
                 topology_nodes.append(node.dump())
 
+            # nodes waiting for their batch to be loaded
+            for node_id, topology_node in self._loading_topology_nodes.items():
+                if node_id in node_ids:
+                    continue
+                server = self._servers[topology_node["server_id"]]
+                if server.id() not in servers:
+                    servers[server.id()] = server
+                node_ids.add(node_id)
+                log.info("saving node waiting to be loaded: {}".format(topology_node.get("description", node_id)))
+                topology_node = copy.deepcopy(topology_node)
+                # the server IDs of the topology file are not those of the loaded servers
+                topology_node["server_id"] = server.id()
+                topology_nodes.append(topology_node)
+
         # links
-        if self._links:
+        pending_links = []
+        if self._link_scheduler:
+            pending_links = [topology_link for topology_link in self._link_scheduler.pendingLinks()
+                             if topology_link["source_node_id"] in node_ids and topology_link["destination_node_id"] in node_ids]
+        if self._links or pending_links:
             topology_links = topology["topology"]["links"] = []
-            for link in self._links:
+            for link in self._links.values():
                 log.info("saving {}".format(str(link)))
                 topology_links.append(link.dump())
+            for topology_link in pending_links:
+                log.info("saving link waiting to be created with ID {}".format(topology_link["id"]))
+                topology_links.append(copy.deepcopy(topology_link))
 
         # servers
         if servers:
@@ -452,27 +638,118 @@ class Topology(object):
             # temporary warning
             QtGui.QMessageBox.warning(main_window, "Version", "Importing a project made with an old alpha version ({}) may not work properly".format(topology["version"]))
 
-        # deactivate the unsaved state support
+        # deactivate the unsaved state support until the nodes are loaded
         main_window.ignoreUnsavedState(True)
-        # trick: no matter what, reactivate the unsaved state support after 3 seconds
-        QtCore.QTimer.singleShot(3000, self._reactivateUnsavedState)
 
-        self._node_to_links_mapping = {}
-        # create a mapping node ID to links
+        # links are created as soon as both their nodes have been created
+        self._link_scheduler = LinkScheduler(self._createLink)
         if "links" in topology["topology"]:
-            links = topology["topology"]["links"]
-            for topology_link in links:
-                log.debug("mapping node to link with ID {}".format(topology_link["id"]))
-                source_id = topology_link["source_node_id"]
-                destination_id = topology_link["destination_node_id"]
-                if source_id not in self._node_to_links_mapping:
-                    self._node_to_links_mapping[source_id] = []
-                if destination_id not in self._node_to_links_mapping:
-                    self._node_to_links_mapping[destination_id] = []
-                self._node_to_links_mapping[source_id].append(topology_link)
-                self._node_to_links_mapping[destination_id].append(topology_link)
+            self._link_scheduler.load(topology["topology"]["links"])
 
         # servers
+        self._loadServers(topology)
+
+        # nodes are created in batches per server
+        self._load_errors = topology_file_errors
+        self._node_loader = NodeLoader(self._loadNode)
+        self._node_loader.finished_signal.connect(self._nodesLoadedSlot)
+
+        # add all the items to the scene at once
+        with view.bulkInsert():
+            if "nodes" in topology["topology"]:
+                topology_nodes = {}
+                nodes = topology["topology"]["nodes"]
+                for topology_node in nodes:
+                    # check for duplicate node IDs
+                    if topology_node["id"] in topology_nodes:
+                        topology_file_errors.append("Duplicated node ID {} for {}".format(topology_node["id"],
+                                                                                          topology_node["description"]))
+                        continue
+                    topology_nodes[topology_node["id"]] = topology_node
+
+                for topology_node in topology_nodes.values():
+                    server = None
+                    if topology_node["server_id"] in self._servers:
+                        server = self._servers[topology_node["server_id"]]
+
+                    if not server:
+                        topology_file_errors.append("No server reference for node ID {}".format(topology_node["id"]))
+                        continue
+
+                    # the node items are shown right away, the nodes are loaded in batches
+                    self._prepareNode(topology_node)
+                    self._node_loader.add(server.id(), topology_node)
+
+            self._resources_type = topology.get("resources_type")
+
+            # notes
+            if "notes" in topology["topology"]:
+                notes = topology["topology"]["notes"]
+                for topology_note in notes:
+                    note_item = NoteItem()
+                    note_item.load(topology_note)
+                    view.scene().addItem(note_item)
+                    self.addNote(note_item)
+
+            # rectangles
+            if "rectangles" in topology["topology"]:
+                rectangles = topology["topology"]["rectangles"]
+                for topology_rectangle in rectangles:
+                    rectangle_item = RectangleItem()
+                    rectangle_item.load(topology_rectangle)
+                    view.scene().addItem(rectangle_item)
+                    self.addRectangle(rectangle_item)
+
+            # ellipses
+            if "ellipses" in topology["topology"]:
+                ellipses = topology["topology"]["ellipses"]
+                for topology_ellipse in ellipses:
+                    ellipse_item = EllipseItem()
+                    ellipse_item.load(topology_ellipse)
+                    view.scene().addItem(ellipse_item)
+                    self.addEllipse(ellipse_item)
+
+            # images
+            if "images" in topology["topology"]:
+                images = topology["topology"]["images"]
+                for topology_image in images:
+
+                    updated_image_path = os.path.join(main_window.projectSettings()["project_files_dir"], topology_image["path"])
+                    if os.path.isfile(updated_image_path):
+                        image_path = updated_image_path
+                    else:
+                        image_path = topology_image["path"]
+                    if not os.path.isfile(image_path):
+                        topology_file_errors.append("Path to image {} doesn't exist".format(image_path))
+                        continue
+
+                    pixmap = QtGui.QPixmap(image_path)
+                    if pixmap.isNull():
+                        topology_file_errors.append("Image format not supported for {}".format(image_path))
+                        continue
+
+                    image_item = ImageItem(pixmap, image_path)
+                    image_item.load(topology_image)
+                    view.scene().addItem(image_item)
+                    self.addImage(image_item)
+
+            # instances
+            if "instances" in topology["topology"]:
+                instances = topology["topology"]["instances"]
+                for instance in instances:
+                    self.addInstance(instance["name"], instance["id"], instance["size_id"],
+                                     instance["image_id"],
+                                     instance["private_key"], instance["public_key"])
+
+            self._node_loader.start()
+
+    def _loadServers(self, topology):
+        """
+        Maps the server identifiers of a topology to the servers.
+
+        :param topology: topology representation
+        """
+
         self._servers = {}
         server_manager = Servers.instance()
         if "servers" in topology["topology"]:
@@ -483,156 +760,198 @@ class Topology(object):
                 else:
                     host = topology_server["host"]
                     port = topology_server["port"]
-                    self._servers[topology_server["id"]] = server_manager.getRemoteServer(host, port)
+                    ca_file = topology_server.get("ca_file", "")
+                    self._servers[topology_server["id"]] = server_manager.getRemoteServer(host, port, ca_file)
 
-        # nodes
-        if "nodes" in topology["topology"]:
-            topology_nodes = {}
-            nodes = topology["topology"]["nodes"]
-            for topology_node in nodes:
-                # check for duplicate node IDs
-                if topology_node["id"] in topology_nodes:
-                    topology_file_errors.append("Duplicated node ID {} for {}".format(topology_node["id"],
-                                                                                      topology_node["description"]))
+    def recreateNodes(self, topology, node_ids):
+        """
+        Deletes some nodes with their links and creates them again from
+        a topology representation, for instance on another server.
+        The other nodes are left untouched, their links with the
+        recreated nodes are created again.
+
+        :param topology: topology representation (from dump())
+        :param node_ids: identifiers of the nodes to recreate
+        """
+
+        from .main_window import MainWindow
+        view = MainWindow.instance().uiGraphicsView
+
+        node_ids = set(node_ids)
+        topology_nodes = [topology_node for topology_node in topology["topology"].get("nodes", [])
+                          if topology_node["id"] in node_ids]
+        topology_links = [topology_link for topology_link in topology["topology"].get("links", [])
+                          if topology_link["source_node_id"] in node_ids or topology_link["destination_node_id"] in node_ids]
+
+        for topology_node in topology_nodes:
+            node = self.getNode(topology_node["id"])
+            node_item = self.getNodeItem(topology_node["id"])
+            if node is None or node_item is None:
+                continue
+            # the node item is replaced right away, the node name is
+            # released before the new node takes it
+            node.deleted_signal.disconnect(node_item.deletedSlot)
+            node.delete()
+            self.removeNode(node)
+            node.removeAllocatedName()
+            node_item.releaseSymbols()
+            if node_item.scene():
+                node_item.scene().removeItem(node_item)
+
+        self._loadServers(topology)
+        self._link_scheduler = LinkScheduler(self._createLink)
+        self._link_scheduler.load(topology_links)
+        for topology_link in topology_links:
+            for node_id in (topology_link["source_node_id"], topology_link["destination_node_id"]):
+                node = self.getNode(node_id)
+                if node is not None and node_id not in node_ids:
+                    # the nodes staying in place are ready already
+                    self._link_scheduler.nodeReady(node)
+
+        self._load_errors = []
+        self._node_loader = NodeLoader(self._loadNode)
+        self._node_loader.finished_signal.connect(self._nodesLoadedSlot)
+        with view.bulkInsert():
+            for topology_node in topology_nodes:
+                server = self._servers.get(topology_node["server_id"])
+                if not server:
+                    self._load_errors.append("No server reference for node ID {}".format(topology_node["id"]))
                     continue
-                topology_nodes[topology_node["id"]] = topology_node
+                self._prepareNode(topology_node)
+                self._node_loader.add(server.id(), topology_node)
+        self._node_loader.start()
 
-            for topology_node in topology_nodes.values():
-                log.debug("loading node with ID {}".format(topology_node["id"]))
+    def nodeLoader(self):
+        """
+        Returns the node creation pipeline of the last loaded topology.
 
-                try:
-                    node_module = None
-                    for module in MODULES:
-                        instance = module.instance()
-                        node_class = module.getNodeClass(topology_node["type"])
-                        if node_class:
-                            node_module = instance
-                            break
-                    if not node_module:
-                        raise ModuleError("Could not find any module for {}".format(topology_node["type"]))
+        :returns: NodeLoader instance or None
+        """
 
-                    server = None
-                    if topology_node["server_id"] in self._servers:
-                        server = self._servers[topology_node["server_id"]]
+        return self._node_loader
 
-                    if not server:
-                        topology_file_errors.append("No server reference for node ID {}".format(topology_node["id"]))
-                        continue
+    def _prepareNode(self, topology_node):
+        """
+        Creates a node and its node item when loading a topology,
+        the node item is disabled until the node is loaded.
 
-                    node = node_module.createNode(node_class, server)
-                    node.error_signal.connect(main_window.uiConsoleTextEdit.writeError)
-                    node.warning_signal.connect(main_window.uiConsoleTextEdit.writeWarning)
-                    node.server_error_signal.connect(main_window.uiConsoleTextEdit.writeServerError)
+        :param topology_node: node representation
+        """
 
-                except ModuleError as e:
-                    topology_file_errors.append(str(e))
-                    continue
+        from .main_window import MainWindow
+        main_window = MainWindow.instance()
+        view = main_window.uiGraphicsView
+
+        try:
+            node_module = None
+            for module in MODULES:
+                instance = module.instance()
+                node_class = module.getNodeClass(topology_node["type"])
+                if node_class:
+                    node_module = instance
+                    break
+            if not node_module:
+                raise ModuleError("Could not find any module for {}".format(topology_node["type"]))
+
+            server = self._servers[topology_node["server_id"]]
+            node = node_module.createNode(node_class, server)
+            node.error_signal.connect(main_window.uiConsoleTextEdit.writeError)
+            node.warning_signal.connect(main_window.uiConsoleTextEdit.writeWarning)
+            node.server_error_signal.connect(main_window.uiConsoleTextEdit.writeServerError)
+
+        except ModuleError as e:
+            self._load_errors.append(str(e))
+            return
 
-                node.setId(topology_node["id"])
+        node.setId(topology_node["id"])
 
-                # we want to know when the node has been created
-                node.created_signal.connect(self._nodeCreatedSlot)
+        # create the node item and restore GUI settings
+        node_item = NodeItem(node)
+        node_item.setEnabled(False)
+        node_item.setPos(topology_node["x"], topology_node["y"])
 
-                # load the settings
-                node.load(topology_node)
+        # create the node label if present
+        label_info = topology_node.get("label")
+        if label_info:
+            node_label = NoteItem(node_item)
+            node_label.setEditable(False)
+            node_label.load(label_info)
+            node_item.setLabel(node_label)
 
-                # create the node item and restore GUI settings
-                node_item = NodeItem(node)
-                node_item.setPos(topology_node["x"], topology_node["y"])
+        if "z" in topology_node:
+            node_item.setZValue(topology_node["z"])
 
-                # create the node label if present
-                label_info = topology_node.get("label")
-                if label_info:
-                    node_label = NoteItem(node_item)
-                    node_label.setEditable(False)
-                    node_label.load(label_info)
-                    node_item.setLabel(node_label)
+        # the default symbol must be valid to use the hover symbol
+        if "default_symbol" in topology_node and node_item.setDefaultSymbol(topology_node["default_symbol"]):
+            if "hover_symbol" in topology_node:
+                node_item.setHoverSymbol(topology_node["hover_symbol"])
 
-                if "z" in topology_node:
-                    node_item.setZValue(topology_node["z"])
+        view.scene().addItem(node_item)
+        self._queued_node_items[topology_node["id"]] = node_item
 
-                if "default_symbol" in topology_node:
-                    path = topology_node["default_symbol"]
-                    default_renderer = QtSvg.QSvgRenderer(path)
-                    if default_renderer.isValid():
-                        default_renderer.setObjectName(path)
-                        node_item.setDefaultRenderer(default_renderer)
+        # keeps the representation to save the node until it is created,
+        # loading the settings modifies it
+        self._loading_topology_nodes[topology_node["id"]] = copy.deepcopy(topology_node)
 
-                if "hover_symbol" in topology_node:
-                    path = topology_node["hover_symbol"]
-                    hover_renderer = QtSvg.QSvgRenderer(path)
-                    if hover_renderer.isValid() and default_renderer.isValid():
-                        # default renderer must be valid too
-                        hover_renderer.setObjectName(path)
-                        node_item.setHoverRenderer(hover_renderer)
+    def _loadNode(self, topology_node):
+        """
+        Loads a node prepared when loading a topology.
 
-                view.scene().addItem(node_item)
-                self.addNode(node)
-                main_window.uiTopologySummaryTreeWidget.addNode(node)
+        :param topology_node: node representation
 
-        self._resources_type = topology.get("resources_type")
+        :returns: Node instance or None
+        """
 
-        # notes
-        if "notes" in topology["topology"]:
-            notes = topology["topology"]["notes"]
-            for topology_note in notes:
-                note_item = NoteItem()
-                note_item.load(topology_note)
-                view.scene().addItem(note_item)
-                self.addNote(note_item)
+        from .main_window import MainWindow
+        main_window = MainWindow.instance()
 
-        # rectangles
-        if "rectangles" in topology["topology"]:
-            rectangles = topology["topology"]["rectangles"]
-            for topology_rectangle in rectangles:
-                rectangle_item = RectangleItem()
-                rectangle_item.load(topology_rectangle)
-                view.scene().addItem(rectangle_item)
-                self.addRectangle(rectangle_item)
+        node_item = self._queued_node_items.pop(topology_node["id"], None)
+        if node_item is None:
+            # the node could not be prepared
+            return None
 
-        # ellipses
-        if "ellipses" in topology["topology"]:
-            ellipses = topology["topology"]["ellipses"]
-            for topology_ellipse in ellipses:
-                ellipse_item = EllipseItem()
-                ellipse_item.load(topology_ellipse)
-                view.scene().addItem(ellipse_item)
-                self.addEllipse(ellipse_item)
+        log.debug("loading node with ID {}".format(topology_node["id"]))
+        node = node_item.node()
 
-        # images
-        if "images" in topology["topology"]:
-            images = topology["topology"]["images"]
-            for topology_image in images:
+        # we want to know when the node has been created
+        node.created_signal.connect(self._nodeCreatedSlot)
 
-                updated_image_path = os.path.join(main_window.projectSettings()["project_files_dir"], topology_image["path"])
-                if os.path.isfile(updated_image_path):
-                    image_path = updated_image_path
-                else:
-                    image_path = topology_image["path"]
-                if not os.path.isfile(image_path):
-                    topology_file_errors.append("Path to image {} doesn't exist".format(image_path))
-                    continue
+        # load the settings
+        node.load(topology_node)
 
-                pixmap = QtGui.QPixmap(image_path)
-                if pixmap.isNull():
-                    topology_file_errors.append("Image format not supported for {}".format(image_path))
-                    continue
+        node_item.setEnabled(True)
+        self.addNode(node, node_item)
+        main_window.uiTopologySummaryTreeWidget.addNode(node)
+        return node
 
-                image_item = ImageItem(pixmap, image_path)
-                image_item.load(topology_image)
-                view.scene().addItem(image_item)
-                self.addImage(image_item)
+    def _nodesLoadedSlot(self):
+        """
+        Slot called when all the nodes of a loaded topology
+        have been created or the loading has been canceled.
+        """
 
-        # instances
-        if "instances" in topology["topology"]:
-            instances = topology["topology"]["instances"]
-            for instance in instances:
-                self.addInstance(instance["name"], instance["id"], instance["size_id"],
-                                 instance["image_id"],
-                                 instance["private_key"], instance["public_key"])
-
-        if topology_file_errors:
-            errors = "\n".join(topology_file_errors)
+        from .main_window import MainWindow
+        main_window = MainWindow.instance()
+
+        if self._node_loader.isCanceled():
+            self._load_errors.append("Loading canceled: {} nodes have not been created and will be missing "
+                                     "if the project is saved".format(self._node_loader.remaining()))
+        elif self._node_loader.failed():
+            self._load_errors.append("{} nodes could not be created".format(self._node_loader.failed()))
+
+        # remove the node items of the nodes that will not be loaded
+        for node_id, node_item in self._queued_node_items.items():
+            self._loading_topology_nodes.pop(node_id, None)
+            node_item.releaseSymbols()
+            if node_item.scene():
+                node_item.scene().removeItem(node_item)
+        self._queued_node_items.clear()
+
+        # trick: no matter what, reactivate the unsaved state support 3 seconds after the nodes are loaded
+        QtCore.QTimer.singleShot(3000, self._reactivateUnsavedState)
+
+        if self._load_errors:
+            errors = "\n".join(self._load_errors)
             MessageBox(main_window, "Topology", "Errors detected while importing the topology", errors)
 
     def _nodeCreatedSlot(self, node_id):
@@ -648,45 +967,34 @@ class Topology(object):
             log.warn("cannot find node or node not initialized")
             return
 
+        log.debug("node {} has initialized".format(node.name()))
+        self._initialized_nodes.add(node_id)
+        self._loading_topology_nodes.pop(node_id, None)
+        if self._link_scheduler:
+            self._link_scheduler.nodeReady(node)
+
+    def _createLink(self, topology_link, source_node, source_port, destination_node, destination_port):
+        """
+        Creates a link when loading a topology.
+
+        :param topology_link: link representation
+        :param source_node: source Node instance
+        :param source_port: source Port instance
+        :param destination_node: destination Node instance
+        :param destination_port: destination Port instance
+
+        :returns: Link instance
+        """
+
         from .main_window import MainWindow
         view = MainWindow.instance().uiGraphicsView
 
-        log.debug("node {} has initialized".format(node.name()))
-        self._initialized_nodes.append(node_id)
-
-        if node_id in self._node_to_links_mapping:
-            topology_link = self._node_to_links_mapping[node_id]
-            for link in topology_link:
-                source_node_id = link["source_node_id"]
-                destination_node_id = link["destination_node_id"]
-                if source_node_id in self._initialized_nodes and destination_node_id in self._initialized_nodes:
-
-                    source_node = self.getNode(source_node_id)
-                    destination_node = self.getNode(destination_node_id)
-
-                    log.debug("creating link from {} to {}".format(source_node.name(), destination_node.name()))
-
-                    source_port = None
-                    destination_port = None
-
-                    # find the source port
-                    for port in source_node.ports():
-                        if port.id() == link["source_port_id"]:
-                            source_port = port
-                            if "source_port_label" in link:
-                                source_port.setLabel(self._createPortLabel(source_node, link["source_port_label"]))
-                            break
-
-                    # find the destination port
-                    for port in destination_node.ports():
-                        if port.id() == link["destination_port_id"]:
-                            destination_port = port
-                            if "destination_port_label" in link:
-                                destination_port.setLabel(self._createPortLabel(destination_node, link["destination_port_label"]))
-                            break
-
-                    if source_port and destination_port:
-                        view.addLink(source_node, source_port, destination_node, destination_port)
+        log.debug("creating link from {} to {}".format(source_node.name(), destination_node.name()))
+        if "source_port_label" in topology_link:
+            source_port.setLabel(self._createPortLabel(source_node, topology_link["source_port_label"]))
+        if "destination_port_label" in topology_link:
+            destination_port.setLabel(self._createPortLabel(destination_node, topology_link["destination_port_label"]))
+        return view.addLink(source_node, source_port, destination_node, destination_port)
 
     def _createPortLabel(self, node, label_info):
         """
@@ -698,16 +1006,13 @@ class Topology(object):
         :return: NoteItem instance
         """
 
-        from .main_window import MainWindow
-        view = MainWindow.instance().uiGraphicsView
-
-        for item in view.scene().items():
-            if isinstance(item, NodeItem) and node.id() == item.node().id():
-                port_label = NoteItem(item)
-                port_label.load(label_info)
-                port_label.hide()
-                return port_label
-        return None
+        node_item = self.getNodeItem(node.id())
+        if node_item is None:
+            return None
+        port_label = NoteItem(node_item)
+        port_label.load(label_info)
+        port_label.hide()
+        return port_label
 
     def _reactivateUnsavedState(self):
         """
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Partitions the topology graph across servers to keep densely linked
+nodes on the same host, every link between two servers being an
+inter-host UDP tunnel.
+"""
+
+import collections
+import math
+
+import logging
+log = logging.getLogger(__name__)
+
+# maximum number of refinement passes
+MAX_REFINEMENT_PASSES = 10
+
+
+def cutLinks(assignment, edges):
+    """
+    Counts the links between nodes placed on different servers.
+
+    :param assignment: server for each node (dictionary)
+    :param edges: list of (node, node) tuples
+
+    :returns: integer
+    """
+
+    return sum(1 for source, destination in edges if assignment[source] != assignment[destination])
+
+
+class TopologyPartitioner(object):
+    """
+    Greedy graph partitioner with a Fiduccia-Mattheyses style refinement.
+
+    :param servers: servers to partition the nodes on (list of server IDs)
+    :param capacities: relative capacity for each server (dictionary), servers
+    without a capacity get the average capacity, equal by default
+    :param imbalance: load allowed above a server share (0.1 means 10%)
+    """
+
+    def __init__(self, servers, capacities=None, imbalance=0.1):
+
+        self._servers = list(servers)
+        capacities = capacities or {}
+        # servers without a known capacity are weighted like an average server
+        known = [capacities[server] for server in self._servers if capacities.get(server)]
+        default_capacity = sum(known) / len(known) if known else 1
+        self._capacities = {server: capacities.get(server) or default_capacity for server in self._servers}
+        self._imbalance = imbalance
+
+    def _maxLoads(self, total_weight, max_weight):
+
+        total_capacity = sum(self._capacities.values())
+        max_loads = {}
+        for server, capacity in self._capacities.items():
+            share = total_weight * capacity / total_capacity
+            max_loads[server] = max(math.ceil(share * (1 + self._imbalance)), max_weight)
+        return max_loads
+
+    def partition(self, nodes, edges, weights=None, initial=None, pinned=None):
+        """
+        Assigns the nodes to the servers.
+
+        :param nodes: list of nodes
+        :param edges: list of (node, node) tuples
+        :param weights: weight of each node (dictionary), 1 by default
+        :param initial: current assignment (dictionary), refined rather
+        than replaced when it cuts no more links than a fresh partition
+        :param pinned: nodes with a fixed server not part of the partition (dictionary)
+
+        :returns: server for each node (dictionary)
+        """
+
+        weights = weights or {}
+        pinned = pinned or {}
+        nodes = [node for node in nodes if node not in pinned]
+        if not nodes or not self._servers:
+            return {}
+
+        adjacency = collections.defaultdict(list)
+        for source, destination in edges:
+            if source != destination:
+                adjacency[source].append(destination)
+                adjacency[destination].append(source)
+
+        node_weights = {node: weights.get(node, 1) for node in nodes}
+        max_loads = self._maxLoads(sum(node_weights.values()), max(node_weights.values()))
+
+        candidates = [self._refine(self._grow(nodes, adjacency, node_weights, max_loads, pinned),
+                                   adjacency, node_weights, max_loads, pinned)]
+        if initial:
+            current = {node: initial[node] for node in nodes if initial.get(node) in self._capacities}
+            if len(current) == len(nodes):
+                candidates.insert(0, self._refine(current, adjacency, node_weights, max_loads, pinned))
+
+        all_edges = [(source, destination) for source, destination in edges
+                     if (source in node_weights or source in pinned) and (destination in node_weights or destination in pinned)]
+
+        def cost(assignment):
+            placed = dict(pinned)
+            placed.update(assignment)
+            return cutLinks(placed, all_edges)
+
+        # min() keeps the first candidate on ties: the refined current assignment moves fewer nodes
+        return min(candidates, key=cost)
+
+    def _grow(self, nodes, adjacency, weights, max_loads, pinned):
+        """
+        Greedy initial partition: nodes are visited in breadth-first order and
+        put on the server hosting most of their neighbours if it has room.
+        """
+
+        assignment = {}
+        loads = dict.fromkeys(self._servers, 0)
+        visited = set()
+        order = []
+        for start in sorted(nodes, key=lambda node: -len(adjacency[node])):
+            if start in visited:
+                continue
+            visited.add(start)
+            queue = collections.deque([start])
+            while queue:
+                node = queue.popleft()
+                order.append(node)
+                for neighbour in adjacency[node]:
+                    if neighbour in weights and neighbour not in visited:
+                        visited.add(neighbour)
+                        queue.append(neighbour)
+
+        for node in order:
+            affinity = collections.Counter()
+            for neighbour in adjacency[node]:
+                server = assignment.get(neighbour, pinned.get(neighbour))
+                if server is not None:
+                    affinity[server] += 1
+            fitting = [server for server in self._servers if loads[server] + weights[node] <= max_loads[server]]
+            if not fitting:
+                fitting = self._servers
+            server = max(fitting, key=lambda server: (affinity[server], -loads[server] / self._capacities[server]))
+            assignment[node] = server
+            loads[server] += weights[node]
+        return assignment
+
+    def _refine(self, assignment, adjacency, weights, max_loads, pinned):
+        """
+        Moves single nodes to the server where most of their neighbours are
+        as long as it reduces the cut and keeps the load balanced.
+        """
+
+        assignment = dict(assignment)
+        loads = dict.fromkeys(self._servers, 0)
+        for node, server in assignment.items():
+            loads[server] += weights[node]
+
+        for _ in range(MAX_REFINEMENT_PASSES):
+            moved = False
+            for node in assignment:
+                current = assignment[node]
+                affinity = collections.Counter()
+                for neighbour in adjacency[node]:
+                    server = assignment.get(neighbour, pinned.get(neighbour))
+                    if server is not None:
+                        affinity[server] += 1
+                best = current
+                best_gain = 0
+                for server in self._servers:
+                    if server == current or loads[server] + weights[node] > max_loads[server]:
+                        continue
+                    gain = affinity[server] - affinity[current]
+                    if gain > best_gain:
+                        best, best_gain = server, gain
+                if best != current:
+                    assignment[node] = best
+                    loads[current] -= weights[node]
+                    loads[best] += weights[node]
+                    moved = True
+            if not moved:
+                break
+        return assignment
+
+
+class RebalancePlan(object):
+    """
+    Result of a project rebalance.
+
+    :param assignment: new server for each node (dictionary of Node instances to WebSocketClient instances)
+    :param cut_before: links between servers before the rebalance
+    :param cut_after: links between servers after the rebalance
+    """
+
+    def __init__(self, assignment, cut_before, cut_after):
+
+        self.assignment = assignment
+        self.cut_before = cut_before
+        self.cut_after = cut_after
+
+    def moves(self):
+        """
+        Returns the nodes changing of server.
+
+        :returns: list of Node instances
+        """
+
+        return [node for node, server in self.assignment.items() if node.server() is not server]
+
+    def saved(self):
+        """
+        Returns the number of links no longer between servers.
+
+        :returns: integer
+        """
+
+        return self.cut_before - self.cut_after
+
+    def apply(self, topology):
+        """
+        Updates a topology representation (from Topology.dump()) with the new placement.
+
+        :param topology: topology representation (dictionary)
+        """
+
+        servers = {node.id(): server for node, server in self.assignment.items()}
+        topology_servers = topology["topology"].setdefault("servers", [])
+        server_ids = set(topology_server["id"] for topology_server in topology_servers)
+        for topology_node in topology["topology"].get("nodes", []):
+            server = servers.get(topology_node["id"])
+            if server is None:
+                continue
+            topology_node["server_id"] = server.id()
+            if server.id() not in server_ids:
+                server_ids.add(server.id())
+                topology_servers.append(server.dump())
+
+
+def rebalanceTopology(topology, servers, capacities=None):
+    """
+    Computes a new placement of the topology nodes on the remote servers.
+    Nodes on the local server and clouds (bound to host interfaces) stay where they are.
+
+    :param topology: Topology instance
+    :param servers: remote servers (list of WebSocketClient instances)
+    :param capacities: RAM capacity for each server ID (dictionary)
+
+    :returns: RebalancePlan instance
+    """
+
+    from .modules.builtin.cloud import Cloud
+
+    remote = {server.id(): server for server in servers}
+    nodes = []
+    pinned = {}
+    weights = {}
+    current = {}
+    for node in topology.nodes():
+        server_id = node.server().id()
+        current[node] = server_id
+        if server_id in remote and not isinstance(node, Cloud):
+            nodes.append(node)
+            weights[node] = node.settings().get("ram") or 1
+        else:
+            pinned[node] = server_id
+
+    edges = [(link.sourceNode(), link.destinationNode()) for link in topology.links()]
+    partitioner = TopologyPartitioner(list(remote), capacities)
+    assignment = partitioner.partition(nodes, edges, weights, current, pinned)
+
+    after = dict(current)
+    after.update(assignment)
+    plan = RebalancePlan({node: remote[server_id] for node, server_id in assignment.items()},
+                         cutLinks(current, edges),
+                         cutLinks(after, edges))
+    log.info("rebalance: {} links between servers before, {} after, {} nodes to move".format(plan.cut_before,
+                                                                                          plan.cut_after,
+                                                                                          len(plan.moves())))
+    return plan
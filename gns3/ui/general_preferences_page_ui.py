@@ -117,6 +117,9 @@ class Ui_GeneralPreferencesPageWidget(object):
         self.uiLinkManualModeCheckBox.setChecked(True)
         self.uiLinkManualModeCheckBox.setObjectName(_fromUtf8("uiLinkManualModeCheckBox"))
         self.gridLayout_2.addWidget(self.uiLinkManualModeCheckBox, 2, 0, 1, 1)
+        self.uiCompactProjectFilesCheckBox = QtGui.QCheckBox(self.uiGeneralMiscGroupBox)
+        self.uiCompactProjectFilesCheckBox.setObjectName(_fromUtf8("uiCompactProjectFilesCheckBox"))
+        self.gridLayout_2.addWidget(self.uiCompactProjectFilesCheckBox, 5, 0, 1, 2)
         self.gridLayout_8.addWidget(self.uiGeneralMiscGroupBox, 2, 0, 1, 2)
         spacerItem1 = QtGui.QSpacerItem(20, 40, QtGui.QSizePolicy.Minimum, QtGui.QSizePolicy.Expanding)
         self.gridLayout_8.addItem(spacerItem1, 4, 0, 1, 2)
@@ -231,6 +234,10 @@ class Ui_GeneralPreferencesPageWidget(object):
         self.uiDrawLinkStatusPointsCheckBox.setChecked(True)
         self.uiDrawLinkStatusPointsCheckBox.setObjectName(_fromUtf8("uiDrawLinkStatusPointsCheckBox"))
         self.verticalLayout_2.addWidget(self.uiDrawLinkStatusPointsCheckBox)
+        self.uiLevelOfDetailCheckBox = QtGui.QCheckBox(self.uiSceneTab)
+        self.uiLevelOfDetailCheckBox.setChecked(True)
+        self.uiLevelOfDetailCheckBox.setObjectName(_fromUtf8("uiLevelOfDetailCheckBox"))
+        self.verticalLayout_2.addWidget(self.uiLevelOfDetailCheckBox)
         self.uiLabelPreviewLabel = QtGui.QLabel(self.uiSceneTab)
         self.uiLabelPreviewLabel.setObjectName(_fromUtf8("uiLabelPreviewLabel"))
         self.verticalLayout_2.addWidget(self.uiLabelPreviewLabel)
@@ -288,6 +295,8 @@ class Ui_GeneralPreferencesPageWidget(object):
         self.uiSlowStartAllLabel.setText(_translate("GeneralPreferencesPageWidget", "Delay between each device start when starting all devices:", None))
         self.uiSlowStartAllSpinBox.setSuffix(_translate("GeneralPreferencesPageWidget", " seconds", None))
         self.uiLinkManualModeCheckBox.setText(_translate("GeneralPreferencesPageWidget", "Always use manual mode when adding links", None))
+        self.uiCompactProjectFilesCheckBox.setToolTip(_translate("GeneralPreferencesPageWidget", "Saves the project files without indentation, they are smaller and faster to save for large projects.", None))
+        self.uiCompactProjectFilesCheckBox.setText(_translate("GeneralPreferencesPageWidget", "Save compact project files (no indentation)", None))
         self.uiTabWidget.setTabText(self.uiTabWidget.indexOf(self.uiGeneralTab), _translate("GeneralPreferencesPageWidget", "General", None))
         self.uiTelnetConsoleSettingsGroupBox.setTitle(_translate("GeneralPreferencesPageWidget", "Console settings for Telnet connections", None))
         self.uiTelnetConsolePreconfiguredCommandLabel.setText(_translate("GeneralPreferencesPageWidget", "Preconfigured commands:", None))
@@ -312,6 +321,7 @@ class Ui_GeneralPreferencesPageWidget(object):
         self.uiSceneHeightSpinBox.setSuffix(_translate("GeneralPreferencesPageWidget", " pixels", None))
         self.uiRectangleSelectedItemCheckBox.setText(_translate("GeneralPreferencesPageWidget", "Draw a rectangle when an item is selected", None))
         self.uiDrawLinkStatusPointsCheckBox.setText(_translate("GeneralPreferencesPageWidget", "Draw link status points", None))
+        self.uiLevelOfDetailCheckBox.setText(_translate("GeneralPreferencesPageWidget", "Draw fewer details when zoomed out", None))
         self.uiLabelPreviewLabel.setText(_translate("GeneralPreferencesPageWidget", "Default label style:", None))
         self.uiDefaultLabelStylePlainTextEdit.setPlainText(_translate("GeneralPreferencesPageWidget", "AaBbYyZz", None))
         self.uiDefaultLabelFontPushButton.setText(_translate("GeneralPreferencesPageWidget", "&Select default font", None))
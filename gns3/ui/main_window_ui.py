@@ -406,6 +406,10 @@ class Ui_MainWindow(object):
         self.uiLabInstructionsAction.setObjectName(_fromUtf8("uiLabInstructionsAction"))
         self.uiFitInViewAction = QtGui.QAction(MainWindow)
         self.uiFitInViewAction.setObjectName(_fromUtf8("uiFitInViewAction"))
+        self.uiRebalanceProjectAction = QtGui.QAction(MainWindow)
+        self.uiRebalanceProjectAction.setObjectName(_fromUtf8("uiRebalanceProjectAction"))
+        self.uiAutoLayoutAction = QtGui.QAction(MainWindow)
+        self.uiAutoLayoutAction.setObjectName(_fromUtf8("uiAutoLayoutAction"))
         self.uiEditMenu.addAction(self.uiSelectAllAction)
         self.uiEditMenu.addAction(self.uiSelectNoneAction)
         self.uiEditMenu.addSeparator()
@@ -450,6 +454,8 @@ class Ui_MainWindow(object):
         self.uiAnnotateMenu.addAction(self.uiInsertImageAction)
         self.uiAnnotateMenu.addAction(self.uiDrawRectangleAction)
         self.uiAnnotateMenu.addAction(self.uiDrawEllipseAction)
+        self.uiToolsMenu.addAction(self.uiRebalanceProjectAction)
+        self.uiToolsMenu.addAction(self.uiAutoLayoutAction)
         self.uiMenuBar.addAction(self.uiFileMenu.menuAction())
         self.uiMenuBar.addAction(self.uiEditMenu.menuAction())
         self.uiMenuBar.addAction(self.uiViewMenu.menuAction())
@@ -645,6 +651,10 @@ class Ui_MainWindow(object):
         self.uiNewsAction.setToolTip(_translate("MainWindow", "Show GNS3 news", None))
         self.uiLabInstructionsAction.setText(_translate("MainWindow", "Lab instructions", None))
         self.uiFitInViewAction.setText(_translate("MainWindow", "Fit in view", None))
+        self.uiRebalanceProjectAction.setText(_translate("MainWindow", "Rebalance project", None))
+        self.uiRebalanceProjectAction.setStatusTip(_translate("MainWindow", "Place the nodes on the remote servers with the fewest links between servers", None))
+        self.uiAutoLayoutAction.setText(_translate("MainWindow", "Auto layout", None))
+        self.uiAutoLayoutAction.setStatusTip(_translate("MainWindow", "Arrange the nodes so that linked nodes are close to each other", None))
 
 from ..cloud_inspector_view import CloudInspectorView
 from ..console_view import ConsoleView
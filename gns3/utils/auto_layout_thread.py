@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Thread to compute the layout of a topology without blocking the GUI.
+"""
+
+from ..qt import QtCore
+from ..auto_layout import forceDirectedLayout
+from ..settings import DEFAULT_AUTO_LAYOUT_SPACING, DEFAULT_AUTO_LAYOUT_ITERATIONS
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class AutoLayoutThread(QtCore.QThread):
+    """
+    Thread to compute a force-directed layout.
+
+    :param positions: current (x, y) position for each node
+    :param edges: (index, index) tuples of linked nodes
+    :param spacing: ideal distance between linked nodes
+    :param iterations: number of iterations
+    """
+
+    # signals to update the progress dialog.
+    error = QtCore.pyqtSignal(str, bool)
+    completed = QtCore.pyqtSignal()
+    update = QtCore.pyqtSignal(int)
+
+    def __init__(self, positions, edges, spacing=DEFAULT_AUTO_LAYOUT_SPACING, iterations=DEFAULT_AUTO_LAYOUT_ITERATIONS):
+
+        QtCore.QThread.__init__(self)
+        self._positions = positions
+        self._edges = edges
+        self._spacing = spacing
+        self._iterations = iterations
+        self._layout = None
+        self._is_running = False
+
+    def positions(self):
+        """
+        Returns the computed positions.
+
+        :returns: array of (x, y) positions or None if the layout was stopped
+        """
+
+        return self._layout
+
+    def _progress(self, iteration):
+        """
+        Reports the iterations done.
+
+        :param iteration: number of iterations done
+
+        :returns: False if the layout must stop
+        """
+
+        self.update.emit(iteration * 100 // self._iterations)
+        return self._is_running
+
+    def run(self):
+        """
+        Thread starting point.
+        """
+
+        self._is_running = True
+        self._layout = None
+        try:
+            layout = forceDirectedLayout(self._positions, self._edges, self._spacing, self._iterations, progress=self._progress)
+        except (ImportError, ValueError, MemoryError) as e:
+            log.error("could not lay out the topology: {}".format(e))
+            self.error.emit("Could not lay out the topology: {}".format(e), True)
+            return
+
+        if not self._is_running:
+            return
+        self._layout = layout
+        self.completed.emit()
+
+    def stop(self):
+        """
+        Stops this thread as soon as possible.
+        """
+
+        self._is_running = False
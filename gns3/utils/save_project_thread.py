@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 GNS3 Technologies Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Thread to save a project without blocking the GUI.
+"""
+
+import os
+import sys
+import json
+import stat
+import tempfile
+from ..qt import QtCore
+
+import logging
+log = logging.getLogger(__name__)
+
+
+def _fileMode(path):
+    """
+    Returns the permissions to give to a file once written.
+
+    :param path: path to the file
+
+    :returns: permissions of the existing file, or the default
+    permissions of a new file
+    """
+
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        # the umask can only be read by changing it
+        umask = os.umask(0o022)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def writeFileAtomically(path, data):
+    """
+    Writes data to a file: the data is written to a temporary file in
+    the same directory which replaces the file once flushed to the disk.
+    The file is either fully written or left untouched, and keeps its
+    permissions.
+
+    :param path: path to the file
+    :param data: data to write (string)
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(prefix=".{}.".format(os.path.basename(path)), suffix=".tmp", dir=directory)
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # the temporary file is only readable by its owner
+        os.chmod(temporary_path, _fileMode(path))
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
+
+    if not sys.platform.startswith("win"):
+        # make the rename itself durable
+        try:
+            directory_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(directory_fd)
+            finally:
+                os.close(directory_fd)
+        except OSError as e:
+            log.debug("could not sync directory {}: {}".format(directory, e))
+
+
+class SaveProjectThread(QtCore.QThread):
+    """
+    Thread to serialize a topology and write it to a project file.
+
+    :param path: path to the project file
+    :param topology: topology representation, must not be modified while saving
+    :param compact: indicates if the file must be saved without indentation
+    """
+
+    # signals to let the GUI know about the outcome
+    error = QtCore.pyqtSignal(str, str)
+    completed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, topology, compact=False):
+
+        QtCore.QThread.__init__(self)
+        self._path = path
+        self._topology = topology
+        self._compact = compact
+        self._failed = False
+
+    def path(self):
+        """
+        Returns the path to the project file.
+
+        :returns: path
+        """
+
+        return self._path
+
+    def failed(self):
+        """
+        Returns either the project file could not be written.
+
+        :returns: boolean
+        """
+
+        return self._failed
+
+    def run(self):
+        """
+        Thread starting point.
+        """
+
+        log.info("saving project: {}".format(self._path))
+        self._failed = False
+        try:
+            if self._compact:
+                data = json.dumps(self._topology, sort_keys=True, separators=(",", ":"))
+            else:
+                data = json.dumps(self._topology, sort_keys=True, indent=4)
+            writeFileAtomically(self._path, data)
+        except (OSError, ValueError, TypeError) as e:
+            log.error("could not save project to {}: {}".format(self._path, e))
+            self._failed = True
+            self.error.emit(self._path, str(e))
+            return
+
+        self.completed.emit(self._path)
@@ -20,15 +20,38 @@ Non-blocking Websocket client with JSON-RPC support to connect to GNS3 servers.
 Based on the ws4py websocket client.
 """
 
+import collections
+import errno
 import json
+import os
+import random
 import socket
+import ssl
+import time
 import urllib.request
 
 from .version import __version__
+from .settings import DEFAULT_BATCH_WINDOW
+from .settings import DEFAULT_MAX_FRAMES_PER_READ
+from .settings import DEFAULT_MAX_BYTES_PER_READ
+from .settings import DEFAULT_CONNECTION_TIMEOUT
+from .settings import DEFAULT_RECONNECT_MIN_DELAY
+from .settings import DEFAULT_RECONNECT_MAX_DELAY
+from .settings import RPC_IDEMPOTENT_METHODS
+from .settings import DEFAULT_IN_FLIGHT_WINDOW
+from .settings import RPC_PRIORITY_INTERACTIVE, RPC_PRIORITY_NORMAL, RPC_PRIORITY_BULK
+from .rpc_stats import RPCStats
+from . import session_recorder
+from .pending_requests import PendingRequests, RPC_OVERLOADED_ERROR, RPC_CONNECTION_ERROR, RPC_CONNECTION_LOST_ERROR
 from . import jsonrpc
+from .notification_routes import notificationRoute
 from ws4py.client import WebSocketBaseClient
+from ws4py.exc import HandshakeError
 from ws4py import WS_VERSION
-from .qt import QtCore
+from .qt import QtCore, QtNetwork
+
+# error codes meaning a non-blocking connect is in progress
+CONNECT_IN_PROGRESS = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK))
 
 import logging
 log = logging.getLogger(__name__)
@@ -43,6 +66,13 @@ class WebSocketClient(WebSocketBaseClient):
 
     _instance_count = 1
 
+    # connection states
+    disconnected = 0
+    connecting = 1
+    handshaking = 2
+    authenticated = 3
+    ready = 4
+
     def __init__(self, url, protocols=None, extensions=None, 
                  heartbeat_freq=None, ssl_options=None, headers=None):
 
@@ -53,12 +83,39 @@ class WebSocketClient(WebSocketBaseClient):
                                      ssl_options,
                                      headers)
 
-        self.callbacks = {}
+        self._pending_requests = PendingRequests("{}:{}".format(self.host, self.port))
+        self._pending_requests.setExpiredCallback(self._requestsExpiredSlot)
+        self._rpc_stats = RPCStats("{}:{}".format(self.host, self.port))
+        self._recorder = None
         self._connected = False
         self._local = False
         self._version = ""
         self._fd_notifier = None
         self._heartbeat_timer = None
+        self._batch_mode = False
+        self._batch_window = DEFAULT_BATCH_WINDOW
+        self._batch_queue = []
+        self._batch_timer = None
+        self._read_buffer = b""
+        self._read_offset = 0
+        self._read_eof = False
+        self._read_scheduled = False
+        self._dispatched_frames = 0
+        self._state = WebSocketClient.disconnected
+        self._connection_queue = []
+        self._connection_timer = None
+        self._connection_notifiers = []
+        self._handshake_response = b""
+        self._auto_reconnect = False
+        self._reconnect_attempt = 0
+        self._reconnect_timer = None
+        self._replay_ids = []
+        self._in_flight_window = DEFAULT_IN_FLIGHT_WINDOW
+        self._window_queues = {priority: collections.deque() for priority in (RPC_PRIORITY_INTERACTIVE,
+                                                                              RPC_PRIORITY_NORMAL,
+                                                                              RPC_PRIORITY_BULK)}
+        self._window_queued = 0
+        self._window_nodes = {}
 
         # create an unique ID
         self._id = WebSocketClient._instance_count
@@ -116,6 +173,38 @@ class WebSocketClient(WebSocketBaseClient):
         log.info("connected to {}:{}".format(self.host, self.port))
         self._connected = True
 
+    def state(self):
+        """
+        Returns the connection state.
+
+        :returns: connection state (integer)
+        """
+
+        return self._state
+
+    def _setState(self, state):
+        """
+        Sets the connection state.
+
+        :param state: connection state (integer)
+        """
+
+        log.debug("connection state with {}:{} changed from {} to {}".format(self.host, self.port, self._state, state))
+        self._state = state
+
+    def isConnecting(self):
+        """
+        Returns either a non-blocking connection is in progress or scheduled.
+        Requests sent meanwhile are queued until the connection is ready.
+
+        :returns: boolean
+        """
+
+        if self._state == WebSocketClient.disconnected:
+            # waiting for an automatic reconnection attempt
+            return self._reconnect_timer is not None and self._reconnect_timer.isActive()
+        return self._state != WebSocketClient.ready
+
     def connect(self):
         """
         Connects to the server.
@@ -143,6 +232,371 @@ class WebSocketClient(WebSocketBaseClient):
         except Exception as e:
             log.error("could to connect {}: {}".format(self.url, e))
             raise OSError("Websocket exception {}: {}".format(type(e), e))
+        self._setState(WebSocketClient.ready)
+
+    def connectAsync(self):
+        """
+        Connects to the server without blocking the GUI.
+        The connection is driven by QSocketNotifiers:
+        connecting -> handshaking -> authenticated -> ready.
+        """
+
+        if self._state != WebSocketClient.disconnected:
+            return
+        self._startConnection()
+
+    def _startConnection(self):
+        """
+        Starts a non-blocking TCP connection to the server.
+        """
+
+        self._setState(WebSocketClient.connecting)
+        if self._connection_timer is None:
+            self._connection_timer = QtCore.QTimer()
+            self._connection_timer.setSingleShot(True)
+            self._connection_timer.timeout.connect(self._connectionTimeoutSlot)
+        if not self._connection_timer.isActive():
+            self._connection_timer.start(DEFAULT_CONNECTION_TIMEOUT * 1000)
+
+        self._handshake_response = b""
+        try:
+            if self.sock is None:
+                # the socket is closed when a connection fails or is lost
+                self._resetSocket()
+            self.sock.setblocking(False)
+            error = self.sock.connect_ex(self.bind_addr)
+        except OSError as e:
+            self._connectionFailed(str(e))
+            return
+
+        if error == 0:
+            self._tcpConnectedSlot()
+        elif error in CONNECT_IN_PROGRESS:
+            self._watchSocket(QtCore.QSocketNotifier.Write, self._tcpConnectedSlot)
+        else:
+            self._connectionFailed(os.strerror(error))
+
+    def _watchSocket(self, notifier_type, slot):
+        """
+        Calls a slot the next time the socket is ready for reading or writing.
+
+        :param notifier_type: QSocketNotifier type
+        :param slot: slot to call
+        """
+
+        self._disableConnectionNotifiers()
+        notifier = QtCore.QSocketNotifier(self.sock.fileno(), notifier_type)
+        notifier.activated.connect(slot)
+        self._connection_notifiers.append(notifier)
+        if notifier_type == QtCore.QSocketNotifier.Write:
+            # failed connections are reported as exceptions on Windows
+            notifier = QtCore.QSocketNotifier(self.sock.fileno(), QtCore.QSocketNotifier.Exception)
+            notifier.activated.connect(slot)
+            self._connection_notifiers.append(notifier)
+
+    def _disableConnectionNotifiers(self):
+        """
+        Disables the QSocketNotifiers used while connecting.
+        """
+
+        for notifier in self._connection_notifiers:
+            notifier.setEnabled(False)
+        self._connection_notifiers.clear()
+
+    def _tcpConnectedSlot(self, fd=None):
+        """
+        Slot called when the TCP connection has been established or has failed.
+        """
+
+        self._disableConnectionNotifiers()
+        if self.sock is None:
+            return
+        error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            self._connectionFailed(os.strerror(error))
+            return
+
+        if self.scheme == "wss":
+            try:
+                self.sock = ssl.wrap_socket(self.sock, do_handshake_on_connect=False, **self.ssl_options)
+            except (OSError, ValueError) as e:
+                self._connectionFailed("TLS error: {}".format(e))
+                return
+            self._tlsHandshakeSlot()
+        else:
+            self._sendHandshake()
+
+    def _tlsHandshakeSlot(self, fd=None):
+        """
+        Slot called to continue the TLS handshake.
+        """
+
+        self._disableConnectionNotifiers()
+        if self.sock is None:
+            return
+        try:
+            self.sock.do_handshake()
+        except ssl.SSLWantReadError:
+            self._watchSocket(QtCore.QSocketNotifier.Read, self._tlsHandshakeSlot)
+            return
+        except ssl.SSLWantWriteError:
+            self._watchSocket(QtCore.QSocketNotifier.Write, self._tlsHandshakeSlot)
+            return
+        except OSError as e:
+            self._connectionFailed("TLS handshake error: {}".format(e))
+            return
+        self._sendHandshake()
+
+    def _sendHandshake(self):
+        """
+        Sends the websocket upgrade request.
+        """
+
+        self._setState(WebSocketClient.handshaking)
+        try:
+            # the request is small, let it go in one shot
+            self.sock.setblocking(True)
+            self._write(self.handshake_request)
+            self.sock.setblocking(False)
+        except (OSError, RuntimeError) as e:
+            self._connectionFailed(str(e))
+            return
+        self._watchSocket(QtCore.QSocketNotifier.Read, self._handshakeResponseSlot)
+
+    def _handshakeResponseSlot(self, fd=None):
+        """
+        Slot called when the websocket upgrade response can be read.
+        """
+
+        if self.sock is None:
+            return
+        while True:
+            try:
+                data = self.sock.recv(4096)
+            except (BlockingIOError, ssl.SSLWantReadError):
+                return
+            except OSError as e:
+                self._connectionFailed(str(e))
+                return
+            if not data:
+                self._connectionFailed("connection closed during the websocket handshake")
+                return
+            self._handshake_response += data
+            if b"\r\n\r\n" in self._handshake_response:
+                break
+
+        self._disableConnectionNotifiers()
+        headers, _, body = self._handshake_response.partition(b"\r\n\r\n")
+        self._handshake_response = b""
+        response_line, _, headers = headers.partition(b"\r\n")
+        try:
+            self.process_response_line(response_line)
+            self.protocols, self.extensions = self.process_handshake_header(headers)
+        except (HandshakeError, ValueError) as e:
+            self._connectionFailed("websocket handshake error: {}".format(e))
+            return
+
+        self._connection_timer.stop()
+        self.sock.setblocking(True)
+        self.handshake_ok()
+        self._setState(WebSocketClient.authenticated)
+
+        queue = self._connection_queue
+        self._connection_queue = []
+        if self._reconnect_attempt:
+            # settings and replayed requests must go before the queued requests
+            self._restoreSession()
+            queue = self._connection_queue + queue
+            self._connection_queue = []
+
+        # send everything queued while connecting
+        for request in queue:
+            self._sendRequest(request)
+        self._setState(WebSocketClient.ready)
+        self._releaseWindow()
+
+        if body:
+            # frames sent by the server right after the handshake
+            self._read_buffer = body
+            self._read_offset = 0
+            self._processReadBuffer()
+
+    def _connectionTimeoutSlot(self):
+        """
+        Slot called when the connection takes too long.
+        """
+
+        if self._state not in (WebSocketClient.disconnected, WebSocketClient.ready):
+            self._connectionFailed("timeout after {} seconds".format(DEFAULT_CONNECTION_TIMEOUT))
+
+    def _connectionFailed(self, reason):
+        """
+        Aborts a non-blocking connection and fails the queued requests.
+
+        :param reason: error message
+        """
+
+        log.error("could not connect to {}:{}: {}".format(self.host, self.port, reason))
+        if self._connection_timer is not None:
+            self._connection_timer.stop()
+        self._disableConnectionNotifiers()
+        WebSocketBaseClient.close_connection(self)
+        self._setState(WebSocketClient.disconnected)
+        self._failQueuedRequests("Could not connect to server {}:{}: {}".format(self.host, self.port, reason))
+        if self._reconnect_attempt:
+            self._scheduleReconnect()
+
+    def setAutoReconnect(self, enabled):
+        """
+        Enables or disables the automatic reconnection when the connection
+        with the server is lost.
+
+        :param enabled: boolean
+        """
+
+        self._auto_reconnect = enabled
+        if not enabled:
+            self._cancelReconnect()
+
+    def autoReconnect(self):
+        """
+        Returns either the automatic reconnection is enabled.
+
+        :returns: boolean
+        """
+
+        return self._auto_reconnect
+
+    def _connectionLost(self):
+        """
+        Called when the connection with the server has been lost unexpectedly.
+        Requests that cannot be safely sent again fail, the others are
+        replayed once the connection has been re-established.
+        """
+
+        log.warning("lost connection with server {}:{}".format(self.host, self.port))
+        self.close_connection()
+        if not self._auto_reconnect:
+            return
+
+        message = "Connection lost with server {}:{}".format(self.host, self.port)
+        for request in self._pending_requests.requests():
+            if request.method.rsplit(".", 1)[-1] in RPC_IDEMPOTENT_METHODS:
+                self._replay_ids.append(request.id)
+            else:
+                self._pending_requests.pop(request.id)
+                request.callback({"code": RPC_CONNECTION_LOST_ERROR, "message": message}, True)
+        self._scheduleReconnect()
+
+    def _scheduleReconnect(self):
+        """
+        Schedules a reconnection attempt using a jittered exponential backoff.
+        """
+
+        delay = min(DEFAULT_RECONNECT_MAX_DELAY, DEFAULT_RECONNECT_MIN_DELAY * 2 ** self._reconnect_attempt)
+        delay *= random.uniform(0.5, 1.0)
+        self._reconnect_attempt += 1
+        log.info("reconnecting to {}:{} in {:.1f} seconds (attempt {})".format(self.host, self.port, delay, self._reconnect_attempt))
+        if self._reconnect_timer is None:
+            self._reconnect_timer = QtCore.QTimer()
+            self._reconnect_timer.setSingleShot(True)
+            self._reconnect_timer.timeout.connect(self._reconnectSlot)
+        self._reconnect_timer.start(int(delay * 1000))
+
+    def _cancelReconnect(self):
+        """
+        Cancels the automatic reconnection.
+        """
+
+        if self._reconnect_timer is not None:
+            self._reconnect_timer.stop()
+        self._reconnect_attempt = 0
+        self._replay_ids.clear()
+
+    def _reconnectSlot(self):
+        """
+        Slot called to attempt a reconnection.
+        """
+
+        try:
+            self.reconnectAsync()
+        except OSError as e:
+            log.error("could not reconnect to {}:{}: {}".format(self.host, self.port, e))
+            self._scheduleReconnect()
+
+    def _restoreSession(self):
+        """
+        Restores the session after a reconnection: module settings are sent
+        again and the idempotent in-flight requests are replayed.
+        """
+
+        log.info("connection with {}:{} restored after {} attempt(s)".format(self.host, self.port, self._reconnect_attempt))
+        self._reconnect_attempt = 0
+
+        from .modules import MODULES
+        for module in MODULES:
+            instance = module.instance()
+            if self in instance.servers():
+                instance._sendSettings(self)
+
+        for request_id in self._replay_ids:
+            pending_request = self._pending_requests.get(request_id)
+            if pending_request:
+                log.info("replaying {} to {}:{}".format(pending_request.method, self.host, self.port))
+                request = jsonrpc.JSONRPCRequest(pending_request.method, pending_request.params, request_id)
+                self._connection_queue.append(request)
+        self._replay_ids.clear()
+
+        if self._heartbeat_timer is not None and not self._heartbeat_timer.isActive():
+            self._heartbeat_timer.start()
+
+    def _failQueuedRequests(self, message):
+        """
+        Calls the callbacks of the requests queued while connecting with an error.
+
+        :param message: error message
+        """
+
+        queue = self._connection_queue
+        self._connection_queue = []
+        self._failRequests(queue, message)
+
+    def _failBatchQueue(self, message):
+        """
+        Calls the callbacks of the requests waiting to be sent
+        with the next batch with an error.
+
+        :param message: error message
+        """
+
+        self._failRequests(self._clearBatchQueue(), message)
+
+    def _clearBatchQueue(self):
+        """
+        Removes the requests waiting to be sent with the next batch.
+
+        :returns: list of JSONRPCRequest or JSONRPCNotification instances
+        """
+
+        queue = self._batch_queue
+        self._batch_queue = []
+        if self._batch_timer is not None:
+            self._batch_timer.stop()
+        return queue
+
+    def _failRequests(self, requests, message):
+        """
+        Calls the callbacks of requests that could not be sent with an error.
+
+        :param requests: list of JSONRPCRequest or JSONRPCNotification instances
+        :param message: error message
+        """
+
+        for request in requests:
+            if isinstance(request, jsonrpc.JSONRPCRequest):
+                pending_request = self._pending_requests.pop(request.id)
+                if pending_request:
+                    pending_request.callback({"code": RPC_CONNECTION_ERROR, "message": message}, True)
 
     def check_server_version(self):
         """
@@ -151,6 +605,15 @@ class WebSocketClient(WebSocketBaseClient):
         This is an http (or https) request.
         """
         content = self.opener.open(self.version_url).read()
+        self._checkServerVersion(content)
+
+    def _checkServerVersion(self, content):
+        """
+        Checks the version returned by the GNS3 server.
+
+        :param content: /version reply content (bytes)
+        """
+
         try:
             json_data = json.loads(content.decode("utf-8"))
             self._version = json_data.get("version")
@@ -163,11 +626,10 @@ class WebSocketClient(WebSocketBaseClient):
                 raise OSError("Could not determine the server version")
             else:
                 raise OSError("GUI version {} differs with the server version: {}".format(__version__, self._version))
-            self.close_connection()
 
-    def reconnect(self):
+    def _resetSocket(self):
         """
-        Reconnects to the server.
+        Creates a new socket to connect again to the server.
         """
 
         WebSocketBaseClient.__init__(self,
@@ -183,8 +645,25 @@ class WebSocketClient(WebSocketBaseClient):
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
                     sock.bind((self.host, 0))
 
+    def reconnect(self):
+        """
+        Reconnects to the server.
+        """
+
+        self._resetSocket()
         self.connect()
 
+    def reconnectAsync(self):
+        """
+        Reconnects to the server without blocking the GUI.
+        Does nothing if a connection is already in progress.
+        """
+
+        if self._state != WebSocketClient.disconnected:
+            return
+        self._resetSocket()
+        self.connectAsync()
+
     def connected(self):
         """
         Returns if the client is connected.
@@ -226,38 +705,64 @@ class WebSocketClient(WebSocketBaseClient):
         :param message: message instance
         """
 
+        self._dispatched_frames += 1
         # TODO: WSAEWOULDBLOCK on Windows
         if not message.is_text:
             log.warning("received data is not text")
             return
 
         try:
-            reply = json.loads(message.data.decode("utf-8"))
-        except:
+            reply = jsonrpc.codec().decode(message.data)
+        except ValueError:
             log.warning("received data is not valid JSON")
             return
 
+        if self._recorder is not None:
+            self._recorder.record(session_recorder.RECEIVED, message.data)
+
+        if isinstance(reply, list):
+            # This is a JSON-RPC batch reply
+            size = len(message.data) // max(1, len(reply))
+            for batch_reply in reply:
+                if isinstance(batch_reply, dict):
+                    self._handleReply(batch_reply, size)
+                else:
+                    log.warning("invalid JSON-RPC batch reply element: {}".format(batch_reply))
+        else:
+            self._handleReply(reply, len(message.data))
+        if self._window_queued:
+            self._releaseWindow()
+
+    def _handleReply(self, reply, size=0):
+        """
+        Dispatches a single JSON-RPC reply or notification.
+
+        :param reply: JSON-RPC message (dictionary)
+        :param size: size of the message in bytes (for statistics)
+        """
+
         if "result" in reply:
         # This is a JSON-RPC result
             request_id = reply.get("id")
             result = reply.get("result")
-            if request_id in self.callbacks:
-                self.callbacks[request_id](result)
-                if request_id in self.callbacks:  #FIXME: strange bug with cloud device setup callback, the request is received twice, bug in Qt?
-                    del self.callbacks[request_id]
-                else:
-                    log.warning("JSON-RPC reply received twice: {}".format(reply))
+            # remove the request before calling the callback so a reply
+            # received twice or after a timeout cannot be dispatched again
+            request = self._pending_requests.pop(request_id)
+            if request:
+                self._rpc_stats.recordReply(request.method, time.monotonic() - request.sent_at, size)
+                request.callback(result)
             else:
-                log.warning("unknown JSON-RPC request ID received {}".format(request_id))
+                log.warning("unknown or expired JSON-RPC request ID received {}".format(request_id))
 
         elif "error" in reply:
             # This is a JSON-RPC error
             error_message = reply["error"].get("message")
             error_code = reply["error"].get("code")
             request_id = reply.get("id")
-            if request_id in self.callbacks:
-                self.callbacks[request_id](reply["error"], True)
-                del self.callbacks[request_id]
+            request = self._pending_requests.pop(request_id)
+            if request:
+                self._rpc_stats.recordReply(request.method, time.monotonic() - request.sent_at, size, error=True)
+                request.callback(reply["error"], True)
             else:
                 log.warning("received JSON-RPC error {}: {} for request ID {}".format(error_code,
                                                                                       error_message,
@@ -266,14 +771,14 @@ class WebSocketClient(WebSocketBaseClient):
             # This is a JSON-RPC notification
             method = reply.get("method")
             params = reply.get("params")
+            self._rpc_stats.recordNotification(method, size)
 
             # let the responsible module know about the notification
-            from .modules import MODULES
-            for module in MODULES:
-                if method.startswith(module.__name__.lower()):
-                    instance = module.instance()
-                    instance.notification(method, params)
-                    break
+            instance = notificationRoute(method)
+            if instance:
+                instance.notification(method, params)
+            else:
+                log.warning("no module to handle notification {}".format(method))
 
     def send_message(self, destination, params, callback):
         """
@@ -284,13 +789,201 @@ class WebSocketClient(WebSocketBaseClient):
         :param callback: callback method to call when the server replies.
         """
 
-        if not self.connected():
-            log.warning("connection with server {}:{} is down".format(self.host, self.port))
+        if not self.connected() and not self.isConnecting():
+            log.warning("connection with server {}:{} is down, {} rejected".format(self.host, self.port, destination))
+            callback({"code": RPC_CONNECTION_ERROR,
+                      "message": "Connection with server {}:{} is down".format(self.host, self.port)}, True)
+            return
+
+        if self.inFlightCount() + self._window_queued >= self._pending_requests.maxPending():
+            log.warning("too many pending requests for server {}:{}, {} rejected".format(self.host, self.port, destination))
+            callback({"code": RPC_OVERLOADED_ERROR,
+                      "message": "Too many pending requests for server {}:{}".format(self.host, self.port)}, True)
             return
 
         request = jsonrpc.JSONRPCRequest(destination, params)
-        self.callbacks[request.id] = callback
-        self.send(str(request))
+        if self._in_flight_window and (self._window_queued or self.inFlightCount() >= self._in_flight_window):
+            # the window is full, the request is released when a reply comes back
+            priority = self._pending_requests.methodPriority(destination)
+            node = self._windowNode(destination, params)
+            if node is not None:
+                # a request never overtakes a queued request for the same node
+                node_priority, count = self._window_nodes.get(node, (priority, 0))
+                priority = max(priority, node_priority)
+                self._window_nodes[node] = (priority, count + 1)
+            self._window_queues[priority].append((request, destination, params, callback))
+            self._window_queued += 1
+            self._releaseWindow()
+            return
+        self._dispatchRequest(request, destination, params, callback)
+
+    def _dispatchRequest(self, request, destination, params, callback):
+        """
+        Registers a request as pending and sends it to the server
+        (or queues it until the connection is established).
+
+        :param request: JSONRPCRequest instance
+        :param destination: server destination method
+        :param params: params to send (dictionary)
+        :param callback: callback method to call when the server replies.
+        """
+
+        self._pending_requests.add(request.id, destination, callback, params)
+        if self.isConnecting():
+            self._connection_queue.append(request)
+        else:
+            self._sendRequest(request)
+
+    def _requestsExpiredSlot(self, requests):
+        """
+        Slot called when pending requests have not been replied in time.
+
+        :param requests: list of PendingRequest instances
+        """
+
+        for request in requests:
+            self._rpc_stats.recordTimeout(request.method)
+        self._releaseWindow()
+
+    def rpcStats(self):
+        """
+        Returns the JSON-RPC statistics for this server.
+
+        :returns: RPCStats instance
+        """
+
+        return self._rpc_stats
+
+    def startRecording(self, path):
+        """
+        Starts recording all the JSON-RPC messages exchanged with the server
+        to a session file that can be replayed by SessionReplayer.
+
+        :param path: path of the session file
+        """
+
+        self.stopRecording()
+        self._recorder = session_recorder.SessionRecorder(path)
+        log.info("recording JSON-RPC session with {}:{} to {}".format(self.host, self.port, path))
+
+    def stopRecording(self):
+        """
+        Stops recording the JSON-RPC messages.
+        """
+
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    def isRecording(self):
+        """
+        Returns either the JSON-RPC messages are being recorded.
+
+        :returns: boolean
+        """
+
+        return self._recorder is not None
+
+    def _releaseWindow(self):
+        """
+        Sends the queued requests, most urgent first, as long as
+        the in-flight window is not full.
+        """
+
+        if not self._window_queued or not (self.connected() or self.isConnecting()):
+            return
+        for priority in sorted(self._window_queues):
+            queue = self._window_queues[priority]
+            while queue:
+                if self._in_flight_window and self.inFlightCount() >= self._in_flight_window:
+                    return
+                self._window_queued -= 1
+                request, destination, params, callback = queue.popleft()
+                node = self._windowNode(destination, params)
+                if node in self._window_nodes:
+                    node_priority, count = self._window_nodes.pop(node)
+                    if count > 1:
+                        self._window_nodes[node] = (node_priority, count - 1)
+                self._dispatchRequest(request, destination, params, callback)
+
+    @staticmethod
+    def _windowNode(destination, params):
+        """
+        Returns the node targeted by a request, the requests for the
+        same node are released in order.
+
+        :param destination: server destination method
+        :param params: params to send (dictionary)
+
+        :returns: (module, node ID) tuple or None
+        """
+
+        if isinstance(params, dict) and "id" in params:
+            return destination.rsplit(".", 1)[0], params["id"]
+        return None
+
+    def _failWindowQueue(self, message):
+        """
+        Calls the callbacks of the requests waiting for room
+        in the in-flight window with an error.
+
+        :param message: error message
+        """
+
+        for queue in self._window_queues.values():
+            while queue:
+                callback = queue.popleft()[3]
+                callback({"code": RPC_CONNECTION_ERROR, "message": message}, True)
+        self._window_queued = 0
+        self._window_nodes.clear()
+
+    def setInFlightWindow(self, window):
+        """
+        Sets the maximum number of requests sent to the server and
+        waiting for a reply. Other requests are queued by priority class.
+
+        :param window: number of requests (0 means no limit)
+        """
+
+        self._in_flight_window = window
+        self._releaseWindow()
+
+    def inFlightWindow(self):
+        """
+        Returns the maximum number of requests sent to the server and
+        waiting for a reply.
+
+        :returns: integer (0 means no limit)
+        """
+
+        return self._in_flight_window
+
+    def queuedCount(self):
+        """
+        Returns the number of requests waiting for room in the in-flight window.
+
+        :returns: integer
+        """
+
+        return self._window_queued
+
+    def inFlightCount(self):
+        """
+        Returns the number of requests waiting for a reply from the server.
+
+        :returns: integer
+        """
+
+        return self._pending_requests.inFlightCount()
+
+    def pendingRequests(self):
+        """
+        Returns the pending requests table.
+
+        :returns: PendingRequests instance
+        """
+
+        return self._pending_requests
 
     def send_notification(self, destination, params=None):
         """
@@ -300,12 +993,99 @@ class WebSocketClient(WebSocketBaseClient):
         :param params: params to send (dictionary)
         """
 
-        if not self.connected():
+        if not self.connected() and not self.isConnecting():
             log.warning("connection with server {}:{} is down".format(self.host, self.port))
             return
 
         request = jsonrpc.JSONRPCNotification(destination, params)
-        self.send(str(request))
+        if self.isConnecting():
+            self._connection_queue.append(request)
+        else:
+            self._sendRequest(request)
+
+    def _sendRequest(self, request):
+        """
+        Sends a JSON-RPC request or notification, or queues it
+        to be sent with the next batch if batch mode is enabled.
+
+        :param request: JSONRPCRequest or JSONRPCNotification instance
+        """
+
+        if not self._batch_mode:
+            data = request.encode()
+            self._rpc_stats.recordRequest(request.method, len(data))
+            if self._recorder is not None:
+                self._recorder.record(session_recorder.SENT, data)
+            self.send(data)
+            return
+
+        self._batch_queue.append(request)
+        if not self._batch_timer.isActive():
+            self._batch_timer.start(self._batch_window)
+
+    def setBatchMode(self, enabled, window=DEFAULT_BATCH_WINDOW):
+        """
+        Enables or disables the JSON-RPC batch mode. When enabled, all requests
+        issued within the same event loop turn (or the batch window) are
+        grouped in a JSON-RPC batch and sent in a single websocket frame.
+
+        :param enabled: boolean
+        :param window: time to wait before sending a batch in milliseconds
+        (0 means the next event loop turn)
+        """
+
+        if not enabled and self._batch_mode:
+            self.flushBatch()
+        self._batch_mode = enabled
+        self._batch_window = window
+        if enabled and self._batch_timer is None:
+            self._batch_timer = QtCore.QTimer()
+            self._batch_timer.setSingleShot(True)
+            self._batch_timer.timeout.connect(self.flushBatch)
+
+    def batchMode(self):
+        """
+        Returns either the JSON-RPC batch mode is enabled or not.
+
+        :returns: boolean
+        """
+
+        return self._batch_mode
+
+    def flushBatch(self):
+        """
+        Sends all the queued requests as a single JSON-RPC batch.
+        """
+
+        if self._batch_timer is not None:
+            self._batch_timer.stop()
+        if not self._batch_queue:
+            return
+
+        if not self.connected():
+            log.warning("connection with server {}:{} is down, {} batched requests dropped".format(self.host,
+                                                                                               self.port,
+                                                                                               len(self._batch_queue)))
+            self._failBatchQueue("Connection with server {}:{} is down".format(self.host, self.port))
+            return
+
+        requests = self._batch_queue
+        self._batch_queue = []
+
+        encoded_requests = []
+        for request in requests:
+            data = request.encode()
+            self._rpc_stats.recordRequest(request.method, len(data))
+            encoded_requests.append(data)
+
+        if len(encoded_requests) == 1:
+            data = encoded_requests[0]
+        else:
+            log.debug("sending a batch of {} requests to {}:{}".format(len(requests), self.host, self.port))
+            data = b"[" + b",".join(encoded_requests) + b"]"
+        if self._recorder is not None:
+            self._recorder.record(session_recorder.SENT, data)
+        self.send(data)
 
     def close_connection(self):
         """
@@ -315,6 +1095,24 @@ class WebSocketClient(WebSocketBaseClient):
 
         self._connected = False
         self._version = ""
+        if self._auto_reconnect:
+            # the batched requests are still pending, they are replayed
+            # or failed with the others when the connection is lost
+            self._clearBatchQueue()
+        else:
+            self._failBatchQueue("Connection to server {}:{} closed".format(self.host, self.port))
+        self._read_buffer = b""
+        self._read_offset = 0
+        self._read_eof = False
+        if self.isConnecting():
+            if self._connection_timer is not None:
+                self._connection_timer.stop()
+            self._disableConnectionNotifiers()
+            self._failQueuedRequests("Connection to server {}:{} closed".format(self.host, self.port))
+        self._setState(WebSocketClient.disconnected)
+        self._cancelReconnect()
+        if not self._auto_reconnect:
+            self._failWindowQueue("Connection to server {}:{} closed".format(self.host, self.port))
         WebSocketBaseClient.close_connection(self)
         if self._fd_notifier:
             self._fd_notifier.setEnabled(False)
@@ -324,12 +1122,83 @@ class WebSocketClient(WebSocketBaseClient):
     def data_received(self, fd):
         """
         Callback called when data is received from the server.
+        Everything available on the socket is read in one pass
+        and all the complete frames are dispatched.
         """
 
-        # read the data, if successful received_message() is called by once()
-        if self.once() == False:
-            log.warning("lost connection with server {}:{}".format(self.host, self.port))
-            self.close_connection()
+        if self.sock is None or self.terminated:
+            return
+
+        if not self._readAvailable():
+            self._connectionLost()
+            return
+
+        self._processReadBuffer()
+
+    def _readAvailable(self):
+        """
+        Reads all the data available on the socket without blocking.
+
+        :returns: False if the connection has been lost
+        """
+
+        buffer_size = len(self._read_buffer) - self._read_offset
+        chunks = [self._read_buffer[self._read_offset:]] if buffer_size else []
+        self.sock.setblocking(False)
+        try:
+            while buffer_size < DEFAULT_MAX_BYTES_PER_READ:
+                try:
+                    data = self.sock.recv(65536)
+                except (BlockingIOError, ssl.SSLWantReadError):
+                    break
+                except OSError as e:
+                    log.debug("failed to receive data from {}:{}: {}".format(self.host, self.port, e))
+                    return False
+                if not data:
+                    self._read_eof = True
+                    break
+                chunks.append(data)
+                buffer_size += len(data)
+        finally:
+            if self.sock is not None:
+                self.sock.setblocking(True)
+
+        self._read_buffer = b"".join(chunks)
+        self._read_offset = 0
+        return buffer_size > 0 or not self._read_eof
+
+    def _processReadBuffer(self):
+        """
+        Feeds the websocket parser with the buffered data and dispatches
+        the complete frames, up to DEFAULT_MAX_FRAMES_PER_READ frames.
+        Processing is resumed on the next event loop turn if data remains.
+        """
+
+        self._read_scheduled = False
+        if self.sock is None or self.terminated:
+            return
+
+        self._dispatched_frames = 0
+        buffer = self._read_buffer
+        buffer_size = len(buffer)
+        while self._read_offset < buffer_size and self._dispatched_frames < DEFAULT_MAX_FRAMES_PER_READ:
+            # the parser tells how many bytes it needs for the next step
+            size = self.reading_buffer_size
+            chunk = buffer[self._read_offset:self._read_offset + size]
+            self._read_offset += len(chunk)
+            if not self.process(chunk):
+                self._connectionLost()
+                return
+
+        if self._read_offset >= buffer_size:
+            self._read_buffer = b""
+            self._read_offset = 0
+            if self._read_eof:
+                self._connectionLost()
+        elif not self._read_scheduled:
+            # let the GUI breathe before dispatching the remaining frames
+            self._read_scheduled = True
+            QtCore.QTimer.singleShot(0, self._processReadBuffer)
 
     def dump(self):
         """
@@ -353,18 +1222,43 @@ class WebSocketClient(WebSocketBaseClient):
 
 
 class SecureWebSocketClient(WebSocketClient):
-    def connect(self, ca_file=''):
+    """
+    Websocket client using TLS and a login cookie.
+
+    :param url: websocket URL to connect to the server
+    :param ca_file: path to the server certificate authority file
+    """
+
+    def __init__(self, url, ca_file="", **kwargs):
+
+        WebSocketClient.__init__(self, url, **kwargs)
+        self.ca_file = ca_file
+        self._auth_cookie = None
+        self._network_manager = None
+        self._http_reply = None
+
+    def _setupSecureConnection(self, ca_file):
+        """
+        Sets the URLs and credentials used to connect to the server.
+
+        :param ca_file: path to the server certificate authority file
+        """
+
         self.use_auth = True
         self.use_ssl = True
 
-        self.ca_file = ca_file
+        if ca_file:
+            self.ca_file = ca_file
         self.login_url = "https://{host}:{port}/login".format(host=self.host, port=self.port)
         self.version_url = "https://{host}:{port}/version".format(host=self.host, port=self.port)
         self.websocket_url = "wss://{host}:{port}".format(host=self.host, port=self.port)
         self.auth_user = 'test123'
         self.auth_password = 'test456'
-
         self.ssl_options = {'ca_certs': self.ca_file}
+
+    def connect(self, ca_file=''):
+
+        self._setupSecureConnection(ca_file)
         self.https_handler = urllib.request.HTTPSHandler(check_hostname=False)
         self.cookie_processor = urllib.request.HTTPCookieProcessor()
         self.opener = urllib.request.build_opener(self.https_handler, self.cookie_processor)
@@ -375,10 +1269,133 @@ class SecureWebSocketClient(WebSocketClient):
         urllib.request.install_opener(self.opener)
         f = urllib.request.urlopen(self.login_url, data, cafile=self.ca_file)
         log.debug(self.cookie_processor.cookiejar)
+        user = self.cookie_processor.cookiejar._cookies[self.host]['/']['user']
+        self._auth_cookie = (user.name, user.value)
 
         self._connect()
         log.debug(self.sock)
 
+    def connectAsync(self, ca_file=''):
+        """
+        Connects to the server without blocking the GUI: the server version
+        is checked and the login cookie retrieved using asynchronous HTTPS
+        requests before opening the websocket connection.
+        """
+
+        if self._state != WebSocketClient.disconnected:
+            return
+
+        self._setupSecureConnection(ca_file)
+        self._setState(WebSocketClient.connecting)
+        if self._connection_timer is None:
+            self._connection_timer = QtCore.QTimer()
+            self._connection_timer.setSingleShot(True)
+            self._connection_timer.timeout.connect(self._connectionTimeoutSlot)
+        self._connection_timer.start(DEFAULT_CONNECTION_TIMEOUT * 1000)
+
+        if self._network_manager is None:
+            self._network_manager = QtNetwork.QNetworkAccessManager()
+            self._network_manager.sslErrors.connect(self._sslErrorsSlot)
+        self._network_manager.setCookieJar(QtNetwork.QNetworkCookieJar())
+        self._http_reply = self._network_manager.get(self._networkRequest(self.version_url))
+        self._http_reply.finished.connect(self._versionReplySlot)
+
+    def _networkRequest(self, url):
+        """
+        Creates an HTTPS request trusting the server certificate authority.
+
+        :param url: request URL
+
+        :returns: QNetworkRequest instance
+        """
+
+        request = QtNetwork.QNetworkRequest(QtCore.QUrl(url))
+        if self.ca_file:
+            ssl_configuration = QtNetwork.QSslConfiguration.defaultConfiguration()
+            ssl_configuration.setCaCertificates(QtNetwork.QSslCertificate.fromPath(self.ca_file))
+            request.setSslConfiguration(ssl_configuration)
+        return request
+
+    def _sslErrorsSlot(self, reply, errors):
+        """
+        Slot called on TLS errors. Host name mismatches are ignored
+        (the server certificate is not checked against its host name).
+        """
+
+        ignored_errors = [error for error in errors if error.error() == QtNetwork.QSslError.HostNameMismatch]
+        if len(ignored_errors) == len(errors):
+            reply.ignoreSslErrors(ignored_errors)
+
+    def _httpReplyContent(self):
+        """
+        Returns the content of the current HTTPS reply.
+
+        :returns: content (bytes) or None if the request has failed
+        """
+
+        reply = self._http_reply
+        if reply is None:
+            # the request has been aborted
+            return None
+        self._http_reply = None
+        reply.deleteLater()
+        if not self.isConnecting():
+            # the connection has been aborted meanwhile
+            return None
+        if reply.error() != QtNetwork.QNetworkReply.NoError:
+            self._connectionFailed(reply.errorString())
+            return None
+        return bytes(reply.readAll())
+
+    def _versionReplySlot(self):
+        """
+        Slot called when the server version has been received.
+        """
+
+        content = self._httpReplyContent()
+        if content is None:
+            return
+        try:
+            self._checkServerVersion(content)
+        except OSError as e:
+            self._connectionFailed(str(e))
+            return
+
+        data = urllib.parse.urlencode({'name': self.auth_user, 'password': self.auth_password}).encode('utf-8')
+        request = self._networkRequest(self.login_url)
+        request.setHeader(QtNetwork.QNetworkRequest.ContentTypeHeader, "application/x-www-form-urlencoded")
+        self._http_reply = self._network_manager.post(request, data)
+        self._http_reply.finished.connect(self._loginReplySlot)
+
+    def _loginReplySlot(self):
+        """
+        Slot called when the login request has completed.
+        """
+
+        if self._httpReplyContent() is None:
+            return
+
+        cookies = self._network_manager.cookieJar().cookiesForUrl(QtCore.QUrl(self.login_url))
+        for cookie in cookies:
+            name = bytes(cookie.name()).decode("utf-8")
+            if name == "user":
+                self._auth_cookie = (name, bytes(cookie.value()).decode("utf-8"))
+                break
+        else:
+            self._connectionFailed("login failed, no authentication cookie received")
+            return
+
+        self._startConnection()
+
+    def _connectionFailed(self, reason):
+
+        if self._http_reply is not None:
+            reply = self._http_reply
+            self._http_reply = None
+            reply.abort()
+            reply.deleteLater()
+        WebSocketClient._connectionFailed(self, reason)
+
     @property
     def handshake_headers(self):
         """
@@ -388,11 +1405,10 @@ class SecureWebSocketClient(WebSocketClient):
         This code is copied from the ws4py library, then modified to include a
         cookie in the request.
         """
-        cookies = self.cookie_processor.cookiejar._cookies[self.host]['/']
-        user = cookies['user']
+        cookie_name, cookie_value = self._auth_cookie
         headers = [
             ('Host', self.host),
-            ('Cookie', '{}={}'.format(user.name, user.value)),
+            ('Cookie', '{}={}'.format(cookie_name, cookie_value)),
             ('Connection', 'Upgrade'),
             ('Upgrade', 'websocket'),
             ('Sec-WebSocket-Key', self.key.decode('utf-8')),
@@ -50,6 +50,9 @@ setup(
         "requests",
         "paramiko"
     ],
+    extras_require={
+        "layout": ["numpy"]
+    },
     entry_points={
         "gui_scripts": [
             "gns3 = gns3.main:main",
@@ -10,6 +10,12 @@ def pytest_addoption(parser):
                      help="rackspace apikey for integration tests")
     parser.addoption("--run-instances", action="store_true",
                      help="wait for instances to run while testing")
+    parser.addoption("--large-topologies", action="store_true",
+                     help="run the benchmarks with the largest topologies")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "large_topology: benchmark with the largest topologies, needs --large-topologies")
 
 
 @pytest.fixture(scope="class")
@@ -30,7 +36,8 @@ def run_instances(request):
 def pytest_runtest_setup(item):
     """
     Skip all tests marked with @rackspace_authentication if username and apikey were neither
-    passed to command line nor set as environment vars
+    passed to command line nor set as environment vars, and the tests marked with
+    @large_topology unless --large-topologies was passed
     """
     user = item.config.getoption("--username") or os.environ.get('RACKSPACE_USERNAME')
     key = item.config.getoption("--apikey") or os.environ.get('RACKSPACE_APIKEY')
@@ -39,3 +46,6 @@ def pytest_runtest_setup(item):
 
     if 'rackspace_authentication' in item.keywords and not credentials_passed:
         pytest.skip("need rackspace authentication options to run")
+
+    if 'large_topology' in item.keywords and not item.config.getoption("--large-topologies"):
+        pytest.skip("need --large-topologies option to run")
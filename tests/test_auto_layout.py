@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the force-directed layout, with a benchmark laying out
+5000 nodes using the grid approximation of the repulsion.
+"""
+
+import sys
+import time
+import pytest
+from unittest import TestCase, skipIf
+
+from PyQt4.QtGui import QApplication
+
+from gns3 import auto_layout
+from gns3.auto_layout import forceDirectedLayout
+from gns3.utils.auto_layout_thread import AutoLayoutThread
+
+numpy = auto_layout.numpy
+
+large_topology = pytest.mark.large_topology
+
+
+def gridTopology(side, seed=1):
+    """
+    Builds a grid of linked nodes scattered at random positions.
+
+    :param side: number of nodes per side
+    :param seed: seed of the positions
+
+    :returns: positions and edges
+    """
+
+    count = side * side
+    edges = [(index, index + 1) for index in range(count) if (index + 1) % side]
+    edges += [(index, index + side) for index in range(count - side)]
+    positions = numpy.random.RandomState(seed).uniform(0, 100 * side, (count, 2))
+    return positions, edges
+
+
+def switchedTopology(count, hosts=19, seed=1):
+    """
+    Builds switches linked in a ring, each switch linked to hosts,
+    all scattered at random positions.
+
+    :param count: number of nodes
+    :param hosts: number of hosts per switch
+    :param seed: seed of the positions
+
+    :returns: positions and edges
+    """
+
+    switches = count // (hosts + 1)
+    edges = [(index, (index + 1) % switches) for index in range(switches)]
+    edges += [(index, (index - switches) // hosts % switches) for index in range(switches, count)]
+    positions = numpy.random.RandomState(seed).uniform(0, 100 * count ** 0.5, (count, 2))
+    return positions, edges
+
+
+def edgeRatio(positions, edges, samples=2000):
+    """
+    Returns the median length of the links divided by the
+    median distance between random pairs of nodes.
+    """
+
+    edges = numpy.array(edges)
+    links = numpy.hypot(*(positions[edges[:, 0]] - positions[edges[:, 1]]).T)
+    random = numpy.random.RandomState(0)
+    first, second = random.randint(0, len(positions), (2, samples))
+    pairs = numpy.hypot(*(positions[first] - positions[second]).T)
+    return numpy.median(links) / numpy.median(pairs)
+
+
+@skipIf(numpy is None, "NumPy is not installed")
+class TestAutoLayout(TestCase):
+
+    def test_linked_nodes_closer(self):
+        positions, edges = gridTopology(10)
+        layout = forceDirectedLayout(positions, edges, spacing=100)
+        self.assertEqual(layout.shape, (100, 2))
+        self.assertLess(edgeRatio(layout, edges), edgeRatio(positions, edges) / 3)
+
+        # no overlapping nodes
+        distances = numpy.hypot(layout[:, None, 0] - layout[None, :, 0], layout[:, None, 1] - layout[None, :, 1])
+        distances[numpy.diag_indices(len(layout))] = numpy.inf
+        self.assertGreater(distances.min(), 30)
+
+        # the layout keeps its center
+        self.assertTrue(numpy.allclose(layout.mean(axis=0), positions.mean(axis=0)))
+
+    def test_stacked_nodes(self):
+        positions = [(50, 50)] * 10
+        edges = [(0, index) for index in range(1, 10)]
+        layout = forceDirectedLayout(positions, edges)
+        self.assertEqual(len(numpy.unique(layout.round(), axis=0)), 10)
+        self.assertTrue(numpy.allclose(layout.mean(axis=0), (50, 50)))
+        self.assertTrue(numpy.array_equal(forceDirectedLayout(positions, edges), layout))
+
+    def test_small_topologies(self):
+        self.assertEqual(forceDirectedLayout([], []).shape, (0, 2))
+        self.assertTrue(numpy.array_equal(forceDirectedLayout([(10, 20)], [(0, 0)]), [[10, 20]]))
+
+    def test_grid_repulsion(self):
+        # the approximation stays close to the exact repulsion
+        positions = numpy.random.RandomState(2).uniform(0, 5000, (2000, 2))
+        k2 = 150.0 * 150.0
+        exact_x, exact_y = auto_layout._exactRepulsion(positions[:, 0], positions[:, 1], k2)
+        grid_x, grid_y = auto_layout._gridRepulsion(positions[:, 0], positions[:, 1], k2)
+        error = numpy.hypot(grid_x - exact_x, grid_y - exact_y) / numpy.hypot(exact_x, exact_y)
+        self.assertLess(numpy.median(error), 0.05)
+
+    def test_stop(self):
+        iterations = []
+
+        def progress(iteration):
+            iterations.append(iteration)
+            return iteration < 3
+
+        positions, edges = gridTopology(5)
+        forceDirectedLayout(positions, edges, iterations=50, progress=progress)
+        self.assertEqual(iterations, [1, 2, 3])
+
+    def test_thread(self):
+        app = QApplication.instance() or QApplication(sys.argv)
+        positions, edges = gridTopology(5)
+        thread = AutoLayoutThread(positions, edges, iterations=10)
+        updates = []
+        thread.update.connect(updates.append)
+        thread.run()
+        self.assertEqual(thread.positions().shape, (25, 2))
+        self.assertEqual(updates[-1], 100)
+
+
+@large_topology
+@skipIf(numpy is None, "NumPy is not installed")
+class TestAutoLayoutBenchmark(TestCase):
+
+    def test_5000_nodes(self):
+        count = 5000
+        positions, edges = switchedTopology(count)
+
+        begin = time.perf_counter()
+        layout = forceDirectedLayout(positions, edges)
+        elapsed = time.perf_counter() - begin
+
+        # the exact repulsion for a few iterations, to estimate a full layout
+        iterations = 3
+        begin = time.perf_counter()
+        for _ in range(iterations):
+            auto_layout._exactRepulsion(positions[:, 0], positions[:, 1], 150.0 * 150.0)
+        exact = (time.perf_counter() - begin) * auto_layout.DEFAULT_AUTO_LAYOUT_ITERATIONS / iterations
+
+        print("\n{} nodes, {} links: layout in {:.2f}s (exact repulsion would take about {:.1f}s), "
+              "link length / random distance {:.3f} -> {:.3f}".format(count, len(edges), elapsed, exact,
+                                                                      edgeRatio(positions, edges), edgeRatio(layout, edges)),
+              file=sys.__stdout__)
+        self.assertLess(elapsed, exact)
+        self.assertLess(elapsed, 10)
+        self.assertLess(edgeRatio(layout, edges), edgeRatio(positions, edges) / 3)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+from unittest import TestCase
+
+from PyQt4.QtCore import QPoint
+from PyQt4.QtGui import QApplication, QGraphicsScene, QGraphicsView, QGraphicsRectItem
+
+from gns3.main_window import MainWindow
+from gns3.servers import Servers
+from gns3.modules.vpcs import VPCS
+from tests.test_topology_benchmark import TopologyBenchmark
+
+
+class TestGraphicsViewBulkInsert(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.view = MainWindow.instance().uiGraphicsView
+
+    def tearDown(self):
+        self.view.scene().clear()
+
+    def test_bulk_insert(self):
+        scene = self.view.scene()
+        index_method = scene.itemIndexMethod()
+        update_mode = self.view.viewportUpdateMode()
+
+        with self.view.bulkInsert():
+            with self.view.bulkInsert():
+                for index in range(10):
+                    scene.addItem(QGraphicsRectItem(index * 10, 0, 5, 5))
+            # only the outermost context restores the view
+            self.assertEqual(scene.itemIndexMethod(), QGraphicsScene.NoIndex)
+            self.assertEqual(self.view.viewportUpdateMode(), QGraphicsView.NoViewportUpdate)
+            self.assertFalse(self.view.viewport().updatesEnabled())
+
+        self.assertEqual(scene.itemIndexMethod(), index_method)
+        self.assertEqual(self.view.viewportUpdateMode(), update_mode)
+        self.assertTrue(self.view.viewport().updatesEnabled())
+        self.assertEqual(len(scene.items()), 10)
+        self.assertEqual(len(scene.items(scene.itemsBoundingRect())), 10)
+
+    def test_bulk_insert_error(self):
+        index_method = self.view.scene().itemIndexMethod()
+        with self.assertRaises(ValueError):
+            with self.view.bulkInsert():
+                raise ValueError()
+        self.assertEqual(self.view.scene().itemIndexMethod(), index_method)
+        self.assertTrue(self.view.viewport().updatesEnabled())
+
+
+class TestGraphicsViewCreateNode(TopologyBenchmark):
+
+    def test_create_node_disconnected_server(self):
+        server = Servers.instance().localServer()
+        server.close_connection()
+        node_item = self.main_window.uiGraphicsView.createNode(VPCS.instance().nodes()[0], QPoint(100, 100))
+
+        # the node is added right away, its requests wait for the connection
+        self.assertIsNotNone(node_item)
+        self.assertTrue(server.isConnecting())
+        begin = time.time()
+        while not node_item.node().initialized() and time.time() - begin < 10:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(node_item.node().initialized())
+        self.assertTrue(server.connected())
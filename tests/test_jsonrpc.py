@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import pytest
+from unittest import TestCase
+
+from gns3 import jsonrpc
+
+large_topology = pytest.mark.large_topology
+
+
+class LegacyJSONRPCObject(object):
+    """
+    JSON-RPC object as it was serialized before the precompiled encoder,
+    kept to benchmark the new encoder against it.
+    """
+
+    def __str__(self):
+        return json.dumps(self, cls=LegacyJSONRPCEncoder)
+
+
+class LegacyJSONRPCEncoder(json.JSONEncoder):
+
+    def default(self, obj):
+        if isinstance(obj, LegacyJSONRPCObject):
+            message = {"jsonrpc": 2.0}
+            for field in dir(obj):
+                if not field.startswith('_'):
+                    message[field] = getattr(obj, field)
+            return message
+        return json.JSONEncoder.default(self, obj)
+
+
+class LegacyJSONRPCRequest(LegacyJSONRPCObject):
+
+    def __init__(self, method, params=None, request_id=None):
+        self.id = request_id
+        self.method = method
+        if params:
+            self.params = params
+
+
+def dynamips_update_params(router_id):
+
+    return {"id": router_id,
+            "name": "R{}".format(router_id),
+            "platform": "c7200",
+            "image": "/home/gns3/GNS3/images/c7200-adventerprisek9-mz.124-24.T5.image",
+            "ram": 256,
+            "nvram": 128,
+            "idlepc": "0x606e0538",
+            "idlemax": 500,
+            "idlesleep": 30,
+            "exec_area": 64,
+            "mmap": True,
+            "sparsemem": True,
+            "midplane": "vxr",
+            "npe": "npe-400",
+            "mac_addr": "ca01.0dd4.0000",
+            "system_id": "FTX0945W0MY",
+            "slot0": "C7200-IO-FE",
+            "slot1": "PA-2FE-TX",
+            "slot2": "PA-4E",
+            "startup_config": "configs/r{}_startup-config.cfg".format(router_id),
+            "private_config": ""}
+
+
+class TestJSONRPC(TestCase):
+
+    def test_request(self):
+        request = jsonrpc.JSONRPCRequest("vpcs.create", {"name": "PC1"}, request_id="abc")
+        self.assertEqual(request.id, "abc")
+        self.assertEqual(request.method, "vpcs.create")
+        self.assertEqual(request.params, {"name": "PC1"})
+        self.assertEqual(json.loads(str(request)), {"jsonrpc": 2.0,
+                                                    "id": "abc",
+                                                    "method": "vpcs.create",
+                                                    "params": {"name": "PC1"}})
+
+    def test_request_without_params(self):
+        request = jsonrpc.JSONRPCRequest("dynamips.reset")
+        self.assertTrue(request.id)
+        self.assertNotIn("params", request())
+        self.assertRaises(AttributeError, getattr, request, "params")
+
+    def test_notification(self):
+        notification = jsonrpc.JSONRPCNotification("deadman.heartbeat")
+        self.assertEqual(jsonrpc.codec().decode(notification.encode()), {"jsonrpc": 2.0,
+                                                                         "method": "deadman.heartbeat"})
+
+    def test_errors(self):
+        error = jsonrpc.JSONRPCMethodNotFound("abc")
+        self.assertEqual(error.id, "abc")
+        self.assertEqual(error.error["code"], -32601)
+        self.assertEqual(json.loads(json.dumps(error, cls=jsonrpc.JSONRPCEncoder))["error"]["code"], -32601)
+
+    def test_codecs(self):
+        message = jsonrpc.JSONRPCRequest("dynamips.vm.update", dynamips_update_params(1), request_id="abc")()
+        for codec in jsonrpc.CODECS:
+            self.assertEqual(codec.decode(codec.encode(message)), message)
+
+    def test_set_codec(self):
+        default_codec = jsonrpc.codec()
+        try:
+            jsonrpc.setCodec("json")
+            self.assertIs(jsonrpc.codec(), jsonrpc.JSONCodec)
+            self.assertRaises(ValueError, jsonrpc.setCodec, "unknown")
+        finally:
+            jsonrpc.setCodec(default_codec.name)
+
+    def test_legacy_encoding(self):
+        # the messages are decoded as they were with the legacy encoder
+        for router_id in range(10):
+            legacy_message = str(LegacyJSONRPCRequest("dynamips.vm.update", dynamips_update_params(router_id), request_id=str(router_id)))
+            message = jsonrpc.JSONRPCRequest("dynamips.vm.update", dynamips_update_params(router_id), request_id=str(router_id))()
+            for codec in jsonrpc.CODECS:
+                self.assertEqual(codec.decode(codec.encode(message)), json.loads(legacy_message))
+
+    @large_topology
+    def test_benchmark_encode_decode(self):
+        count = 20000
+        params = [dynamips_update_params(router_id) for router_id in range(count)]
+
+        begin = time.perf_counter()
+        legacy_messages = [str(LegacyJSONRPCRequest("dynamips.vm.update", param, request_id=str(index)))
+                           for index, param in enumerate(params)]
+        legacy_encode = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        for message in legacy_messages:
+            json.loads(message.encode("utf-8").decode("utf-8"))
+        legacy_decode = time.perf_counter() - begin
+
+        print("\nJSON-RPC encode/decode of {} dynamips.vm.update messages".format(count))
+        print("legacy: encode {:.0f} msg/s, decode {:.0f} msg/s".format(count / legacy_encode, count / legacy_decode))
+
+        for codec in jsonrpc.CODECS:
+            begin = time.perf_counter()
+            messages = [codec.encode(jsonrpc.JSONRPCRequest("dynamips.vm.update", param, request_id=str(index))())
+                        for index, param in enumerate(params)]
+            encode = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            for message in messages:
+                codec.decode(message)
+            decode = time.perf_counter() - begin
+
+            # timings are only reported, they depend too much on the machine load
+            print("{}: encode {:.0f} msg/s, decode {:.0f} msg/s".format(codec.name, count / encode, count / decode))
+            self.assertEqual(codec.decode(messages[-1]), json.loads(legacy_messages[-1]))
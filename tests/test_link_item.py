@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import shutil
+import tempfile
+from unittest import TestCase
+
+from PyQt4 import QtCore
+from PyQt4.QtGui import QApplication
+
+from gns3.items.link_item import LinkItem
+from gns3.items.node_item import NodeItem
+from tests.test_svg_renderer_cache import FakeNode, writeSymbol
+
+
+class FakeLink(object):
+    def __init__(self, in_scene=True):
+        self.adjusted = 0
+        self._in_scene = in_scene
+
+    def scene(self):
+        return self._in_scene
+
+    def adjust(self):
+        self.adjusted += 1
+
+    scheduleAdjust = LinkItem.scheduleAdjust
+
+
+class TestLinkItemAdjust(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        FakeNode.default_symbol = writeSymbol(self.directory, "node.svg", shapes=1)
+        FakeNode.hover_symbol = FakeNode.default_symbol
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_adjust_once_per_flush(self):
+        links = [FakeLink(), FakeLink(), FakeLink(in_scene=False)]
+        for _ in range(10):
+            for link in links:
+                link.scheduleAdjust()
+        self.assertEqual([link.adjusted for link in links], [0, 0, 0])
+        LinkItem.flushAdjust()
+        self.assertEqual([link.adjusted for link in links], [1, 1, 0])
+
+        # nothing left to adjust
+        LinkItem.flushAdjust()
+        self.assertEqual([link.adjusted for link in links], [1, 1, 0])
+
+    def test_dragged_nodes(self):
+        # a link between two nodes moved together 20 times
+        link = FakeLink()
+        items = [NodeItem(FakeNode()) for _ in range(2)]
+        for item in items:
+            item.links().append(link)
+        for step in range(20):
+            for item in items:
+                item.setPos(step, step)
+        LinkItem.flushAdjust()
+        self.assertEqual(link.adjusted, 1)
+        for item in items:
+            item.releaseSymbols()
+
+    def test_cached_pens(self):
+        pen = LinkItem.cachedPen(QtCore.Qt.black, 2.0)
+        self.assertIs(LinkItem.cachedPen(QtCore.Qt.black, 2.0), pen)
+        self.assertEqual(pen.widthF(), 2.0)
+        self.assertIsNot(LinkItem.cachedPen(QtCore.Qt.red, 2.0), pen)
+        self.assertEqual(LinkItem.cachedPen(QtCore.Qt.red, 10, join=QtCore.Qt.MiterJoin).joinStyle(), QtCore.Qt.MiterJoin)
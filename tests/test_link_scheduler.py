@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from gns3.link_scheduler import LinkScheduler
+
+
+class FakeSignal(object):
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class FakeServer(object):
+    def __init__(self, server_id):
+        self._id = server_id
+
+    def id(self):
+        return self._id
+
+
+class FakePort(object):
+    def __init__(self, port_id):
+        self._id = port_id
+
+    def id(self):
+        return self._id
+
+
+class FakeNode(object):
+    def __init__(self, node_id, server, port_count=4):
+        self._id = node_id
+        self._server = server
+        self._ports = [FakePort(node_id * 100 + index) for index in range(port_count)]
+
+    def id(self):
+        return self._id
+
+    def server(self):
+        return self._server
+
+    def ports(self):
+        return self._ports
+
+
+class FakeLink(object):
+    def __init__(self, link_id):
+        self._id = link_id
+        self.add_link_signal = FakeSignal()
+        self.delete_link_signal = FakeSignal()
+        self.cancel_link_signal = FakeSignal()
+
+
+def topologyLink(link_id, source_id, source_port, destination_id, destination_port):
+    return {"id": link_id,
+            "source_node_id": source_id,
+            "source_port_id": source_id * 100 + source_port,
+            "destination_node_id": destination_id,
+            "destination_port_id": destination_id * 100 + destination_port}
+
+
+class TestLinkScheduler(TestCase):
+
+    def setUp(self):
+        self.created = []
+        self.scheduler = LinkScheduler(self._createLink, max_per_server=2, timeout=0)
+
+    def _createLink(self, topology_link, source_node, source_port, destination_node, destination_port):
+        link = FakeLink(topology_link["id"])
+        self.created.append((topology_link["id"], source_port.id(), destination_port.id(), link))
+        return link
+
+    def test_link_created_when_both_nodes_are_ready(self):
+        server = FakeServer(1)
+        nodes = [FakeNode(node_id, server) for node_id in (1, 2, 3)]
+        self.scheduler.load([topologyLink(1, 1, 0, 2, 0), topologyLink(2, 2, 1, 3, 0)])
+
+        self.scheduler.nodeReady(nodes[1])
+        self.assertEqual(self.created, [])
+        self.scheduler.nodeReady(nodes[0])
+        self.assertEqual([created[:3] for created in self.created], [(1, 100, 200)])
+        # a node ready twice does not create its links twice
+        self.scheduler.nodeReady(nodes[0])
+        self.scheduler.nodeReady(nodes[2])
+        self.assertEqual([created[:3] for created in self.created], [(1, 100, 200), (2, 201, 300)])
+        self.assertEqual(self.scheduler.pending(), 2)
+
+        for created in self.created:
+            created[3].add_link_signal.emit(created[0])
+        self.assertEqual(self.scheduler.pending(), 0)
+        self.assertEqual(self.scheduler.inFlight(1), 0)
+
+    def test_links_limited_per_server(self):
+        server1 = FakeServer(1)
+        server2 = FakeServer(2)
+        nodes = [FakeNode(1, server1), FakeNode(2, server1), FakeNode(3, server2), FakeNode(4, server2)]
+        self.scheduler.load([topologyLink(link_id, 1, link_id, 2, link_id) for link_id in range(3)] +
+                            [topologyLink(3, 3, 0, 4, 0)])
+        for node in nodes:
+            self.scheduler.nodeReady(node)
+
+        self.assertEqual([created[0] for created in self.created], [0, 1, 3])
+        self.assertEqual(self.scheduler.inFlight(1), 2)
+        self.assertEqual(self.scheduler.inFlight(2), 1)
+
+        # a canceled link leaves room for the queued one
+        self.created[0][3].cancel_link_signal.emit(0)
+        self.assertEqual([created[0] for created in self.created], [0, 1, 3, 2])
+        self.assertEqual(self.scheduler.inFlight(1), 2)
+
+    def test_missing_port(self):
+        server = FakeServer(1)
+        self.scheduler.load([topologyLink(1, 1, 9, 2, 0), topologyLink(2, 1, 1, 2, 1)])
+        self.scheduler.nodeReady(FakeNode(1, server))
+        self.scheduler.nodeReady(FakeNode(2, server))
+        self.assertEqual([created[0] for created in self.created], [2])
+        self.assertEqual(self.scheduler.inFlight(1), 1)
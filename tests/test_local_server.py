@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import os
+import socket
+import stat
+import sys
+import tempfile
+import time
+
+from gns3.local_server import LocalServerSupervisor, rotateLogFile
+from tests import GUIBaseTest
+
+# fake server: prints a few lines, listens and exits with code 3 on "crash" in its state file
+FAKE_SERVER = """#!{python}
+import argparse, os, socket, sys, time
+parser = argparse.ArgumentParser()
+parser.add_argument("--host")
+parser.add_argument("--port", type=int)
+options = parser.parse_args()
+print("GNS3 server", flush=True)
+print("Starting server on {{}}:{{}}".format(options.host, options.port), flush=True)
+time.sleep(0.05)
+sock = socket.socket()
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+sock.bind((options.host, options.port))
+sock.listen(5)
+state = os.path.join(os.path.dirname(__file__), "crash")
+while True:
+    time.sleep(0.01)
+    if os.path.exists(state):
+        os.remove(state)
+        print("fatal error", flush=True)
+        sys.exit(3)
+"""
+
+
+class TestLocalServerSupervisor(GUIBaseTest):
+
+    def setUp(self):
+        super(TestLocalServerSupervisor, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.executable = os.path.join(self.directory.name, "gns3server")
+        with open(self.executable, "w") as f:
+            f.write(FAKE_SERVER.format(python=sys.executable))
+        os.chmod(self.executable, os.stat(self.executable).st_mode | stat.S_IEXEC)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.log_path = os.path.join(self.directory.name, "GNS3_server.log")
+        self.supervisor = LocalServerSupervisor(self.log_path)
+        self.ready = []
+        self.crashes = []
+        self.supervisor.ready_signal.connect(self.ready.append)
+        self.supervisor.crashed_signal.connect(lambda code, tail: self.crashes.append((code, tail)))
+
+    def tearDown(self):
+        self.supervisor.stop(wait=True)
+        self.directory.cleanup()
+        super(TestLocalServerSupervisor, self).tearDown()
+
+    def _waitFor(self, condition, timeout=10.0):
+        begin = time.time()
+        while not condition() and time.time() - begin < timeout:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def test_ready(self):
+        self.assertTrue(self.supervisor.start(self.executable, "127.0.0.1", self.port))
+        self._waitFor(lambda: self.ready)
+        self.assertEqual(len(self.ready), 1)
+        self.assertTrue(self.supervisor.isReady())
+        metrics = self.supervisor.metrics()
+        self.assertEqual(metrics["starts"], 1)
+        self.assertLessEqual(metrics["first_output_time"], metrics["ready_line_time"])
+        self.assertLessEqual(metrics["ready_line_time"], metrics["startup_time"])
+        with open(self.log_path) as f:
+            self.assertIn("Starting server on 127.0.0.1:{}".format(self.port), f.read())
+
+    def test_restart_after_crash(self):
+        self.supervisor.start(self.executable, "127.0.0.1", self.port)
+        self._waitFor(lambda: self.ready)
+        open(os.path.join(self.directory.name, "crash"), "w").close()
+        self._waitFor(lambda: len(self.ready) == 2)
+        self.assertEqual(len(self.crashes), 1)
+        self.assertEqual(self.crashes[0][0], 3)
+        self.assertIn("fatal error", self.crashes[0][1])
+        metrics = self.supervisor.metrics()
+        self.assertEqual(metrics["restarts"], 1)
+        self.assertEqual(len(metrics["startup_times"]), 2)
+        # the log of the crashed server has been rotated
+        with open(self.log_path + ".1") as f:
+            self.assertIn("fatal error", f.read())
+
+    def test_rotate_log_file(self):
+        for index in range(3):
+            with open(self.log_path, "w") as f:
+                f.write(str(index))
+            rotateLogFile(self.log_path, 2)
+        self.assertFalse(os.path.exists(self.log_path))
+        with open(self.log_path + ".1") as f:
+            self.assertEqual(f.read(), "2")
+        with open(self.log_path + ".2") as f:
+            self.assertEqual(f.read(), "1")
+        self.assertFalse(os.path.exists(self.log_path + ".3"))
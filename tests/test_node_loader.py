@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from gns3.node_loader import NodeLoader
+
+
+class FakeSignal(object):
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class FakeNode(object):
+    def __init__(self, node_id):
+        self._id = node_id
+        self.created_signal = FakeSignal()
+        self.error_signal = FakeSignal()
+        self.server_error_signal = FakeSignal()
+
+    def id(self):
+        return self._id
+
+
+class TestNodeLoader(TestCase):
+
+    def setUp(self):
+        self.nodes = {}
+        self.progress = []
+        self.finished = []
+        self.loader = NodeLoader(self._createNode, batch_size=2, timeout=0)
+        self.loader.progress_signal.connect(lambda processed, total: self.progress.append((processed, total)))
+        self.loader.finished_signal.connect(lambda: self.finished.append(True))
+
+    def _createNode(self, topology_node):
+        if topology_node.get("invalid"):
+            return None
+        node = FakeNode(topology_node["id"])
+        self.nodes[node.id()] = node
+        return node
+
+    def test_batches_per_server(self):
+        for node_id in range(1, 6):
+            self.loader.add(1 if node_id < 5 else 2, {"id": node_id})
+        self.loader.start()
+
+        self.assertEqual(sorted(self.nodes), [1, 2, 5])
+        self.assertEqual(self.loader.inFlight(1), 2)
+        self.assertEqual(self.loader.inFlight(2), 1)
+
+        self.nodes[1].created_signal.emit(1)
+        self.assertEqual(sorted(self.nodes), [1, 2, 3, 5])
+        self.nodes[2].server_error_signal.emit(2, -1, "error")
+        self.assertEqual(sorted(self.nodes), [1, 2, 3, 4, 5])
+        self.assertEqual(self.progress[-1], (2, 5))
+
+        for node_id in (3, 4, 5):
+            self.nodes[node_id].created_signal.emit(node_id)
+        # signals received after a node has been processed are ignored
+        self.nodes[1].created_signal.emit(1)
+        self.assertEqual(self.progress[-1], (5, 5))
+        self.assertEqual(self.loader.failed(), 1)
+        self.assertEqual(self.finished, [True])
+        self.assertFalse(self.loader.isActive())
+
+    def test_invalid_nodes(self):
+        self.loader.add(1, {"id": 1, "invalid": True})
+        self.loader.add(1, {"id": 2})
+        self.loader.start()
+        self.assertEqual(sorted(self.nodes), [2])
+        self.assertEqual(self.loader.failed(), 1)
+        self.nodes[2].created_signal.emit(2)
+        self.assertEqual(self.finished, [True])
+
+    def test_empty(self):
+        self.loader.start()
+        self.assertEqual(self.finished, [True])
+        self.assertEqual(self.progress, [(0, 0)])
+
+    def test_cancel(self):
+        for node_id in range(1, 5):
+            self.loader.add(1, {"id": node_id})
+        self.loader.start()
+        self.loader.cancel()
+        self.assertTrue(self.loader.isCanceled())
+        self.assertEqual(self.loader.remaining(), 4)
+        self.assertEqual(self.finished, [True])
+
+        # nodes being created when canceled do not start queued ones
+        self.nodes[1].created_signal.emit(1)
+        self.assertEqual(sorted(self.nodes), [1, 2])
+        self.assertEqual(self.finished, [True])
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for closing the main window while the project file is being written.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from unittest import TestCase
+
+from PyQt4.QtGui import QApplication, QCloseEvent
+
+from gns3.main_window import MainWindow
+from gns3.utils.save_project_thread import SaveProjectThread
+
+
+class TestCloseWhileSaving(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.main_window = MainWindow.instance()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.main_window._save_project_thread = None
+        self.main_window._project_save_failed = False
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_failed_save_keeps_window_open(self):
+        errors = []
+        thread = SaveProjectThread(os.path.join(self.directory, "missing", "project.gns3"), {"topology": {}})
+        thread.error.connect(lambda path, message: errors.append(message))
+        thread.start()
+        self.main_window._save_project_thread = thread
+        self.main_window._project_save_failed = False
+
+        # the error signal of the thread is still queued
+        event = QCloseEvent()
+        self.main_window.closeEvent(event)
+        self.assertTrue(thread.failed())
+        self.assertEqual(errors, [])
+        self.assertFalse(event.isAccepted())
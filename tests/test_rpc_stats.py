@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import json
+
+from gns3.rpc_stats import LatencyHistogram, RPCStats
+from tests import BaseTest
+
+
+class TestRPCStats(BaseTest):
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for millisecond in range(1, 101):
+            histogram.add(millisecond / 1000)
+        self.assertEqual(histogram.count, 100)
+        # buckets are about 19% wide
+        self.assertAlmostEqual(histogram.percentile(50), 0.050, delta=0.050 * 0.2)
+        self.assertAlmostEqual(histogram.percentile(95), 0.095, delta=0.095 * 0.2)
+        self.assertAlmostEqual(histogram.percentile(99), 0.099, delta=0.099 * 0.2)
+        self.assertLessEqual(histogram.percentile(100), 0.1)
+        self.assertAlmostEqual(histogram.mean(), 0.0505)
+
+    def test_empty_histogram(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.percentile(99), 0.0)
+        self.assertEqual(histogram.mean(), 0.0)
+
+    def test_dump(self):
+        stats = RPCStats("127.0.0.1:8000")
+        stats.recordRequest("dynamips.vm.create", 120)
+        stats.recordReply("dynamips.vm.create", 0.5, 80)
+        stats.recordRequest("iou.add_nio", 100)
+        stats.recordReply("iou.add_nio", 0.01, 60, error=True)
+        stats.recordTimeout("iou.add_nio")
+        stats.recordNotification("dynamips.vm.crashed", 40)
+        dump = json.loads(json.dumps(stats.dump()))
+        self.assertEqual(dump["server"], "127.0.0.1:8000")
+        create = dump["methods"]["dynamips.vm.create"]
+        self.assertEqual(create["requests"], 1)
+        self.assertEqual(create["bytes_sent"], 120)
+        self.assertEqual(create["bytes_received"], 80)
+        self.assertEqual(dump["methods"]["iou.add_nio"]["errors"], 1)
+        self.assertEqual(dump["methods"]["iou.add_nio"]["timeouts"], 1)
+        self.assertEqual(dump["methods"]["dynamips.vm.crashed"]["notifications"], 1)
+        # slowest method first
+        self.assertIn("dynamips.vm.create", stats.summary().splitlines()[2])
+        stats.reset()
+        self.assertEqual(stats.methods(), {})
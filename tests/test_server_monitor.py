@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import time
+
+from gns3.server_monitor import ServerMonitor, ServerHealth
+from gns3.stub_server import StubServer
+from gns3.version import __version__
+from gns3.websocket_client import WebSocketClient
+from tests import GUIBaseTest
+
+
+class FakeServers(object):
+
+    def __init__(self, servers):
+        self.servers = servers
+        self.capacity_requests = 0
+
+    def allServers(self):
+        return self.servers
+
+    def placementNeedsCapacity(self):
+        return True
+
+    def requestCapacityReports(self):
+        self.capacity_requests += 1
+
+
+class TestServerMonitor(GUIBaseTest):
+
+    def setUp(self):
+        super(TestServerMonitor, self).setUp()
+        self.stub = StubServer()
+        self.stub.start()
+        self.client = WebSocketClient("ws://{}:{}".format(self.stub.host(), self.stub.port()))
+        # nothing listens on this port
+        self.unreachable = WebSocketClient("ws://127.0.0.1:1")
+        self.servers = FakeServers([self.client, self.unreachable])
+        self.monitor = ServerMonitor(self.servers)
+        self.statuses = []
+        self.monitor.status_changed_signal.connect(self.statuses.append)
+
+    def tearDown(self):
+        self.monitor.stop()
+        self.client.close_connection()
+        self.unreachable.close_connection()
+        self.stub.stop()
+        super(TestServerMonitor, self).tearDown()
+
+    def _waitFor(self, server, status, timeout=5.0):
+        begin = time.time()
+        while self.monitor.health(server).status != status and time.time() - begin < timeout:
+            self.app.processEvents()
+            time.sleep(0.001)
+        return self.monitor.health(server)
+
+    def test_parallel_connection(self):
+        self.monitor.start()
+        # both connections are started at once without blocking
+        self.assertTrue(self.client.isConnecting() or self.client.connected())
+        self.assertEqual(self.servers.capacity_requests, 1)
+
+        health = self._waitFor(self.client, ServerHealth.healthy)
+        self.assertEqual(health.status, ServerHealth.healthy)
+        self.assertEqual(health.version, __version__)
+        self.assertIsNotNone(health.connect_time)
+        self.assertTrue(health.isAvailable())
+
+        health = self._waitFor(self.unreachable, ServerHealth.unreachable)
+        self.assertEqual(health.status, ServerHealth.unreachable)
+        self.assertFalse(health.isAvailable())
+        self.assertIn(self.monitor.health(self.client), self.statuses)
+
+    def test_round_trip_time(self):
+        self.monitor.start()
+        self._waitFor(self.client, ServerHealth.healthy)
+        self.stub.setMethodLatency("builtin.version", 1.5)
+        self.monitor.probe(self.client)
+        health = self._waitFor(self.client, ServerHealth.degraded)
+        self.assertEqual(health.status, ServerHealth.degraded)
+        self.assertGreaterEqual(health.rtt, 1.5)
+
+    def test_probe_unreachable_twice(self):
+        self.servers.servers = [self.unreachable, self.client]
+        for _ in range(2):
+            self.monitor.probeAll()
+            health = self._waitFor(self.unreachable, ServerHealth.unreachable)
+            self.assertEqual(health.status, ServerHealth.unreachable)
+
+        # the servers after the unreachable one are still probed
+        health = self._waitFor(self.client, ServerHealth.healthy)
+        self.assertEqual(health.status, ServerHealth.healthy)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from gns3.server_placement import ServerLoad, placementPolicy, RoundRobinPolicy
+from gns3.settings import DEFAULT_PLACEMENT_POLICY
+from tests import BaseTest
+
+
+class FakeServer(object):
+
+    def __init__(self, server_id):
+        self._id = server_id
+
+    def id(self):
+        return self._id
+
+
+class TestServerPlacement(BaseTest):
+
+    def setUp(self):
+        self.servers = [FakeServer(server_id) for server_id in range(3)]
+
+    def test_round_robin(self):
+        policy = placementPolicy("round_robin")
+        loads = {server.id(): ServerLoad() for server in self.servers}
+        picked = [policy.select(self.servers, loads, None, 0).id() for _ in range(4)]
+        self.assertEqual(picked, [0, 1, 2, 0])
+
+    def test_least_nodes(self):
+        policy = placementPolicy("least_nodes")
+        loads = {0: ServerLoad(nodes=5), 1: ServerLoad(nodes=2), 2: ServerLoad(nodes=3)}
+        self.assertEqual(policy.select(self.servers, loads, None, 0).id(), 1)
+
+    def test_least_ram(self):
+        policy = placementPolicy("least_ram")
+        loads = {0: ServerLoad(nodes=1, ram=2048), 1: ServerLoad(nodes=4, ram=1024), 2: ServerLoad(nodes=1, ram=512)}
+        self.assertEqual(policy.select(self.servers, loads, None, 256).id(), 2)
+
+    def test_weighted_capacity(self):
+        policy = placementPolicy("weighted_capacity")
+        self.assertTrue(policy.needs_capacity_reports)
+        # server 2 has the least RAM committed but is the smallest
+        loads = {0: ServerLoad(ram=4096, capacity={"ram_total": 32768, "ram_available": 28000}),
+                 1: ServerLoad(ram=2048, capacity={"ram_total": 8192, "ram_available": 6000}),
+                 2: ServerLoad(ram=1024, capacity={"ram_total": 2048, "ram_available": 1024})}
+        self.assertEqual(policy.select(self.servers, loads, None, 512).id(), 0)
+
+    def test_weighted_capacity_prefers_servers_where_node_fits(self):
+        policy = placementPolicy("weighted_capacity")
+        loads = {0: ServerLoad(ram=0, capacity={"ram_total": 32768, "ram_available": 256}),
+                 1: ServerLoad(ram=4096, capacity={"ram_total": 8192, "ram_available": 4096}),
+                 2: ServerLoad(ram=0)}
+        self.assertEqual(policy.select(self.servers, loads, None, 1024).id(), 2)
+
+    def test_unknown_policy(self):
+        self.assertIsInstance(placementPolicy("unknown"), RoundRobinPolicy)
+
+    def test_topology_aware(self):
+        policy = placementPolicy("topology_aware")
+        loads = {0: ServerLoad(nodes=3, neighbours=0), 1: ServerLoad(nodes=4, neighbours=2), 2: ServerLoad(nodes=2)}
+        self.assertEqual(policy.select(self.servers, loads, None, 0).id(), 1)
+
+    def test_topology_aware_keeps_servers_balanced(self):
+        policy = placementPolicy("topology_aware")
+        loads = {0: ServerLoad(nodes=2), 1: ServerLoad(nodes=8, neighbours=3), 2: ServerLoad(nodes=2)}
+        self.assertEqual(policy.select(self.servers, loads, None, 0).id(), 0)
+
+    def test_default_policy(self):
+        # new nodes are placed with the nodes they are linked to
+        policy = placementPolicy(DEFAULT_PLACEMENT_POLICY)
+        loads = {0: ServerLoad(nodes=2), 1: ServerLoad(nodes=2, neighbours=1), 2: ServerLoad(nodes=2)}
+        self.assertEqual(policy.select(self.servers, loads, None, 0).id(), 1)
+
+        # and spread over the servers otherwise
+        loads = {server.id(): ServerLoad() for server in self.servers}
+        for _ in range(6):
+            loads[policy.select(self.servers, loads, None, 0).id()].nodes += 1
+        self.assertEqual([loads[server.id()].nodes for server in self.servers], [2, 2, 2])
+
+    def test_invalid_capacity_report(self):
+        from gns3.servers import Servers
+        from gns3.websocket_client import WebSocketClient
+
+        servers = Servers.instance()
+        server = WebSocketClient("ws://127.0.0.1:1")
+        servers._capacityReportCallback(server)(True)
+        self.assertIsNone(servers._monitor.health(server).capacity)
+        servers._capacityReportCallback(server)({"ram_total": 4096, "ram_available": 1024})
+        self.assertEqual(servers._monitor.health(server).capacity["ram_total"], 4096)
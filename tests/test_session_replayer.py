@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import time
+
+from ws4py.messaging import TextMessage
+
+from gns3.websocket_client import WebSocketClient
+from gns3.session_recorder import loadSession, SENT, RECEIVED
+from gns3.session_replayer import SessionReplayer
+from tests import GUIBaseTest
+
+
+class TestSessionReplayer(GUIBaseTest):
+
+    def setUp(self):
+        super(TestSessionReplayer, self).setUp()
+        fd, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.replayer = None
+
+    def tearDown(self):
+        if self.replayer:
+            self.replayer.stop()
+        os.remove(self.path)
+        super(TestSessionReplayer, self).tearDown()
+
+    def _record(self):
+        # record a session with a fake server
+        client = WebSocketClient("ws://127.0.0.1:8000")
+        client._connected = True
+        sent = []
+        client.send = sent.append
+        client.startRecording(self.path)
+        client.send_notification("vpcs.settings", {"path": "vpcs"})
+        for name in ("PC1", "PC2"):
+            client.send_message("vpcs.create", {"name": name}, lambda result, error=False: None)
+        replies = [{"jsonrpc": 2.0, "id": json.loads(sent[1])["id"], "result": {"id": 1, "name": "PC1"}},
+                   {"jsonrpc": 2.0, "id": json.loads(sent[2])["id"], "result": {"id": 2, "name": "PC2"}},
+                   {"jsonrpc": 2.0, "method": "vpcs.vpcs_stopped", "params": {"id": 2}}]
+        for reply in replies:
+            client.received_message(TextMessage(json.dumps(reply).encode("utf-8")))
+        client.stopRecording()
+        client.close_connection()
+
+    def test_record(self):
+        self._record()
+        session = loadSession(self.path)
+        self.assertEqual([direction for _, direction, _ in session], [SENT, SENT, SENT, RECEIVED, RECEIVED, RECEIVED])
+        self.assertEqual(session[1][2]["params"], {"name": "PC1"})
+        self.assertEqual(session[5][2]["method"], "vpcs.vpcs_stopped")
+
+    def test_replay(self):
+        self._record()
+        self.replayer = SessionReplayer(self.path, speed=0)
+        self.assertEqual(self.replayer.recordedMethods(), {"vpcs.create": 2})
+        self.replayer.start()
+
+        results = []
+        client = WebSocketClient("ws://127.0.0.1:{}".format(self.replayer.port()))
+        client.connectAsync()
+        # requests are matched by params, whatever the order
+        client.send_message("vpcs.create", {"name": "PC2"}, lambda result, error=False: results.append(result))
+        client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append(result))
+        client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: results.append(result))
+        begin = time.time()
+        while len(results) < 3 and time.time() - begin < 5:
+            self.app.processEvents()
+            time.sleep(0.001)
+        client.close_connection()
+
+        self.assertEqual(len(results), 3)
+        self.assertIn({"id": 2, "name": "PC2"}, results)
+        self.assertIn({"id": 1, "name": "PC1"}, results)
+        self.assertEqual(self.replayer.unknownRequests(), 1)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from gns3.stub_server import StubServer, STUB_FAILURE_ERROR
+from tests import BaseTest
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, delay, message):
+        self.scheduled.append((delay, message))
+
+
+class TestStubServer(BaseTest):
+
+    def setUp(self):
+        self.server = StubServer(seed=42)
+        self.connection = FakeConnection()
+
+    def _request(self, method, params, request_id=1):
+        self.server.request(self.connection, {"jsonrpc": 2.0, "id": request_id, "method": method, "params": params})
+        return self.connection.scheduled[-1]
+
+    def test_create(self):
+        _, reply = self._request("vpcs.create", {"name": "PC1"})
+        self.assertEqual(reply["result"]["name"], "PC1")
+        _, reply = self._request("dynamips.vm.create", {"platform": "c7200"}, 2)
+        self.assertEqual(reply["id"], 2)
+        self.assertEqual(reply["result"]["id"], 2)
+        self.assertEqual(self.server.requestCounts(), {"vpcs.create": 1, "dynamips.vm.create": 1})
+
+    def test_udp_nio(self):
+        _, reply = self._request("iou.allocate_udp_port", {"id": 1, "port_id": 3})
+        self.assertEqual(reply["result"]["port_id"], 3)
+        self.assertIn("lport", reply["result"])
+        _, reply = self._request("iou.add_nio", {"id": 1, "port_id": 3})
+        self.assertEqual(reply["result"], {"port_id": 3})
+        _, reply = self._request("iou.start", {"id": 1})
+        self.assertTrue(reply["result"])
+
+    def test_latency_and_failures(self):
+        self.server.setMethodLatency("*.start", 0.5)
+        self.server.setMethodFailureRate("vpcs.start", 1.0)
+        delay, reply = self._request("vpcs.start", {"id": 1})
+        self.assertEqual(delay, 0.5)
+        self.assertEqual(reply["error"]["code"], STUB_FAILURE_ERROR)
+        delay, reply = self._request("qemu.start", {"id": 1})
+        self.assertEqual(delay, 0.5)
+        self.assertIn("result", reply)
+        self.assertEqual(self.server.failureCount(), 1)
+
+    def test_capacity(self):
+        _, reply = self._request("builtin.capacity", None)
+        self.assertIsInstance(reply["result"]["ram_total"], int)
+        self.server.setCapacity(8192, 2048)
+        _, reply = self._request("builtin.capacity", None)
+        self.assertEqual(reply["result"], {"ram_total": 8192, "ram_available": 2048})
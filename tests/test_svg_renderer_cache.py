@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the SVG renderer cache, with a benchmark comparing node items
+sharing cached renderers to node items parsing their own symbols and a
+benchmark of the scene repaint time at several zoom levels.
+"""
+
+import os
+import sys
+import time
+import shutil
+import pytest
+import tempfile
+from unittest import TestCase
+
+from PyQt4 import QtCore, QtGui, QtSvg
+from PyQt4.QtGui import QApplication
+
+from gns3.svg_renderer_cache import SvgRendererCache
+from gns3.items.node_item import NodeItem
+
+large_topology = pytest.mark.large_topology
+
+SVG = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="64" height="64">
+{}
+</svg>
+"""
+
+
+def writeSymbol(directory, name, shapes=200):
+    """
+    Writes a symbol with a number of shapes to make it costly to parse.
+    """
+
+    path = os.path.join(directory, name)
+    circles = "\n".join('<circle cx="{}" cy="{}" r="2" fill="#{:06x}"/>'.format(index % 64, index // 64 % 64, index * 997 % 0xffffff)
+                        for index in range(shapes))
+    with open(path, "w") as f:
+        f.write(SVG.format(circles))
+    return path
+
+
+def residentMemory():
+    """
+    Returns the resident memory of the process in bytes (Linux only).
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class FakeNode(QtCore.QObject):
+
+    created_signal = QtCore.pyqtSignal(int)
+    started_signal = QtCore.pyqtSignal()
+    stopped_signal = QtCore.pyqtSignal()
+    suspended_signal = QtCore.pyqtSignal()
+    updated_signal = QtCore.pyqtSignal()
+    deleted_signal = QtCore.pyqtSignal()
+    delete_links_signal = QtCore.pyqtSignal()
+    error_signal = QtCore.pyqtSignal(int, str)
+    server_error_signal = QtCore.pyqtSignal(int, int, str)
+
+    default_symbol = None
+    hover_symbol = None
+
+    def defaultSymbol(self):
+        return self.default_symbol
+
+    def hoverSymbol(self):
+        return self.hover_symbol
+
+    def removeAllocatedName(self):
+        pass
+
+
+class TestSvgRendererCache(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SvgRendererCache(max_unused=2)
+        self.symbols = [writeSymbol(self.directory, "symbol{}.svg".format(index), shapes=1) for index in range(4)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_shared_renderer(self):
+        renderer = self.cache.acquire(self.symbols[0])
+        self.assertTrue(renderer.isValid())
+        self.assertEqual(renderer.objectName(), self.symbols[0])
+        self.assertIs(self.cache.acquire(self.symbols[0]), renderer)
+        self.assertEqual(self.cache.references(self.symbols[0]), 2)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_lru_eviction(self):
+        for path in self.symbols:
+            self.cache.acquire(path)
+        for path in self.symbols:
+            self.cache.release(path)
+
+        # only the 2 most recently released symbols are kept
+        self.assertNotIn(self.symbols[0], self.cache)
+        self.assertNotIn(self.symbols[1], self.cache)
+        self.assertIn(self.symbols[2], self.cache)
+        self.assertIn(self.symbols[3], self.cache)
+        self.assertEqual(self.cache.stats()["evictions"], 2)
+
+        # a symbol used again is no longer a candidate for eviction
+        self.cache.acquire(self.symbols[2])
+        self.cache.acquire(self.symbols[0])
+        self.cache.release(self.symbols[0])
+        self.cache.acquire(self.symbols[1])
+        self.cache.release(self.symbols[1])
+        self.assertIn(self.symbols[2], self.cache)
+        self.assertNotIn(self.symbols[3], self.cache)
+
+    def test_invalid_symbol(self):
+        path = os.path.join(self.directory, "missing.svg")
+        self.assertFalse(self.cache.acquire(path).isValid())
+        self.cache.release(path)
+        self.assertNotIn(path, self.cache)
+
+    def test_node_item(self):
+        FakeNode.default_symbol = self.symbols[0]
+        FakeNode.hover_symbol = self.symbols[1]
+        cache = SvgRendererCache.instance()
+        items = [NodeItem(FakeNode()) for _ in range(3)]
+        self.assertIs(items[0].defaultRenderer(), items[2].defaultRenderer())
+        self.assertEqual(cache.references(self.symbols[0]), 3)
+        self.assertEqual(items[0].customDefaultSymbol(), "")
+
+        self.assertTrue(items[0].setDefaultSymbol(self.symbols[2]))
+        self.assertEqual(items[0].customDefaultSymbol(), self.symbols[2])
+        self.assertEqual(cache.references(self.symbols[0]), 2)
+        self.assertFalse(items[0].setDefaultSymbol(os.path.join(self.directory, "missing.svg")))
+        self.assertEqual(items[0].customDefaultSymbol(), self.symbols[2])
+
+        for item in items:
+            item.releaseSymbols()
+        for path in self.symbols[:3]:
+            self.assertEqual(cache.references(path), 0)
+
+    def test_pixmap(self):
+        self.cache.acquire(self.symbols[0])
+        pixmap = self.cache.pixmap(self.symbols[0], QtCore.QSize(32, 32))
+        self.assertEqual(pixmap.width(), 32)
+        self.assertIs(self.cache.pixmap(self.symbols[0], QtCore.QSize(32, 32)), pixmap)
+        self.assertEqual(self.cache.stats()["rasterizations"], 1)
+
+        # only the most recently used sizes are kept
+        for size in (16, 64, 128, 256):
+            self.cache.pixmap(self.symbols[0], QtCore.QSize(size, size))
+        self.assertEqual(self.cache.stats()["pixmaps"], 4)
+        self.cache.pixmap(self.symbols[0], QtCore.QSize(32, 32))
+        self.assertEqual(self.cache.stats()["rasterizations"], 6)
+
+        # pixmaps go away with their renderer
+        self.cache.release(self.symbols[0])
+        for path in self.symbols[1:]:
+            self.cache.acquire(path)
+            self.cache.release(path)
+        self.assertEqual(self.cache.stats()["pixmaps"], 0)
+
+    def test_level_of_detail(self):
+        FakeNode.default_symbol = self.symbols[0]
+        FakeNode.hover_symbol = self.symbols[1]
+        item = NodeItem(FakeNode())
+        item._initialized = True
+        image = QtGui.QImage(64, 64, QtGui.QImage.Format_ARGB32)
+        option = QtGui.QStyleOptionGraphicsItem()
+        try:
+            for zoom, pixmaps in ((0.5, 1), (0.45, 1), (2.0, 2), (0.1, 2)):
+                NodeItem.symbol_zoom_threshold = 0.2
+                image.fill(0)
+                painter = QtGui.QPainter(image)
+                painter.scale(zoom, zoom)
+                item.paint(painter, option)
+                painter.end()
+                self.assertEqual(SvgRendererCache.instance().stats()["pixmaps"], pixmaps)
+        finally:
+            NodeItem.symbol_zoom_threshold = 0.0
+            item.releaseSymbols()
+
+
+@large_topology
+class TestSvgRendererCacheBenchmark(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        FakeNode.default_symbol = writeSymbol(self.directory, "router.normal.svg")
+        FakeNode.hover_symbol = writeSymbol(self.directory, "router.selected.svg")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _createItems(self, count, shared):
+        memory = residentMemory()
+        begin = time.perf_counter()
+        items = []
+        for _ in range(count):
+            node = FakeNode()
+            if shared:
+                item = NodeItem(node)
+            else:
+                # what each node item used to do
+                item = QtSvg.QGraphicsSvgItem()
+                item.default_renderer = QtSvg.QSvgRenderer(node.defaultSymbol())
+                item.hover_renderer = QtSvg.QSvgRenderer(node.hoverSymbol())
+                item.setSharedRenderer(item.default_renderer)
+            items.append((node, item))
+        elapsed = time.perf_counter() - begin
+        if memory is not None:
+            memory = residentMemory() - memory
+        return items, elapsed, memory
+
+    def test_1000_node_items(self):
+        count = 1000
+        # shared renderers first, freed memory could be reused by the next run
+        items, shared_time, shared_memory = self._createItems(count, shared=True)
+        for _, item in items:
+            item.releaseSymbols()
+        del items
+        items, parsed_time, parsed_memory = self._createItems(count, shared=False)
+
+        report = "\n{} node items: own renderers {:.3f}s, shared renderers {:.3f}s".format(count, parsed_time, shared_time)
+        if parsed_memory is not None:
+            report += "; memory {:.1f} MB vs {:.1f} MB".format(parsed_memory / 1048576, shared_memory / 1048576)
+        print(report, file=sys.__stdout__)
+        self.assertLess(shared_time, parsed_time)
+
+
+@large_topology
+class TestLevelOfDetailBenchmark(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        FakeNode.default_symbol = writeSymbol(self.directory, "switch.normal.svg")
+        FakeNode.hover_symbol = writeSymbol(self.directory, "switch.selected.svg")
+
+    def tearDown(self):
+        NodeItem.cache_symbols = True
+        NodeItem.symbol_zoom_threshold = 0.0
+        shutil.rmtree(self.directory)
+
+    def _repaintTimes(self, count, zoom_levels, level_of_detail):
+        """
+        Returns the time to repaint a view after zooming to each level
+        and the time to repaint it again at that level.
+        """
+
+        scene = QtGui.QGraphicsScene()
+        items = []
+        columns = int(count ** 0.5)
+        for index in range(count):
+            item = NodeItem(FakeNode())
+            item._initialized = True
+            item.setPos(index % columns * 100, index // columns * 100)
+            scene.addItem(item)
+            items.append(item)
+
+        # moving the items brings up the main window which applies the
+        # graphics view settings, hence setting the rendering mode afterwards
+        NodeItem.cache_symbols = level_of_detail
+        NodeItem.symbol_zoom_threshold = 0.2 if level_of_detail else 0.0
+        view = QtGui.QGraphicsView(scene)
+        view.resize(1280, 1024)
+        view.show()
+        image = QtGui.QImage(1280, 1024, QtGui.QImage.Format_ARGB32_Premultiplied)
+
+        times = []
+        for zoom in zoom_levels:
+            view.resetTransform()
+            view.scale(zoom, zoom)
+            view.centerOn(columns * 50, columns * 50)
+            repaints = []
+            for _ in range(2):
+                image.fill(0)
+                painter = QtGui.QPainter(image)
+                painter.setRenderHint(QtGui.QPainter.Antialiasing)
+                begin = time.perf_counter()
+                view.render(painter)
+                repaints.append(time.perf_counter() - begin)
+                painter.end()
+            times.append(repaints)
+
+        for item in items:
+            item.releaseSymbols()
+        return times
+
+    def test_repaint_zoom_levels(self):
+        count = 400
+        zoom_levels = (0.15, 0.25, 0.5, 1.0, 2.0)
+        vector = self._repaintTimes(count, zoom_levels, level_of_detail=False)
+        cached = self._repaintTimes(count, zoom_levels, level_of_detail=True)
+
+        report = "\n{} node items, repaint after zooming (and repaint again):".format(count)
+        for zoom, (vector_first, vector_again), (cached_first, cached_again) in zip(zoom_levels, vector, cached):
+            report += "\n  zoom {:.2f}: vector {:.3f}s ({:.3f}s), pixmaps/LOD {:.3f}s ({:.3f}s)".format(zoom, vector_first, vector_again, cached_first, cached_again)
+        print(report, file=sys.__stdout__)
+        self.assertLess(sum(first for first, _ in cached), sum(first for first, _ in vector))
@@ -38,9 +38,9 @@ class TestTopology(TestCase):
         self.assertEqual(self.t.resourcesType, 'cloud')
 
     def test_reset(self):
-        self.t._links = ['foo', 'baz', 'bar']
-        self.t._nodes = ['foo', 'baz', 'bar']
-        self.t._initialized_nodes = ['foo', 'baz', 'bar']
+        self.t._links = {1: 'foo', 2: 'baz', 3: 'bar'}
+        self.t._nodes = {1: 'foo', 2: 'baz', 3: 'bar'}
+        self.t._initialized_nodes = {1, 2, 3}
         test_settings = {'project_type': 'cloud'}
         MainWindow.instance()._project_settings.update(test_settings)
 
@@ -103,3 +103,146 @@ class TestTopology(TestCase):
         self.assertEqual(len(instances), 2)
         self.assertEqual(instances[0].name, 'Foo Instance')
         self.assertEqual(instances[1].name, 'Another Foo Instance')
+
+
+class FakeSignal(object):
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        self.slots.remove(slot)
+
+    def emit(self):
+        for slot in list(self.slots):
+            slot()
+
+
+class FakePort(object):
+    def __init__(self, port_id):
+        self._id = port_id
+
+    def id(self):
+        return self._id
+
+
+class FakeServer(object):
+    def __init__(self, server_id):
+        self._id = server_id
+
+    def id(self):
+        return self._id
+
+
+class FakeNode(object):
+    def __init__(self, node_id, port_ids, server_id=1, ram=0):
+        self._id = node_id
+        self._ports = [FakePort(port_id) for port_id in port_ids]
+        self._server = FakeServer(server_id)
+        self._settings = {"ram": ram}
+        self.updated_signal = FakeSignal()
+
+    def id(self):
+        return self._id
+
+    def ports(self):
+        return self._ports
+
+    def server(self):
+        return self._server
+
+    def settings(self):
+        return self._settings
+
+
+class FakeLink(object):
+    def __init__(self, link_id, source_node, source_port, destination_node, destination_port):
+        self._id = link_id
+        self._ends = (source_node, source_port, destination_node, destination_port)
+
+    def id(self):
+        return self._id
+
+    def sourceNode(self):
+        return self._ends[0]
+
+    def sourcePort(self):
+        return self._ends[1]
+
+    def destinationNode(self):
+        return self._ends[2]
+
+    def destinationPort(self):
+        return self._ends[3]
+
+
+class TestTopologyIndexes(TestCase):
+    def setUp(self):
+        self.t = Topology()
+        self.nodes = [FakeNode(node_id, [1, 2]) for node_id in (3, 1, 2)]
+        for node in self.nodes:
+            self.t.addNode(node, node_item="item{}".format(node.id()))
+
+    def test_nodes_keep_insertion_order(self):
+        self.assertEqual([node.id() for node in self.t.nodes()], [3, 1, 2])
+        self.assertIs(self.t.getNode(1), self.nodes[1])
+        self.assertIsNone(self.t.getNode(42))
+
+    def test_node_items(self):
+        self.assertEqual(self.t.getNodeItem(2), "item2")
+        self.t.removeNode(self.nodes[2])
+        self.assertIsNone(self.t.getNodeItem(2))
+        self.assertIsNone(self.t.getNode(2))
+        self.assertEqual(self.nodes[2].updated_signal.slots, [])
+
+    def test_ports(self):
+        node = self.nodes[0]
+        self.assertIs(self.t.getPort(3, 2), node.ports()[1])
+        self.assertIsNone(self.t.getPort(3, 5))
+        self.assertIsNone(self.t.getPort(42, 1))
+
+        # the port index is refreshed when the node is updated
+        node.ports().append(FakePort(5))
+        node.updated_signal.emit()
+        self.assertIs(self.t.getPort(3, 5), node.ports()[2])
+
+    def test_links(self):
+        source, destination = self.nodes[0], self.nodes[1]
+        link = FakeLink(7, source, source.ports()[0], destination, destination.ports()[1])
+        self.t.addLink(link)
+        self.assertIs(self.t.getLink(7), link)
+        self.assertIs(self.t.getPortLink(3, 1), link)
+        self.assertIs(self.t.getPortLink(1, 2), link)
+        self.assertIsNone(self.t.getPortLink(1, 1))
+        self.assertEqual(self.t.links(), [link])
+
+        self.t.removeLink(link)
+        self.assertIsNone(self.t.getLink(7))
+        self.assertIsNone(self.t.getPortLink(3, 1))
+        self.assertEqual(self.t.links(), [])
+
+    def test_server_loads(self):
+        self.assertEqual(self.t.serverLoad(1), (3, 0))
+        node = FakeNode(4, [1], server_id=2, ram=256)
+        self.t.addNode(node)
+        self.assertEqual(self.t.serverLoad(2), (1, 256))
+
+        # the RAM is updated with the node settings
+        node.settings()["ram"] = 512
+        node.updated_signal.emit()
+        self.assertEqual(self.t.serverLoad(2), (1, 512))
+
+        self.t.removeNode(node)
+        self.t.removeNode(self.nodes[0])
+        self.assertEqual(self.t.serverLoad(1), (2, 0))
+        self.assertEqual(self.t.serverLoad(2), (0, 0))
+
+    def test_reset(self):
+        self.t.reset()
+        self.assertEqual(self.t.nodes(), [])
+        self.assertIsNone(self.t.getNodeItem(3))
+        for node in self.nodes:
+            self.assertEqual(node.updated_signal.slots, [])
+        self.assertEqual(self.t.serverLoad(1), (0, 0))
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+GUI scaling benchmarks: synthetic topologies are loaded through Topology.load
+with a stub server standing in for the GNS3 server, then saved with Topology.dump.
+"""
+
+import sys
+import time
+import pytest
+from unittest import TestCase
+
+from PyQt4.QtGui import QApplication
+
+from gns3.main_window import MainWindow
+from gns3.servers import Servers
+from gns3.stub_server import StubServer
+from gns3.topology import Topology
+from gns3.items.link_item import LinkItem
+from gns3.items.node_item import NodeItem
+
+large_topology = pytest.mark.large_topology
+
+
+def syntheticTopology(node_count):
+    """
+    Builds a topology of VPCS devices connected in pairs.
+
+    :param node_count: number of nodes
+
+    :returns: topology representation
+    """
+
+    nodes = []
+    links = []
+    for index in range(node_count):
+        nodes.append({"id": index + 1,
+                      "type": "VPCSDevice",
+                      "description": "VPCS device",
+                      "server_id": 1,
+                      "properties": {"name": "PC{}".format(index + 1), "console": 4001 + index},
+                      "ports": [{"id": 100001 + index, "name": "Ethernet0", "port_number": 0}],
+                      "x": (index % 100) * 80,
+                      "y": (index // 100) * 80})
+
+    for index in range(0, node_count - 1, 2):
+        links.append({"id": index // 2 + 1,
+                      "description": "Link from PC{} port Ethernet0 to PC{} port Ethernet0".format(index + 1, index + 2),
+                      "source_node_id": index + 1,
+                      "source_port_id": 100001 + index,
+                      "destination_node_id": index + 2,
+                      "destination_port_id": 100002 + index})
+
+    return {"type": "topology",
+            "version": "1.0",
+            "topology": {"servers": [{"id": 1, "local": True}],
+                         "nodes": nodes,
+                         "links": links}}
+
+
+class TopologyBenchmark(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication(sys.argv)
+        cls.app.setOrganizationName("GNS3")
+        cls.app.setOrganizationDomain("gns3.net")
+        cls.app.setApplicationName("Testsuite")
+        cls.stub = StubServer()
+        cls.stub.start()
+        Servers.instance().setLocalServer("", cls.stub.host(), cls.stub.port(), False)
+        cls.main_window = MainWindow.instance()
+
+        # let the main window start and connect to the stub server
+        begin = time.time()
+        while not Servers.instance().localServer().connected() and time.time() - begin < 10:
+            cls.app.processEvents()
+            time.sleep(0.001)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.main_window.uiGraphicsView.reset()
+        cls.stub.stop()
+
+    def tearDown(self):
+        self.main_window.uiGraphicsView.reset()
+
+    def _load(self, node_count, timeout=600):
+        topology = syntheticTopology(node_count)
+        link_count = len(topology["topology"]["links"])
+        scene = self.main_window.uiGraphicsView.scene()
+        view = self.main_window.uiGraphicsView
+        begin = time.perf_counter()
+        Topology.instance().load(topology)
+        loaded = time.perf_counter()
+
+        # first paint of the loaded project
+        view.viewport().repaint()
+        first_paint = time.perf_counter()
+        painted_nodes = sum(1 for item in scene.items() if isinstance(item, NodeItem))
+        all_nodes_shown = first_paint if painted_nodes == node_count else None
+
+        # wait for every node to be initialized and every link to be drawn
+        nodes = links = 0
+        while time.perf_counter() - begin < timeout:
+            self.app.processEvents()
+            nodes = sum(1 for node in Topology.instance().nodes() if node.initialized())
+            links = sum(1 for item in scene.items() if isinstance(item, LinkItem))
+            if all_nodes_shown is None and sum(1 for item in scene.items() if isinstance(item, NodeItem)) == node_count:
+                all_nodes_shown = time.perf_counter()
+            if nodes == node_count and links == link_count:
+                break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - begin
+
+        # the main window redirects sys.stdout to its console view
+        print("\n{} nodes, {} links: Topology.load() {:.3f}s, first paint after {:.3f}s with {} nodes, "
+              "all nodes shown after {:.3f}s, ready after {:.3f}s ({:.0f} nodes/s)".format(node_count,
+                                                                                       link_count,
+                                                                                       loaded - begin,
+                                                                                       first_paint - begin,
+                                                                                       painted_nodes,
+                                                                                       all_nodes_shown - begin,
+                                                                                       elapsed,
+                                                                                       node_count / elapsed),
+              file=sys.__stdout__)
+        self.assertEqual(nodes, node_count)
+        self.assertEqual(links, link_count)
+
+
+
+class TestTopologyLoadBenchmark(TopologyBenchmark):
+
+    def test_load_100_nodes(self):
+        self._load(100)
+
+    def test_load_1000_nodes(self):
+        self._load(1000)
+
+    @large_topology
+    def test_load_5000_nodes(self):
+        self._load(5000)
+
+
+class TestTopologySaveBenchmark(TopologyBenchmark):
+
+    def _save(self, node_count, repeat=3):
+        """
+        Loads a synthetic topology and returns the best time to dump it.
+
+        :param node_count: number of nodes
+        :param repeat: number of dumps
+
+        :returns: time in seconds
+        """
+
+        self._load(node_count)
+        timings = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            topology = Topology.instance().dump()
+            timings.append(time.perf_counter() - begin)
+        self.assertEqual(len(topology["topology"]["nodes"]), node_count)
+        self.assertTrue(all("x" in node for node in topology["topology"]["nodes"]))
+        self.main_window.uiGraphicsView.reset()
+
+        elapsed = min(timings)
+        print("{} nodes: Topology.dump() {:.3f}s ({:.1f} us/node)".format(node_count,
+                                                                        elapsed,
+                                                                        elapsed / node_count * 1000000),
+              file=sys.__stdout__)
+        return elapsed
+
+    def test_save_scaling(self):
+        sizes = (250, 500, 1000)
+        per_node = [self._save(node_count) / node_count for node_count in sizes]
+
+        # saving must scale linearly: the time per node stays about the same
+        self.assertLess(per_node[-1], per_node[0] * 3)
+
+    @large_topology
+    def test_save_5000_nodes(self):
+        self._save(5000)
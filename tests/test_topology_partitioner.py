@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from gns3.topology_partitioner import TopologyPartitioner, RebalancePlan, cutLinks, rebalanceTopology
+from tests import BaseTest
+
+
+def clusters(count, size):
+    """
+    Builds fully meshed clusters chained by a single link.
+    """
+
+    nodes = []
+    edges = []
+    for cluster in range(count):
+        members = ["{}-{}".format(cluster, index) for index in range(size)]
+        nodes.extend(members)
+        for index, source in enumerate(members):
+            for destination in members[index + 1:]:
+                edges.append((source, destination))
+        if cluster:
+            edges.append(("{}-0".format(cluster - 1), members[0]))
+    return nodes, edges
+
+
+class FakeServer(object):
+
+    def __init__(self, server_id):
+        self._id = server_id
+
+    def id(self):
+        return self._id
+
+
+class FakeNode(object):
+
+    def __init__(self, node_id, server, ram=0):
+        self._id = node_id
+        self._server = server
+        self._ram = ram
+
+    def id(self):
+        return self._id
+
+    def server(self):
+        return self._server
+
+    def settings(self):
+        return {"ram": self._ram}
+
+
+class FakeLink(object):
+
+    def __init__(self, source, destination):
+        self._source = source
+        self._destination = destination
+
+    def sourceNode(self):
+        return self._source
+
+    def destinationNode(self):
+        return self._destination
+
+
+class FakeTopology(object):
+
+    def __init__(self, nodes, links):
+        self._nodes = nodes
+        self._links = links
+
+    def nodes(self):
+        return self._nodes
+
+    def links(self):
+        return self._links
+
+
+class TestTopologyPartitioner(BaseTest):
+
+    def test_clusters_stay_together(self):
+        nodes, edges = clusters(3, 5)
+        assignment = TopologyPartitioner(["a", "b", "c"]).partition(nodes, edges)
+        self.assertEqual(cutLinks(assignment, edges), 2)
+        for cluster in range(3):
+            self.assertEqual(len(set(assignment["{}-{}".format(cluster, index)] for index in range(5))), 1)
+
+    def test_balance(self):
+        nodes, edges = clusters(1, 12)
+        assignment = TopologyPartitioner(["a", "b"]).partition(nodes, edges)
+        loads = [list(assignment.values()).count(server) for server in ("a", "b")]
+        self.assertLessEqual(max(loads), 7)
+
+    def test_capacities(self):
+        nodes = list(range(12))
+        assignment = TopologyPartitioner(["a", "b"], {"a": 3, "b": 1}, imbalance=0).partition(nodes, [])
+        self.assertEqual(list(assignment.values()).count("a"), 9)
+
+    def test_unknown_capacity(self):
+        # a server without capacity report counts as an average server
+        nodes = list(range(12))
+        assignment = TopologyPartitioner(["a", "b", "c"], {"a": 8192, "b": 8192}, imbalance=0).partition(nodes, [])
+        self.assertEqual([list(assignment.values()).count(server) for server in ("a", "b", "c")], [4, 4, 4])
+
+    def test_refines_current_assignment(self):
+        nodes, edges = clusters(2, 4)
+        # one node of the first cluster is on the wrong server
+        initial = {node: "a" if node.startswith("0") else "b" for node in nodes}
+        initial["0-3"] = "b"
+        assignment = TopologyPartitioner(["a", "b"]).partition(nodes, edges, initial=initial)
+        self.assertEqual(cutLinks(assignment, edges), 1)
+        changed = [node for node in nodes if assignment[node] != initial[node]]
+        self.assertEqual(changed, ["0-3"])
+
+    def test_pinned_nodes(self):
+        edges = [("cloud", "r1"), ("r1", "r2"), ("r3", "r4")]
+        assignment = TopologyPartitioner(["a", "b"]).partition(["r1", "r2", "r3", "r4"], edges, pinned={"cloud": "a"})
+        self.assertNotIn("cloud", assignment)
+        self.assertEqual(assignment["r1"], "a")
+        self.assertEqual(assignment["r2"], "a")
+
+    def test_rebalance_topology(self):
+        servers = [FakeServer(1), FakeServer(2)]
+        # two linked pairs, each pair split across the servers
+        nodes = [FakeNode(index, servers[index % 2]) for index in range(4)]
+        links = [FakeLink(nodes[0], nodes[1]), FakeLink(nodes[2], nodes[3])]
+        plan = rebalanceTopology(FakeTopology(nodes, links), servers)
+        self.assertEqual(plan.cut_before, 2)
+        self.assertEqual(plan.cut_after, 0)
+        self.assertEqual(plan.saved(), 2)
+        self.assertEqual(len(plan.moves()), 2)
+
+    def test_plan_apply(self):
+        servers = [FakeServer(1), FakeServer(2)]
+        servers[1].dump = lambda: {"id": 2, "host": "10.0.0.2", "port": 8000, "local": False}
+        node = FakeNode(1, servers[0])
+        topology = {"topology": {"servers": [{"id": 1, "host": "10.0.0.1", "port": 8000, "local": False}],
+                                 "nodes": [{"id": 1, "server_id": 1}]}}
+        RebalancePlan({node: servers[1]}, 1, 0).apply(topology)
+        self.assertEqual(topology["topology"]["nodes"][0]["server_id"], 2)
+        self.assertEqual([server["id"] for server in topology["topology"]["servers"]], [1, 2])
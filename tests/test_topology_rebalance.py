@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for recreating some nodes of a loaded topology (as done when
+rebalancing a project), with a stub server standing in for the GNS3 server.
+"""
+
+import time
+
+from gns3.topology import Topology
+from gns3.items.link_item import LinkItem
+from tests.test_topology_benchmark import TopologyBenchmark, syntheticTopology
+
+
+class TestRecreateNodes(TopologyBenchmark):
+
+    def _waitFor(self, condition, timeout=30):
+        begin = time.time()
+        while not condition() and time.time() - begin < timeout:
+            self.app.processEvents()
+            time.sleep(0.01)
+        return condition()
+
+    def _links(self):
+        return [item for item in self.main_window.uiGraphicsView.scene().items() if isinstance(item, LinkItem)]
+
+    def test_recreate_nodes(self):
+        topology = Topology.instance()
+        topology.load(syntheticTopology(10))
+        self.assertTrue(self._waitFor(lambda: len(self._links()) == 5 and all(node.initialized() for node in topology.nodes())))
+        node_items = {node.id(): topology.getNodeItem(node.id()) for node in topology.nodes()}
+
+        # PC1 is linked to PC2, PC3 is linked to PC4
+        topology.recreateNodes(topology.dump(), [1, 2, 3])
+        self.assertTrue(self._waitFor(lambda: len(self._links()) == 5 and len(topology.nodes()) == 10 and
+                                      all(node.initialized() for node in topology.nodes())))
+
+        # only the recreated nodes have been deleted on the server
+        self.assertEqual(self.stub.requestCounts().get("vpcs.delete"), 3)
+
+        # the other nodes have been left in place
+        for node_id in range(4, 11):
+            self.assertIs(topology.getNodeItem(node_id), node_items[node_id])
+        for node_id in (1, 2, 3):
+            self.assertIsNot(topology.getNodeItem(node_id), node_items[node_id])
+            self.assertIsNone(node_items[node_id].scene())
+        self.assertEqual(sorted(node.name() for node in topology.nodes()), sorted("PC{}".format(index) for index in range(1, 11)))
+        self.assertEqual(sorted((link.sourceNode().id(), link.destinationNode().id()) for link in topology.links()),
+                         [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10)])
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for saving a topology while its nodes are still being created,
+with a stub server standing in for the GNS3 server.
+"""
+
+import time
+
+from gns3.topology import Topology
+from gns3.items.link_item import LinkItem
+from tests.test_topology_benchmark import TopologyBenchmark, syntheticTopology
+
+
+class TestSaveWhileLoading(TopologyBenchmark):
+
+    def _waitFor(self, condition, timeout=30):
+        begin = time.time()
+        while not condition() and time.time() - begin < timeout:
+            self.app.processEvents()
+            time.sleep(0.01)
+        return condition()
+
+    def _loaded(self):
+        topology = Topology.instance()
+        return (len(topology.nodes()) == 10 and all(node.initialized() for node in topology.nodes()) and
+                len([item for item in self.main_window.uiGraphicsView.scene().items() if isinstance(item, LinkItem)]) == 5)
+
+    def _check(self, dump):
+        nodes = dump["topology"]["nodes"]
+        self.assertEqual(sorted(node["id"] for node in nodes), list(range(1, 11)))
+        self.assertEqual(sorted(node["properties"]["name"] for node in nodes), sorted("PC{}".format(index) for index in range(1, 11)))
+        self.assertEqual(sorted((link["source_node_id"], link["destination_node_id"]) for link in dump["topology"]["links"]),
+                         [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10)])
+        servers = [server["id"] for server in dump["topology"]["servers"]]
+        self.assertEqual(len(servers), 1)
+        self.assertEqual({node["server_id"] for node in nodes}, set(servers))
+
+    def test_dump_while_loading(self):
+        topology = Topology.instance()
+        topology.load(syntheticTopology(10))
+
+        # no node has been created yet
+        self.assertFalse(any(node.initialized() for node in topology.nodes()))
+        self._check(topology.dump())
+
+        self.assertTrue(self._waitFor(self._loaded))
+        self._check(topology.dump())
+
+    def test_dump_while_creating_links(self):
+        topology = Topology.instance()
+        self.stub.setMethodLatency("vpcs.add_nio", 0.5)
+        try:
+            topology.load(syntheticTopology(10))
+
+            # the links being created are not saved twice
+            self.assertTrue(self._waitFor(lambda: all(node.initialized() for node in topology.nodes()) and len(topology.links()) == 5))
+            self.assertFalse(self._loaded())
+            self._check(topology.dump())
+            self.assertTrue(self._waitFor(self._loaded))
+        finally:
+            self.stub.setMethodLatency("vpcs.add_nio", 0.0)
+        self._check(topology.dump())
@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
-from unittest import TestCase
+from unittest import TestCase, skipIf
 
 from PyQt4.QtGui import QApplication
 
 from gns3.utils.choices_spinbox import ChoicesSpinBox
+from gns3.utils.save_project_thread import SaveProjectThread, writeFileAtomically
 
+import os
 import sys
+import json
+import stat
+import shutil
+import tempfile
 
 
 class TestChoicesSpinBox(TestCase):
@@ -31,3 +37,72 @@ class TestChoicesSpinBox(TestCase):
         self.assertEqual(self.sb.value(), 13)
         self.sb.setValue(-100)
         self.assertEqual(self.sb.value(), -1)
+
+
+class TestSaveProjectThread(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "project.gns3")
+        self.topology = {"name": "project", "topology": {"nodes": [{"id": 1, "x": 0.5}]}}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _save(self, compact=False):
+        completed = []
+        errors = []
+        thread = SaveProjectThread(self.path, self.topology, compact)
+        thread.completed.connect(completed.append)
+        thread.error.connect(lambda path, message: errors.append(message))
+        thread.run()
+        return completed, errors
+
+    def test_save(self):
+        completed, errors = self._save()
+        self.assertEqual(completed, [self.path])
+        self.assertEqual(errors, [])
+        with open(self.path) as f:
+            content = f.read()
+        self.assertIn("\n    ", content)
+        self.assertEqual(json.loads(content), self.topology)
+        # no temporary file is left behind
+        self.assertEqual(os.listdir(self.directory), ["project.gns3"])
+
+    def test_save_compact(self):
+        self._save(compact=True)
+        with open(self.path) as f:
+            content = f.read()
+        self.assertNotIn("\n", content)
+        self.assertEqual(json.loads(content), self.topology)
+
+    def test_failed_save_keeps_previous_file(self):
+        with open(self.path, "w") as f:
+            f.write("previous")
+        self.topology["topology"]["nodes"][0]["x"] = object()
+        completed, errors = self._save()
+        self.assertEqual(completed, [])
+        self.assertEqual(len(errors), 1)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "previous")
+        self.assertEqual(os.listdir(self.directory), ["project.gns3"])
+
+    def test_write_file_atomically_error(self):
+        with self.assertRaises(OSError):
+            writeFileAtomically(os.path.join(self.directory, "missing", "project.gns3"), "data")
+
+    @skipIf(sys.platform.startswith("win"), "POSIX permissions")
+    def test_write_file_atomically_keeps_mode(self):
+        with open(self.path, "w") as f:
+            f.write("previous")
+        os.chmod(self.path, 0o644)
+        writeFileAtomically(self.path, "data")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+
+    @skipIf(sys.platform.startswith("win"), "POSIX permissions")
+    def test_write_file_atomically_new_file_mode(self):
+        umask = os.umask(0o027)
+        try:
+            writeFileAtomically(self.path, "data")
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+import pytest
+
+from ws4py import WS_KEY
+from ws4py.messaging import TextMessage
+from ws4py.streaming import Stream
+
+from gns3 import websocket_client
+from gns3.websocket_client import WebSocketClient
+from gns3.pending_requests import RPC_TIMEOUT_ERROR, RPC_CONNECTION_ERROR, RPC_CONNECTION_LOST_ERROR
+from gns3.settings import DEFAULT_RPC_TIMEOUT, RPC_TIMEOUTS, DEFAULT_RECONNECT_MIN_DELAY
+from tests import GUIBaseTest
+
+large_topology = pytest.mark.large_topology
+
+
+class TestWebSocketClient(GUIBaseTest):
+    def setUp(self):
+        super(TestWebSocketClient, self).setUp()
+        self.client = WebSocketClient("ws://127.0.0.1:8000")
+        self.client._connected = True
+        self.sent = []
+        self.client.send = self.sent.append
+
+    def tearDown(self):
+        self.client.close_connection()
+        super(TestWebSocketClient, self).tearDown()
+
+    def test_send_without_batch_mode(self):
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: None)
+        self.client.send_message("vpcs.create", {"name": "PC2"}, lambda result, error=False: None)
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(json.loads(self.sent[0])["method"], "vpcs.create")
+
+    def test_batch_mode(self):
+        self.client.setBatchMode(True)
+        for name in ("PC1", "PC2", "PC3"):
+            self.client.send_message("vpcs.create", {"name": name}, lambda result, error=False: None)
+        self.client.send_notification("vpcs.settings", {"path": "vpcs"})
+        self.assertEqual(len(self.sent), 0)
+        self.client.flushBatch()
+        self.assertEqual(len(self.sent), 1)
+        batch = json.loads(self.sent[0])
+        self.assertEqual(len(batch), 4)
+        self.assertEqual([request["params"]["name"] for request in batch[:3]], ["PC1", "PC2", "PC3"])
+        self.assertNotIn("id", batch[3])
+
+    def test_batch_reply(self):
+        results = {}
+
+        def callback(result, error=False):
+            results[result["name"]] = error
+
+        self.client.setBatchMode(True)
+        self.client.send_message("vpcs.create", {"name": "PC1"}, callback)
+        self.client.send_message("vpcs.create", {"name": "PC2"}, callback)
+        self.client.flushBatch()
+        batch = json.loads(self.sent[0])
+        replies = [{"jsonrpc": 2.0, "id": batch[0]["id"], "result": {"name": "PC1"}},
+                   {"jsonrpc": 2.0, "id": batch[1]["id"], "error": {"code": -3200, "message": "failed", "name": "PC2"}}]
+        self.client.received_message(TextMessage(json.dumps(replies).encode("utf-8")))
+        self.assertEqual(results, {"PC1": False, "PC2": True})
+        self.assertEqual(self.client.inFlightCount(), 0)
+
+    def test_batch_connection_closed(self):
+        results = []
+        self.client.setBatchMode(True)
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append(result["code"]))
+        self.client.send_notification("vpcs.settings", {"path": "vpcs"})
+        self.client.close_connection()
+        self.assertEqual(results, [RPC_CONNECTION_ERROR])
+        self.assertEqual(self.client.inFlightCount(), 0)
+        self.client.flushBatch()
+        self.assertEqual(len(self.sent), 0)
+
+    def test_batch_connection_down(self):
+        results = []
+        self.client.setBatchMode(True)
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append(result["code"]))
+        self.client._connected = False
+        self.client.flushBatch()
+        self.assertEqual(results, [RPC_CONNECTION_ERROR])
+        self.assertEqual(len(self.sent), 0)
+
+    def test_batch_connection_lost(self):
+        results = []
+        self.client.setBatchMode(True)
+        self.client.setAutoReconnect(True)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: results.append(("start", result)))
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append(("create", result["code"])))
+        self.client._connectionLost()
+
+        # the idempotent request is replayed once reconnected
+        self.assertEqual(results, [("create", RPC_CONNECTION_LOST_ERROR)])
+        self.assertEqual([self.client.pendingRequests().get(request_id).method for request_id in self.client._replay_ids],
+                         ["vpcs.start"])
+        self.client.setAutoReconnect(False)
+        self.client.flushBatch()
+        self.assertEqual(len(self.sent), 0)
+
+    def test_send_connection_down(self):
+        results = []
+        self.client._connected = False
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append((result["code"], error)))
+        self.assertEqual(results, [(RPC_CONNECTION_ERROR, True)])
+        self.assertEqual(self.client.inFlightCount(), 0)
+
+    def test_restore_session_builtin_server(self):
+        from gns3.modules.builtin import Builtin
+
+        builtin = Builtin.instance()
+        builtin.addServer(self.client)
+        try:
+            self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: None)
+            request_id = json.loads(self.sent[0])["id"]
+            self.client._replay_ids.append(request_id)
+            self.client._restoreSession()
+        finally:
+            builtin.removeServer(self.client)
+        self.assertEqual([request.id for request in self.client._connection_queue], [request_id])
+
+    def test_reply_received_twice(self):
+        results = []
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: results.append(error))
+        request_id = json.loads(self.sent[0])["id"]
+        reply = {"jsonrpc": 2.0, "id": request_id, "result": True}
+        self.client.received_message(TextMessage(json.dumps(reply).encode("utf-8")))
+        self.client.received_message(TextMessage(json.dumps(reply).encode("utf-8")))
+        self.assertEqual(results, [False])
+
+    def test_request_timeout(self):
+        results = []
+        pending_requests = self.client.pendingRequests()
+        pending_requests.setMethodTimeout("vpcs.start", 0)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: results.append((result, error)))
+        self.assertEqual(self.client.inFlightCount(), 1)
+        pending_requests._expireSlot()
+        self.assertEqual(self.client.inFlightCount(), 0)
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0][1])
+        self.assertEqual(results[0][0]["code"], RPC_TIMEOUT_ERROR)
+
+    def test_method_timeout(self):
+        pending_requests = self.client.pendingRequests()
+        self.assertEqual(pending_requests.methodTimeout("dynamips.vm.idlepcs"), RPC_TIMEOUTS["*.idlepcs"])
+        self.assertEqual(pending_requests.methodTimeout("vpcs.add_nio"), DEFAULT_RPC_TIMEOUT)
+
+    def test_max_pending_requests(self):
+        results = []
+        self.client.pendingRequests().setMaxPending(1)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: results.append(error))
+        self.client.send_message("vpcs.start", {"id": 2}, lambda result, error=False: results.append(error))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(results, [True])
+
+    def _reply(self, frame, result=True):
+        reply = {"jsonrpc": 2.0, "id": json.loads(frame)["id"], "result": result}
+        self.client.received_message(TextMessage(json.dumps(reply).encode("utf-8")))
+
+    def test_in_flight_window(self):
+        self.client.setInFlightWindow(2)
+        for name in ("PC1", "PC2", "PC3", "PC4"):
+            self.client.send_message("vpcs.create", {"name": name}, lambda result, error=False: None)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: None)
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.client.inFlightCount(), 2)
+        self.assertEqual(self.client.queuedCount(), 3)
+
+        # interactive requests are released before bulk requests
+        self._reply(self.sent[0])
+        self.assertEqual(len(self.sent), 3)
+        self.assertEqual(json.loads(self.sent[2])["method"], "vpcs.start")
+        self._reply(self.sent[1])
+        self._reply(self.sent[2])
+        self.assertEqual([json.loads(frame)["params"].get("name") for frame in self.sent[3:]], ["PC3", "PC4"])
+        self.assertEqual(self.client.queuedCount(), 0)
+
+    def test_in_flight_window_disabled(self):
+        # the window is opt-in, requests are sent in order by default
+        self.assertEqual(self.client.inFlightWindow(), 0)
+        for index in range(100):
+            self.client.send_message("vpcs.create", {"name": "PC{}".format(index)}, lambda result, error=False: None)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: None)
+        self.assertEqual(len(self.sent), 101)
+        self.assertEqual(json.loads(self.sent[-1])["method"], "vpcs.start")
+
+    def test_in_flight_window_node_order(self):
+        self.client.setInFlightWindow(1)
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: None)
+        self.client.send_message("vpcs.add_nio", {"id": 1, "port_id": 0}, lambda result, error=False: None)
+        self.client.send_message("vpcs.update", {"id": 1, "name": "PC2"}, lambda result, error=False: None)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: None)
+        self.client.send_message("vpcs.start", {"id": 2}, lambda result, error=False: None)
+        self.assertEqual(self.client.queuedCount(), 4)
+        while len(self.sent) < 5:
+            self._reply(self.sent[-1])
+
+        # the requests for the same node keep their order, the others may overtake them
+        self.assertEqual([(json.loads(frame)["method"], json.loads(frame)["params"].get("id")) for frame in self.sent],
+                         [("vpcs.create", None), ("vpcs.start", 2), ("vpcs.add_nio", 1), ("vpcs.update", 1), ("vpcs.start", 1)])
+        self.assertEqual(self.client._window_nodes, {})
+
+    def test_in_flight_window_release_on_timeout(self):
+        pending_requests = self.client.pendingRequests()
+        pending_requests.setMethodTimeout("vpcs.start", 0)
+        self.client.setInFlightWindow(1)
+        self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: None)
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: None)
+        self.assertEqual(len(self.sent), 1)
+        pending_requests._expireSlot()
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.client.queuedCount(), 0)
+
+    def test_in_flight_window_closed(self):
+        results = []
+        self.client.setInFlightWindow(1)
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: None)
+        self.client.send_message("vpcs.create", {"name": "PC2"}, lambda result, error=False: results.append(result["code"]))
+        self.client.close_connection()
+        self.assertEqual(results, [RPC_CONNECTION_ERROR])
+        self.assertEqual(self.client.queuedCount(), 0)
+
+    def test_rpc_stats(self):
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: None)
+        self.client.send_message("vpcs.create", {"name": "PC2"}, lambda result, error=False: None)
+        self._reply(self.sent[0])
+        stats = self.client.rpcStats().methods()["vpcs.create"]
+        self.assertEqual(stats.requests, 2)
+        self.assertEqual(stats.replies, 1)
+        self.assertEqual(stats.bytes_sent, len(self.sent[0]) + len(self.sent[1]))
+        self.assertGreater(stats.bytes_received, 0)
+        self.assertEqual(stats.latency.count, 1)
+
+    def test_notification_routing(self):
+        from gns3.modules import notificationRoute, registerNotificationRoute, unregisterNotificationRoute
+        from gns3.modules.vpcs import VPCS
+        from gns3.modules.dynamips import Dynamips
+
+        self.assertIs(notificationRoute("vpcs.vpcs_stopped"), VPCS.instance())
+        self.assertIs(notificationRoute("dynamips.vm.crashed"), Dynamips.instance())
+        self.assertIsNone(notificationRoute("unknown.event"))
+
+        registerNotificationRoute("unknown.event", VPCS.instance())
+        self.assertIs(notificationRoute("unknown.event"), VPCS.instance())
+        unregisterNotificationRoute("unknown.event")
+        self.assertIsNone(notificationRoute("unknown.event"))
+
+    def test_notification_route_registered_first(self):
+        from gns3 import notification_routes
+        from gns3.modules import notificationRoute, registerNotificationRoute, unregisterNotificationRoute
+        from gns3.modules.vpcs import VPCS
+        from gns3.modules.qemu import Qemu
+
+        notification_routes._notification_routes.clear()
+        notification_routes._routes_built = False
+        try:
+            registerNotificationRoute("vpcs.special", Qemu.instance())
+            self.assertIs(notificationRoute("vpcs.special"), Qemu.instance())
+            # the module name prefixes are still routed
+            self.assertIs(notificationRoute("vpcs.vpcs_stopped"), VPCS.instance())
+        finally:
+            unregisterNotificationRoute("vpcs.special")
+
+    def test_module_notification_methods(self):
+        from gns3 import notification_routes
+        from gns3.modules import notificationRoute
+        from gns3.modules.qemu import Qemu
+
+        qemu = Qemu.instance()
+        qemu.notificationMethods = lambda: ["builtin.interfaces_changed"]
+        notification_routes._notification_routes.clear()
+        notification_routes._routes_built = False
+        try:
+            self.assertIs(notificationRoute("builtin.interfaces_changed"), qemu)
+        finally:
+            del qemu.notificationMethods
+            notification_routes._notification_routes.clear()
+            notification_routes._routes_built = False
+
+
+class WebSocketClientReadTest(GUIBaseTest):
+    """
+    Read path tests using a local socket pair to emulate the server.
+    """
+
+    frame_count = 100
+
+    def setUp(self):
+        super(WebSocketClientReadTest, self).setUp()
+        self.client = WebSocketClient("ws://127.0.0.1:8000")
+        self.client.sock.close()
+        self.client.sock, self.server_sock = socket.socketpair()
+        self.client._connected = True
+        self.results = []
+
+    def tearDown(self):
+        self.client.close_connection()
+        self.server_sock.close()
+        super(WebSocketClientReadTest, self).tearDown()
+
+    def _pushFrames(self):
+        frames = []
+        for index in range(self.frame_count):
+            request_id = "request-{}".format(index)
+            self.client.pendingRequests().add(request_id, "vpcs.start", self._callback)
+            reply = json.dumps({"jsonrpc": 2.0, "id": request_id, "result": {"id": index}})
+            frames.append(TextMessage(reply.encode("utf-8")).single(mask=False))
+        sender = threading.Thread(target=self.server_sock.sendall, args=(b"".join(frames),))
+        sender.start()
+        return sender
+
+    def _callback(self, result, error=False):
+        self.results.append(result["id"])
+
+    def _readOneFramePerActivation(self):
+        # the previous read path: one websocket frame parsed per socket activation
+        sender = self._pushFrames()
+        activations = 0
+        while len(self.results) < self.frame_count:
+            self.assertTrue(self.client.once())
+            activations += 1
+        sender.join()
+        self.assertEqual(self.results, list(range(self.frame_count)))
+        return activations
+
+    def _drainFramesPerActivation(self):
+        sender = self._pushFrames()
+        activations = 0
+        while len(self.results) < self.frame_count:
+            self.client.data_received(self.client.sock.fileno())
+            activations += 1
+        sender.join()
+        self.assertEqual(self.results, list(range(self.frame_count)))
+        self.assertTrue(self.client.connected())
+        self.assertEqual(self.client.inFlightCount(), 0)
+        return activations
+
+
+class TestWebSocketClientRead(WebSocketClientReadTest):
+
+    def test_drain_frames_per_activation(self):
+        self._drainFramesPerActivation()
+
+    def test_connection_lost(self):
+        self.server_sock.shutdown(socket.SHUT_WR)
+        self.client.data_received(self.client.sock.fileno())
+        self.assertFalse(self.client.connected())
+
+
+@large_topology
+class TestWebSocketClientReadBenchmark(WebSocketClientReadTest):
+
+    frame_count = 10000
+
+    def test_read_one_frame_per_activation(self):
+        begin = time.perf_counter()
+        activations = self._readOneFramePerActivation()
+        elapsed = time.perf_counter() - begin
+        print("\none frame per activation: {} frames in {:.3f}s ({:.0f} frames/s, {} activations)".format(self.frame_count,
+                                                                                                     elapsed,
+                                                                                                     self.frame_count / elapsed,
+                                                                                                     activations))
+
+    def test_drain_frames_per_activation(self):
+        begin = time.perf_counter()
+        activations = self._drainFramesPerActivation()
+        elapsed = time.perf_counter() - begin
+        print("\ndrain per activation: {} frames in {:.3f}s ({:.0f} frames/s, {} activations)".format(self.frame_count,
+                                                                                                 elapsed,
+                                                                                                 self.frame_count / elapsed,
+                                                                                                 activations))
+
+
+class TestWebSocketClientConnection(GUIBaseTest):
+    """
+    Non-blocking connection tests using a local websocket server.
+    """
+
+    def setUp(self):
+        super(TestWebSocketClientConnection, self).setUp()
+        self.listening_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listening_sock.bind(("127.0.0.1", 0))
+        self.listening_sock.listen(1)
+        self.port = self.listening_sock.getsockname()[1]
+        self.client = WebSocketClient("ws://127.0.0.1:{}".format(self.port))
+        self.received = []
+
+    def tearDown(self):
+        self.client.close_connection()
+        self.listening_sock.close()
+        super(TestWebSocketClientConnection, self).tearDown()
+
+    def _accept(self):
+        server_sock, _ = self.listening_sock.accept()
+        request = b""
+        while b"\r\n\r\n" not in request:
+            request += server_sock.recv(4096)
+        key = re.search(b"Sec-WebSocket-Key: (.+)\r\n", request).group(1)
+        accept = base64.b64encode(hashlib.sha1(key + WS_KEY).digest())
+        server_sock.sendall(b"HTTP/1.1 101 Switching Protocols\r\n"
+                            b"Upgrade: websocket\r\n"
+                            b"Connection: Upgrade\r\n"
+                            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        return server_sock
+
+    def _receive(self, server_sock, count=1):
+        stream = Stream(expect_masking=True)
+        for _ in range(count):
+            while not stream.has_message:
+                stream.parser.send(server_sock.recv(1))
+            self.received.append(json.loads(stream.message.data.decode("utf-8")))
+            stream.message = None
+
+    def _serve(self):
+        server_sock = self._accept()
+        self._receive(server_sock)
+        server_sock.close()
+
+    def _serveAndDrop(self):
+        # first connection is dropped after receiving 2 requests
+        server_sock = self._accept()
+        self._receive(server_sock, 2)
+        server_sock.close()
+        # second connection receives the replayed request
+        server_sock = self._accept()
+        self._receive(server_sock)
+        server_sock.close()
+
+    def _waitForState(self, states, timeout=5.0):
+        begin = time.time()
+        while self.client.state() not in states and time.time() - begin < timeout:
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def test_connect_async(self):
+        server = threading.Thread(target=self._serve)
+        server.start()
+        self.client.connectAsync()
+        self.assertTrue(self.client.isConnecting())
+
+        # requests are queued until the connection is ready
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: None)
+        self._waitForState([WebSocketClient.ready, WebSocketClient.disconnected])
+        server.join(5)
+        self.assertEqual(self.client.state(), WebSocketClient.ready)
+        self.assertTrue(self.client.connected())
+        self.assertEqual(self.received[0]["method"], "vpcs.create")
+
+    def test_connect_async_refused(self):
+        self.listening_sock.close()
+        results = []
+        self.client.connectAsync()
+        self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append((result, error)))
+        self._waitForState([WebSocketClient.ready, WebSocketClient.disconnected])
+        self.assertEqual(self.client.state(), WebSocketClient.disconnected)
+        self.assertFalse(self.client.connected())
+        self.assertEqual(len(results), 1)
+        self.assertTrue(results[0][1])
+        self.assertEqual(results[0][0]["code"], RPC_CONNECTION_ERROR)
+
+    def test_connect_async_refused_twice(self):
+        self.listening_sock.close()
+        for _ in range(2):
+            results = []
+            self.client.connectAsync()
+            self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append((result, error)))
+            self._waitForState([WebSocketClient.ready, WebSocketClient.disconnected])
+            self.assertEqual(self.client.state(), WebSocketClient.disconnected)
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0][0]["code"], RPC_CONNECTION_ERROR)
+
+    def test_reconnect_and_replay(self):
+        results = []
+        websocket_client.DEFAULT_RECONNECT_MIN_DELAY = 0.01
+        try:
+            server = threading.Thread(target=self._serveAndDrop)
+            server.start()
+            self.client.setAutoReconnect(True)
+            self.client.connectAsync()
+            self._waitForState([WebSocketClient.ready])
+            self.client.send_message("vpcs.start", {"id": 1}, lambda result, error=False: results.append(("start", error)))
+            self.client.send_message("vpcs.create", {"name": "PC1"}, lambda result, error=False: results.append(("create", result, error)))
+
+            # wait for the connection to be lost then restored
+            self._waitForState([WebSocketClient.disconnected])
+            self._waitForState([WebSocketClient.ready])
+            server.join(5)
+        finally:
+            websocket_client.DEFAULT_RECONNECT_MIN_DELAY = DEFAULT_RECONNECT_MIN_DELAY
+
+        # the non-idempotent request failed, the other one has been replayed
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0], "create")
+        self.assertEqual(results[0][1]["code"], RPC_CONNECTION_LOST_ERROR)
+        self.assertEqual([request["method"] for request in self.received], ["vpcs.start", "vpcs.create", "vpcs.start"])
+        self.assertEqual(self.received[0]["id"], self.received[2]["id"])
+        self.assertEqual(self.client.inFlightCount(), 1)